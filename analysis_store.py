@@ -0,0 +1,194 @@
+"""
+Kho kết quả phân tích dùng chung cho mọi phiên trong một process.
+
+Mỗi phiên Streamlit trước đây giữ ``ResultCache`` riêng trong
+session_state, nên N người xem tính N lần cùng một dàn nuôi, lâu ra hay
+backtest. ``AnalysisStore`` gắn với một phiên bản dữ liệu: lịch sử căn
+ngày của từng nguồn so sánh và mọi kết quả (theo AnalysisKey) được tính
+một lần và dùng chung chỉ đọc; các lần trượt cùng khóa chờ nhau thay vì
+tính lặp (ResultCache.get_or_compute). Bảng lô gan của kho mới được nối
+tiếp từ kho trước khi dữ liệu chỉ thêm kỳ mới.
+
+``SharedAnalyses`` giữ kho của ``KEEP`` (2) phiên bản mới nhất: khi
+HistoryRefresher thay bảng lịch sử, kho trước vẫn phục vụ các phiên đang
+chạy dở với bảng cũ, còn kho cũ hơn nữa bị bỏ, nên bộ nhớ không tăng theo
+số người xem hay số lần làm mới. Kho mới được làm nóng ở nền với tham số
+mặc định của app, nên người mở trang không phải chờ tính toán.
+
+Các phương thức có cùng chữ ký với ``api_server.ApiClient``, nên app dùng
+được một trong hai.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from dan_query import query_stats
+from engine import (COMPARE_SOURCES, HORIZON, LO_GAN_SOURCES, NUM_DAYS, RESULT_TYPES, aligned_frame,
+                    backtest_report, dan_nuoi_table, gap_index, lau_ra_levels, lo_codes, lo_gan,
+                    strategy_significance)
+from gap_index import GapIndex
+from history import HistoryFrame
+from result_cache import AnalysisKey, ResultCache
+
+MAXSIZE = 256       # số kết quả giữ trong một kho (LRU)
+DEFAULT_EMPTY = 4
+DEFAULT_LEVELS = (0, 1, 2)
+
+
+class AnalysisStore:
+    """Read-only analyses of one history version, computed once per parameter set."""
+
+    def __init__(self, history: HistoryFrame, maxsize: int = MAXSIZE,
+                 previous: Optional["AnalysisStore"] = None):
+        self.history = history
+        self.version = history.version
+        self.cache = ResultCache(maxsize=maxsize)
+        self._aligned = {c: aligned_frame(history, c) for c in COMPARE_SOURCES}
+        # Lô gan đã tính của phiên bản trước: chỉ giữ mã các kỳ và chỉ số, không giữ
+        # bảng lịch sử hay kho cũ; được bỏ khi đã dùng hoặc khi làm nóng xong
+        self._lo_gan_base: Dict[str, Tuple[np.ndarray, GapIndex]] = {}
+        if previous is not None:
+            for source in LO_GAN_SOURCES:
+                index = previous.cache.get(AnalysisKey("lo_gan", previous.version, None, source))
+                if index is not None:
+                    self._lo_gan_base[source] = (lo_codes(previous.history, source), index)
+
+    def aligned(self, compare_source: str) -> HistoryFrame:
+        """Những ngày có đủ TT, ĐT và nguồn so sánh (như engine.aligned_frame)."""
+        return self._aligned[compare_source]
+
+    def aligned_rows(self, compare_source: str) -> int:
+        return len(self._aligned[compare_source])
+
+    def view(self, offset: int, compare_source: str) -> HistoryFrame:
+        return self._aligned[compare_source].window(offset, NUM_DAYS)
+
+    def dan_nuoi(self, offset: int, compare_source: str, result_type: str, include_duplicates: bool):
+        """Như engine.dan_nuoi_table: (bảng, mức số từ dàn chưa ra)."""
+        return self.cache.get_or_compute(
+            AnalysisKey("dan_nuoi", self.version, offset, compare_source,
+                        result_type=result_type, include_duplicates=include_duplicates),
+            lambda: dan_nuoi_table(self.view(offset, compare_source), result_type, compare_source,
+                                   include_duplicates))
+
+    def lau_ra(self, offset: int, compare_source: str, source: str, threshold: int):
+        """Như engine.lau_ra_levels cho TT hoặc ĐT."""
+        if source == "TT":
+            key = AnalysisKey("lau_ra_tt", self.version, offset, compare_source, empty_tt=threshold)
+        else:
+            key = AnalysisKey("lau_ra_dt", self.version, offset, compare_source, empty_dt=threshold)
+
+        def compute():
+            view = self.view(offset, compare_source)
+            results = view.text("than_tai" if source == "TT" else "dien_toan")
+            return lau_ra_levels(results, view.last2(COMPARE_SOURCES[compare_source]), threshold)
+        return self.cache.get_or_compute(key, compute)
+
+    def muc_so(self, offset: int, compare_source: str, empty_tt: int, empty_dt: int) -> Dict[str, tuple]:
+        """{"TT": ..., "ĐT": ...}; mỗi loại được cache riêng theo ngưỡng của nó."""
+        return {"TT": self.lau_ra(offset, compare_source, "TT", empty_tt),
+                "ĐT": self.lau_ra(offset, compare_source, "ĐT", empty_dt)}
+
+    def backtest(self, offset: int, compare_source: str, horizon: int, empty_tt: int, empty_dt: int):
+        """Như engine.backtest_report: (bảng, thống kê hit rate, số lần trúng theo mức)."""
+        return self.cache.get_or_compute(
+            AnalysisKey("backtest", self.version, offset, compare_source,
+                        empty_tt=empty_tt, empty_dt=empty_dt, horizon=horizon),
+            lambda: backtest_report(self.aligned(compare_source), compare_source, offset, horizon,
+                                    empty_tt, empty_dt))
+
+    def significance(self, offset: int, compare_source: str, source: str, horizon: int,
+                     empty_tt: int, empty_dt: int, levels: Sequence[int], null: str = "uniform") -> Dict:
+        """Như engine.strategy_significance."""
+        levels = tuple(sorted(set(levels)))
+        threshold = empty_tt if source == "TT" else empty_dt
+        return self.cache.get_or_compute(
+            AnalysisKey(f"significance_{source}", self.version, offset, compare_source,
+                        empty_tt=empty_tt, empty_dt=empty_dt, horizon=horizon, levels=levels, null=null),
+            lambda: strategy_significance(self.aligned(compare_source), compare_source, source, offset,
+                                          horizon, threshold, levels, null=null))
+
+    def thong_ke(self, compare_source: str) -> GapIndex:
+        """Chỉ số lâu ra ĐB/G1 trên toàn bộ lịch sử."""
+        return self.cache.get_or_compute(
+            AnalysisKey("thong_ke", self.version, None, compare_source),
+            lambda: gap_index(self.history, compare_source))
+
+    def dan_query(self, compare_source: str, query: str) -> Dict[str, object]:
+        """Như dan_query.query_stats trên các kỳ ĐB/G1 của toàn bộ lịch sử (QueryError khi sai cú pháp)."""
+        key = COMPARE_SOURCES[compare_source]
+        return query_stats(query, self.history.complete(key).pair_codes(key))
+
+    def lo_gan(self, source: str) -> GapIndex:
+        """Lô gan từng cặp của một giải trong LO_GAN_SOURCES (bảng "pair" của GapIndex)."""
+        def compute():
+            return lo_gan(self.history, source, self._lo_gan_base.pop(source, None))
+        return self.cache.get_or_compute(AnalysisKey("lo_gan", self.version, None, source), compute)
+
+    def warm(self) -> None:
+        """Tính trước các phân tích với tham số mặc định của app (offset 0)."""
+        for compare_source in COMPARE_SOURCES:
+            if not len(self.view(0, compare_source)):
+                continue
+            for result_type in RESULT_TYPES:
+                self.dan_nuoi(0, compare_source, result_type, True)
+            self.muc_so(0, compare_source, DEFAULT_EMPTY, DEFAULT_EMPTY)
+            self.backtest(0, compare_source, HORIZON, DEFAULT_EMPTY, DEFAULT_EMPTY)
+            for source in ("TT", "ĐT"):
+                self.significance(0, compare_source, source, HORIZON, DEFAULT_EMPTY, DEFAULT_EMPTY,
+                                  DEFAULT_LEVELS)
+            self.thong_ke(compare_source)
+        for source in LO_GAN_SOURCES:
+            self.lo_gan(source)
+        self.release()
+
+    def release(self) -> None:
+        """Bỏ dữ liệu mượn từ phiên bản trước (lô gan chưa dùng sẽ được tính đầy đủ)."""
+        self._lo_gan_base.clear()
+
+
+class SharedAnalyses:
+    """
+    Holds the AnalysisStores of the ``KEEP`` newest history versions (một cho cả process).
+
+    Kho của phiên bản trước được giữ cho các phiên đang chạy dở với bảng
+    lịch sử cũ; cũ hơn nữa thì bị bỏ.
+    """
+
+    KEEP = 2
+
+    def __init__(self, maxsize: int = MAXSIZE, warm: bool = True):
+        self.maxsize = maxsize
+        self.warm = warm
+        self._stores: "OrderedDict[str, AnalysisStore]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def find(self, version: str) -> Optional[AnalysisStore]:
+        """Kho của một phiên bản còn được giữ, hoặc None."""
+        with self._lock:
+            return self._stores.get(version)
+
+    def get(self, history: HistoryFrame) -> AnalysisStore:
+        """Kho của ``history``; dựng mới (và làm nóng ở nền) khi gặp phiên bản dữ liệu mới."""
+        with self._lock:
+            store = self._stores.get(history.version)
+            if store is not None:
+                return store
+            previous = next(reversed(self._stores.values()), None)
+            store = self._stores[history.version] = AnalysisStore(history, self.maxsize, previous)
+            while len(self._stores) > self.KEEP:
+                self._stores.popitem(last=False)
+        if self.warm:
+            threading.Thread(target=self._warm, args=(store,), name="analysis-warm", daemon=True).start()
+        return store
+
+    @staticmethod
+    def _warm(store: AnalysisStore) -> None:
+        try:
+            store.warm()
+        except Exception as e:
+            logging.error(f"Warming analyses of {store.version} failed: {e}")
@@ -0,0 +1,638 @@
+"""
+Dịch vụ JSON cục bộ phục vụ các phân tích của app cho nhiều người xem.
+
+Mỗi phiên Streamlit chạy lại cả script, nên khi nhiều người cùng mở trang,
+Dàn Nuôi, lâu ra, Mức Số và backtest bị tính lặp lại cho từng người. Máy
+chủ này tính mỗi bộ tham số một lần cho mỗi phiên bản dữ liệu, giữ sẵn
+phản hồi JSON và gắn ETag theo (phiên bản dữ liệu, tham số), nên yêu cầu
+lặp lại chỉ là một lần tra cache (hoặc 304 khi client gửi If-None-Match).
+App đặt ``SIEUGA_API`` là client mỏng: lấy bảng lịch sử từ ``/history`` và
+không tự tải trang nguồn hay tính gì::
+
+    python api_server.py --port 8766
+    curl "http://127.0.0.1:8766/muc-so?offset=0&compare=GĐB&empty_tt=4&empty_dt=4"
+    SIEUGA_API=http://127.0.0.1:8766 streamlit run streamlit_app.py
+
+Đường dẫn (tham số như sidebar, mặc định như app):
+
+- ``/dan-nuoi``: offset, compare, result_type, include_duplicates
+- ``/muc-so``: offset, compare, empty_tt, empty_dt (dàn lâu ra và mức của TT, ĐT)
+- ``/backtest``: offset, compare, horizon, empty_tt, empty_dt
+- ``/significance``: như /backtest, thêm source (TT/ĐT), levels, null
+- ``/thong-ke``: compare
+- ``/lo-gan``: source (ĐB, G1, TT, ĐT)
+- ``/dan-query``: compare, q (biểu thức của dan_query.py)
+- ``/aligned``: compare (số ngày đủ TT, ĐT và nguồn so sánh)
+- ``/history``: bảng lịch sử (ngày, nhãn, giá trị từng nguồn); since, newest
+  (version và ngày mới nhất của bảng client đang giữ) để chỉ nhận các kỳ mới
+- ``/status``: phiên bản dữ liệu
+
+Mọi đường dẫn phân tích nhận thêm ``version``: kết quả được tính trên đúng
+phiên bản đó nếu máy chủ còn giữ (SharedAnalyses.KEEP), không thì 409, nên
+mọi phản hồi trong một lần chạy của app cùng một bảng lịch sử.
+
+``ApiClient`` giải mã phản hồi về đúng các đối tượng mà các hàm trong
+engine.py trả về, nên app dùng nó thay cho tính tại chỗ.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from copy import copy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+import numpy as np
+import pandas as pd
+import requests
+
+from analysis_store import AnalysisStore, SharedAnalyses
+from dan import Dan
+from dan_query import QueryError
+from engine import COMPARE_SOURCES, HORIZON, LO_GAN_SOURCES, NULL_MODELS, RESULT_TYPES, TOTAL_DAYS
+from history import DT_WIDTHS, DTYPES, HistoryFrame
+from refresher import HistoryRefresher
+from result_cache import AnalysisKey, ResultCache
+from store import SOURCES, DrawStore
+
+DEFAULT_PORT = 8766
+CLIENT_TIMEOUT = 120    # giây; lần tính đầu của một bộ tham số có thể lâu
+CLIENT_MAX_DECODED = 256    # số phản hồi đã giải mã client giữ (LRU)
+
+
+# ============ MÃ HÓA JSON ============
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+def encode_frame(df: pd.DataFrame) -> Dict[str, Any]:
+    """DataFrame -> dict JSON giữ cột, chỉ mục và kiểu dữ liệu (NaN thành null)."""
+    index = None if isinstance(df.index, pd.RangeIndex) else df.index.tolist()
+    return {
+        "columns": df.columns.tolist(),
+        "index": index,
+        "index_name": df.index.name,
+        "dtypes": [str(t) for t in df.dtypes],
+        "data": df.astype(object).where(df.notna(), None).values.tolist(),
+    }
+
+
+def decode_frame(obj: Dict[str, Any]) -> pd.DataFrame:
+    index = pd.Index(obj["index"], name=obj["index_name"]) if obj["index"] is not None else None
+    df = pd.DataFrame(obj["data"], columns=obj["columns"], index=index)
+    if index is None:
+        df.index.name = obj["index_name"]
+    return df.astype(dict(zip(obj["columns"], obj["dtypes"])))
+
+
+def _encode_rows(rows) -> List[List[str]]:
+    return [[str(result), dan.to_string(",")] for result, dan in rows]
+
+
+def _decode_rows(rows) -> List[Tuple[str, Dan]]:
+    return [(result, Dan.parse(dan)) for result, dan in rows]
+
+
+def encode_lau_ra(value) -> Dict[str, Any]:
+    """Kết quả của engine.lau_ra_levels."""
+    lau_ra, actual, table, muc_results = value
+    return {
+        "lau_ra": _encode_rows(lau_ra),
+        "threshold": actual,
+        "table": [[t, _encode_rows(rows)] for t, rows in table.items()],
+        "levels": [{"level": m["level"], "count": m["count"], "pairs": m["pairs"].to_string(",")}
+                   for m in muc_results],
+    }
+
+
+def decode_lau_ra(obj: Dict[str, Any]):
+    return (_decode_rows(obj["lau_ra"]), obj["threshold"],
+            {t: _decode_rows(rows) for t, rows in obj["table"]},
+            [{"level": m["level"], "count": m["count"], "pairs": Dan.parse(m["pairs"])} for m in obj["levels"]])
+
+
+def encode_levels(levels: Dict[int, Dan]) -> List[List]:
+    return [[level, dan.to_string(",")] for level, dan in levels.items()]
+
+
+def decode_levels(obj) -> Dict[int, Dan]:
+    return {level: Dan.parse(pairs) for level, pairs in obj}
+
+
+def encode_history(history: HistoryFrame) -> Dict[str, Any]:
+    """Bảng lịch sử -> dict JSON (ngày ISO, nhãn, giá trị -1 khi thiếu)."""
+    return {
+        "dates": [str(d) for d in history.dates],
+        "labels": history.labels.tolist(),
+        "values": {source: history.values[source].tolist() for source in SOURCES},
+    }
+
+
+def decode_history(obj: Dict[str, Any]) -> HistoryFrame:
+    dates = np.array(obj["dates"], dtype="datetime64[D]")
+    values = {}
+    for source in SOURCES:
+        shape = (len(dates), len(DT_WIDTHS)) if source == "dien_toan" else (len(dates),)
+        values[source] = np.array(obj["values"][source], dtype=DTYPES[source]).reshape(shape)
+    return HistoryFrame.from_arrays(dates, values, np.array(obj["labels"], dtype=object))
+
+
+def prepend_history(rows: HistoryFrame, held: HistoryFrame) -> HistoryFrame:
+    """Bảng lịch sử gồm các kỳ mới ``rows`` rồi tới bảng ``held`` đã có."""
+    return HistoryFrame.from_arrays(
+        np.concatenate([rows.dates, held.dates]),
+        {source: np.concatenate([rows.values[source], held.values[source]]) for source in SOURCES},
+        np.concatenate([rows.labels, held.labels]))
+
+
+def encode_query(stats: Dict[str, Any]) -> Dict[str, Any]:
+    return {**stats, "dan": stats["dan"].to_string(",")}
+
+
+def decode_query(obj: Dict[str, Any]) -> Dict[str, Any]:
+    return {**obj, "dan": Dan.parse(obj["dan"])}
+
+
+class RemoteGapIndex:
+    """Bảng thống kê lâu ra đã tính ở máy chủ; cùng ``n``, ``tables``, ``summary`` và ``gap_counts`` như GapIndex."""
+
+    def __init__(self, n: int, tables: Dict[str, np.ndarray], summaries: Dict[str, pd.DataFrame],
+                 counts: Dict[str, np.ndarray]):
+        self.n = n
+        self.tables = tables
+        self.summaries = summaries
+        self.counts = counts
+
+    def summary(self, name: str) -> pd.DataFrame:
+        return self.summaries[name]
+
+    def gap_counts(self, name: str) -> np.ndarray:
+        return self.counts[name]
+
+
+def encode_gap_index(index) -> Dict[str, Any]:
+    """GapIndex (hoặc RemoteGapIndex) -> dict JSON: bảng phân loại, summary và gap_counts của mọi loại."""
+    return {
+        "n": index.n,
+        "tables": {name: np.asarray(table).tolist() for name, table in index.tables.items()},
+        "summaries": {name: encode_frame(index.summary(name)) for name in index.tables},
+        "counts": {name: index.gap_counts(name).tolist() for name in index.tables},
+    }
+
+
+def decode_gap_index(obj: Dict[str, Any]) -> RemoteGapIndex:
+    summaries = {name: decode_frame(frame) for name, frame in obj["summaries"].items()}
+    counts = {name: np.array(c, dtype=np.int64).reshape(len(summaries[name]), -1)
+              for name, c in obj["counts"].items()}
+    return RemoteGapIndex(obj["n"], {name: np.array(t) for name, t in obj["tables"].items()}, summaries, counts)
+
+
+# ============ THAM SỐ ============
+def _one(params: Dict[str, List[str]], name: str, default: str) -> str:
+    return params.get(name, [default])[-1]
+
+
+def _int(params, name: str, default: int, lo: int, hi: Optional[int] = None) -> int:
+    text = _one(params, name, str(default))
+    try:
+        value = int(text)
+    except ValueError as e:
+        raise ValueError(f"{name} phải là số nguyên, nhận {text!r}") from e
+    if value < lo or (hi is not None and value > hi):
+        raise ValueError(f"{name} phải trong khoảng {lo}..{hi if hi is not None else '∞'}, nhận {value}")
+    return value
+
+
+def _choice(params, name: str, choices, default: str) -> str:
+    value = _one(params, name, default)
+    if value not in choices:
+        raise ValueError(f"{name} phải là một trong {list(choices)}, nhận {value!r}")
+    return value
+
+
+def _bool(params, name: str, default: bool) -> bool:
+    text = _one(params, name, "true" if default else "false").lower()
+    if text not in ("true", "false", "1", "0", "yes", "no"):
+        raise ValueError(f"{name} phải là true/false, nhận {text!r}")
+    return text in ("true", "1", "yes")
+
+
+def _levels(params, default: str = "0,1,2") -> Tuple[int, ...]:
+    text = _one(params, "levels", default)
+    try:
+        return tuple(sorted({int(t) for t in text.split(",") if t.strip()}))
+    except ValueError as e:
+        raise ValueError(f"levels phải là danh sách số nguyên, nhận {text!r}") from e
+
+
+# ============ PHÂN TÍCH ============
+class StaleVersion(LookupError):
+    """Phiên bản dữ liệu được yêu cầu không còn được giữ (HTTP 409)."""
+
+
+class Analyses:
+    """
+    Encoded endpoint payloads over the shared AnalysisStore of the current history.
+
+    Kết quả được tính trong AnalysisStore (dùng chung với app nếu cùng
+    process); ở đây chỉ giữ thêm bytes JSON đã mã hóa. Khóa gồm phiên bản
+    dữ liệu, nên khi HistoryRefresher thay bảng lịch sử mới, các phản hồi
+    cũ tự hết hiệu lực (và bị đẩy ra theo LRU).
+    """
+
+    def __init__(self, refresher: HistoryRefresher, maxsize: int = 256,
+                 shared: Optional[SharedAnalyses] = None):
+        self.refresher = refresher
+        self.shared = shared or SharedAnalyses(maxsize)
+        self.cache = ResultCache(maxsize=maxsize)
+        self.routes: Dict[str, Callable[[AnalysisStore, Dict[str, List[str]]],
+                                        Tuple[AnalysisKey, Callable[[], Any]]]] = {
+            "/dan-nuoi": self._dan_nuoi,
+            "/muc-so": self._muc_so,
+            "/backtest": self._backtest,
+            "/significance": self._significance,
+            "/thong-ke": self._thong_ke,
+            "/lo-gan": self._lo_gan,
+            "/dan-query": self._dan_query,
+            "/aligned": self._aligned,
+            "/history": self._history,
+        }
+
+    @staticmethod
+    def _base(params) -> Tuple[int, str]:
+        return _int(params, "offset", 0, 0), _choice(params, "compare", COMPARE_SOURCES, "GĐB")
+
+    def _dan_nuoi(self, store: AnalysisStore, params):
+        offset, compare = self._base(params)
+        result_type = _choice(params, "result_type", RESULT_TYPES, "Thần tài")
+        dups = _bool(params, "include_duplicates", True)
+        key = AnalysisKey("dan_nuoi", store.version, offset, compare,
+                          result_type=result_type, include_duplicates=dups)
+
+        def compute():
+            df, levels = store.dan_nuoi(offset, compare, result_type, dups)
+            return {"table": encode_frame(df), "levels": encode_levels(levels)}
+        return key, compute
+
+    def _muc_so(self, store: AnalysisStore, params):
+        offset, compare = self._base(params)
+        empty_tt, empty_dt = _int(params, "empty_tt", 4, 1), _int(params, "empty_dt", 4, 1)
+        key = AnalysisKey("muc_so", store.version, offset, compare, empty_tt=empty_tt, empty_dt=empty_dt)
+        return key, lambda: {source: encode_lau_ra(value)
+                             for source, value in store.muc_so(offset, compare, empty_tt, empty_dt).items()}
+
+    def _backtest_params(self, params):
+        offset, compare = self._base(params)
+        horizon = _int(params, "horizon", HORIZON, 1)
+        empty_tt, empty_dt = _int(params, "empty_tt", 4, 1), _int(params, "empty_dt", 4, 1)
+        return offset, compare, horizon, empty_tt, empty_dt
+
+    def _backtest(self, store: AnalysisStore, params):
+        offset, compare, horizon, empty_tt, empty_dt = self._backtest_params(params)
+        key = AnalysisKey("backtest", store.version, offset, compare,
+                          empty_tt=empty_tt, empty_dt=empty_dt, horizon=horizon)
+
+        def compute():
+            df, summary, per_level = store.backtest(offset, compare, horizon, empty_tt, empty_dt)
+            return {"table": encode_frame(df), "summary": encode_frame(summary),
+                    "levels": encode_frame(per_level)}
+        return key, compute
+
+    def _significance(self, store: AnalysisStore, params):
+        offset, compare, horizon, empty_tt, empty_dt = self._backtest_params(params)
+        source = _choice(params, "source", ("TT", "ĐT"), "TT")
+        levels = _levels(params)
+        null = _choice(params, "null", NULL_MODELS.values(), "uniform")
+        key = AnalysisKey(f"significance_{source}", store.version, offset, compare,
+                          empty_tt=empty_tt, empty_dt=empty_dt, horizon=horizon, levels=levels, null=null)
+        return key, lambda: store.significance(offset, compare, source, horizon, empty_tt, empty_dt,
+                                               levels, null)
+
+    def _thong_ke(self, store: AnalysisStore, params):
+        compare = _choice(params, "compare", COMPARE_SOURCES, "GĐB")
+        key = AnalysisKey("thong_ke", store.version, None, compare)
+
+        return key, lambda: encode_gap_index(store.thong_ke(compare))
+
+    def _lo_gan(self, store: AnalysisStore, params):
+        source = _choice(params, "source", LO_GAN_SOURCES, "ĐB")
+        key = AnalysisKey("lo_gan", store.version, None, source)
+
+        return key, lambda: encode_gap_index(store.lo_gan(source))
+
+    def _dan_query(self, store: AnalysisStore, params):
+        compare = _choice(params, "compare", COMPARE_SOURCES, "GĐB")
+        query = _one(params, "q", "").strip()
+        if not query:
+            raise ValueError("q không được để trống")
+        key = AnalysisKey("dan_query", store.version, None, compare, query=query)
+        return key, lambda: encode_query(store.dan_query(compare, query))
+
+    def _aligned(self, store: AnalysisStore, params):
+        compare = _choice(params, "compare", COMPARE_SOURCES, "GĐB")
+        key = AnalysisKey("aligned", store.version, None, compare)
+        return key, lambda: {"rows": store.aligned_rows(compare)}
+
+    def _history(self, store: AnalysisStore, params):
+        history = store.history
+        since, newest = _one(params, "since", ""), _one(params, "newest", "")
+        new = len(history)
+        if since and newest:
+            try:
+                day = np.datetime64(newest, "D")
+            except ValueError as e:
+                raise ValueError(f"newest phải là ngày yyyy-mm-dd, nhận {newest!r}") from e
+            # Chỉ gửi các kỳ mới khi phần còn lại đúng là bảng client đang giữ
+            k = int(np.count_nonzero(history.dates > day))
+            if history.window(k).fingerprint() == since:
+                new = k
+        base = since if new < len(history) else None
+        key = AnalysisKey("history", store.version, None, "", since=base)
+        return key, lambda: {"version": history.version, "base": base,
+                             "rows": encode_history(history.window(0, new))}
+
+    def store(self, version: Optional[str] = None) -> AnalysisStore:
+        """Kho của phiên bản ``version`` (mặc định: bảng lịch sử hiện tại); StaleVersion khi đã bị bỏ."""
+        current = self.shared.get(self.refresher.get())
+        if not version or version == current.version:
+            return current
+        store = self.shared.find(version)
+        if store is None:
+            raise StaleVersion(f"Phiên bản dữ liệu {version} không còn; bản hiện tại là {current.version}")
+        return store
+
+    def status(self) -> Dict[str, Any]:
+        history = self.refresher.get()
+        return {"version": history.version, "rows": len(history), "updated": self.refresher.updated,
+                "refreshing": self.refresher.refreshing, "cache": self.cache.info()}
+
+    def resolve(self, path: str, params: Dict[str, List[str]]) -> Tuple[str, Callable[[], bytes]]:
+        """
+        ETag of a request and a function producing its JSON body.
+
+        ETag chỉ phụ thuộc khóa (phiên bản dữ liệu + tham số), nên 304 được
+        trả mà không cần tính. KeyError khi đường dẫn không có, ValueError
+        khi tham số sai, StaleVersion khi ``version`` đã bị bỏ.
+        """
+        route = self.routes[path]
+        store = self.store(_one(params, "version", ""))
+        key, compute = route(store, params)
+        etag = '"' + hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:20] + '"'
+
+        def body() -> bytes:
+            payload = {"version": store.version, "key": key._asdict(), "result": compute()}
+            return json.dumps(payload, ensure_ascii=False, default=_json_default).encode("utf-8")
+        return etag, lambda: self.cache.get_or_compute(key, body)
+
+
+# ============ MÁY CHỦ ============
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "_Server"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = parse_qs(url.query)
+        analyses = self.server.analyses
+        try:
+            if url.path == "/status":
+                return self._send(200, json.dumps(analyses.status()).encode("utf-8"))
+            etag, body = analyses.resolve(url.path, params)
+            if self.headers.get("If-None-Match") == etag:
+                return self._send(304, b"", etag)
+            self._send(200, body(), etag)
+        except KeyError:
+            self._error(404, f"Không có đường dẫn {url.path}; dùng một trong {sorted(analyses.routes)}")
+        except StaleVersion as e:
+            self._error(409, str(e))
+        except ValueError as e:
+            self._error(400, str(e))
+        except Exception as e:
+            logging.exception(f"API error on {self.path}")
+            self._error(500, f"{type(e).__name__}: {e}")
+
+    def _error(self, status: int, message: str) -> None:
+        self._send(status, json.dumps({"error": message}, ensure_ascii=False).encode("utf-8"))
+
+    def _send(self, status: int, body: bytes, etag: Optional[str] = None) -> None:
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            if etag:
+                self.send_header("ETag", etag)
+                self.send_header("Cache-Control", "no-cache")   # luôn hỏi lại, vì dữ liệu có thể vừa đổi
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+    def log_message(self, format, *args):
+        logging.debug("api: " + format % args)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    analyses: Analyses
+
+
+class ApiServer:
+    """Local analysis service, usable as a context manager (như ReplayServer)."""
+
+    def __init__(self, refresher: Optional[HistoryRefresher] = None, host: str = "127.0.0.1",
+                 port: int = DEFAULT_PORT, maxsize: int = 256):
+        refresher = refresher or HistoryRefresher(DrawStore(), total_days=TOTAL_DAYS)
+        self.analyses = Analyses(refresher, maxsize)
+        self._httpd = _Server((host, port), _Handler)
+        self._httpd.analyses = self.analyses
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "ApiServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="api", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        self._httpd.serve_forever()
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "ApiServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+# ============ CLIENT ============
+class ApiError(RuntimeError):
+    """Máy chủ trả lỗi (thông báo lấy từ trường "error" của phản hồi)."""
+
+    def __init__(self, path: str, status: int, message: str):
+        super().__init__(f"{path}: HTTP {status}: {message}")
+        self.status = status
+        self.message = message
+
+
+class ApiClient:
+    """
+    Thin client returning the same objects as the engine.py functions.
+
+    Phản hồi đã giải mã được giữ theo URL cùng ETag (LRU, ``max_decoded``);
+    lần gọi lại gửi If-None-Match và dùng lại bản đã giải mã khi máy chủ trả
+    304. Client dùng chung cho mọi phiên; ``pinned(version)`` trả về một
+    client gắn phiên bản dữ liệu để mọi yêu cầu của một lần chạy app cùng
+    một bảng lịch sử.
+    """
+
+    def __init__(self, base_url: str, timeout: float = CLIENT_TIMEOUT, max_decoded: int = CLIENT_MAX_DECODED):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_decoded = max_decoded
+        self.version: Optional[str] = None
+        self.session = requests.Session()
+        self._history: Optional[HistoryFrame] = None
+        self._decoded: "OrderedDict[str, Tuple[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def pinned(self, version: str) -> "ApiClient":
+        """Client dùng chung session và cache này, gửi ``version`` kèm mọi yêu cầu."""
+        client = copy(self)
+        client.version = version
+        return client
+
+    def _get(self, path: str, decode: Callable[[Any], Any], **params) -> Any:
+        if self.version is not None:
+            params["version"] = self.version
+        url = f"{self.base_url}{path}?{urlencode(params)}"
+        with self._lock:
+            cached = self._decoded.get(url)
+        headers = {"If-None-Match": cached[0]} if cached else {}
+        r = self.session.get(url, headers=headers, timeout=self.timeout)
+        if r.status_code == 304 and cached:
+            with self._lock:
+                if url in self._decoded:
+                    self._decoded.move_to_end(url)
+            return cached[1]
+        if r.status_code != 200:
+            try:
+                message = r.json()["error"]
+            except (ValueError, KeyError):
+                message = r.text
+            raise ApiError(path, r.status_code, message)
+        value = decode(r.json()["result"])
+        etag = r.headers.get("ETag")
+        if etag:
+            with self._lock:
+                self._decoded[url] = (etag, value)
+                self._decoded.move_to_end(url)
+                while len(self._decoded) > self.max_decoded:
+                    self._decoded.popitem(last=False)
+        return value
+
+    def status(self) -> Dict[str, Any]:
+        return self.session.get(f"{self.base_url}/status", timeout=self.timeout).json()
+
+    def history(self) -> HistoryFrame:
+        """
+        Bảng lịch sử của máy chủ (bản hiện tại, hoặc của ``version`` khi đã gắn).
+
+        Khi đã giữ một bảng, chỉ xin các kỳ mới hơn nó và ghép vào trước bảng
+        cũ; máy chủ gửi cả bảng khi phần cũ đã đổi (ví dụ một kỳ được sửa).
+        """
+        with self._lock:
+            held = self._history
+        params = {"since": held.version, "newest": str(held.dates[0])} if held is not None and len(held) else {}
+        result = self._get("/history", lambda r: r, **params)
+        rows = decode_history(result["rows"])
+        if result["base"] is None:
+            history = rows
+        else:
+            history = prepend_history(rows, held) if len(rows) else held
+        if history.version != result["version"]:
+            result = self._get("/history", lambda r: r)
+            history = decode_history(result["rows"])
+        with self._lock:
+            self._history = history
+        return history
+
+    def aligned_rows(self, compare_source: str) -> int:
+        return self._get("/aligned", lambda r: r["rows"], compare=compare_source)
+
+    def dan_query(self, compare_source: str, query: str) -> Dict[str, Any]:
+        """Như AnalysisStore.dan_query; QueryError khi máy chủ báo biểu thức sai."""
+        try:
+            return self._get("/dan-query", decode_query, compare=compare_source, q=query.strip())
+        except ApiError as e:
+            if e.status == 400:
+                raise QueryError(e.message) from e
+            raise
+
+    def dan_nuoi(self, offset: int, compare_source: str, result_type: str, include_duplicates: bool):
+        """Như engine.dan_nuoi_table: (bảng, mức số từ dàn chưa ra)."""
+        return self._get("/dan-nuoi", lambda r: (decode_frame(r["table"]), decode_levels(r["levels"])),
+                         offset=offset, compare=compare_source, result_type=result_type,
+                         include_duplicates=str(include_duplicates).lower())
+
+    def muc_so(self, offset: int, compare_source: str, empty_tt: int, empty_dt: int) -> Dict[str, tuple]:
+        """{"TT": ..., "ĐT": ...}, mỗi giá trị như engine.lau_ra_levels."""
+        return self._get("/muc-so", lambda r: {k: decode_lau_ra(v) for k, v in r.items()},
+                         offset=offset, compare=compare_source, empty_tt=empty_tt, empty_dt=empty_dt)
+
+    def backtest(self, offset: int, compare_source: str, horizon: int, empty_tt: int, empty_dt: int):
+        """Như engine.backtest_report: (bảng, thống kê hit rate, số lần trúng theo mức)."""
+        return self._get("/backtest", lambda r: (decode_frame(r["table"]), decode_frame(r["summary"]),
+                                                 decode_frame(r["levels"])),
+                         offset=offset, compare=compare_source, horizon=horizon,
+                         empty_tt=empty_tt, empty_dt=empty_dt)
+
+    def significance(self, offset: int, compare_source: str, source: str, horizon: int,
+                     empty_tt: int, empty_dt: int, levels, null: str = "uniform") -> Dict:
+        """Như engine.strategy_significance."""
+        return self._get("/significance", lambda r: r, offset=offset, compare=compare_source, source=source,
+                         horizon=horizon, empty_tt=empty_tt, empty_dt=empty_dt,
+                         levels=",".join(map(str, levels)), null=null)
+
+    def thong_ke(self, compare_source: str) -> RemoteGapIndex:
+        """Thống kê lâu ra ĐB/G1 (tables, summary và gap_counts như GapIndex)."""
+        return self._get("/thong-ke", decode_gap_index, compare=compare_source)
+
+    def lo_gan(self, source: str) -> RemoteGapIndex:
+        """Lô gan từng cặp (bảng "pair", như GapIndex)."""
+        return self._get("/lo-gan", decode_gap_index, source=source)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Dịch vụ JSON phân tích cho nhiều người xem")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--cache-size", type=int, default=256, help="số phản hồi giữ trong cache")
+    args = parser.parse_args(argv)
+
+    server = ApiServer(host=args.host, port=args.port, maxsize=args.cache_size)
+    server.analyses.refresher.get()
+    print(f"Serving on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,159 @@
+"""
+Lưu lịch sử nhiều năm dạng mảng số nguyên gọn trong một file .npy.
+
+Mỗi ngày là một bản ghi: ngày (int32), các cột đúng kiểu của HistoryFrame
+(Điện Toán 3 × int16, Thần Tài int16, ĐB và G1 int32; -1 là "không có kỳ")
+và nhãn ngày gốc của trang nguồn (80 byte mỗi ngày với nhãn 15 ký tự). 10 năm
+khoảng 290 KB. File được mở bằng ánh xạ bộ nhớ (``mmap_mode="r"``): các cột số
+của HistoryFrame là view trên file, không đọc hay sao chép trước; chỉ ngày,
+nhãn và chuỗi kết quả được dựng trong RAM.
+
+Kho SQLite vẫn là nơi ghi; file này được dựng lại (ghi file tạm rồi đổi tên,
+bảng đang mở vẫn đọc file cũ) mỗi khi kho có kỳ mới::
+
+    python archive.py backfill --days 4000   # tải lịch sử dài rồi dựng lại
+    python archive.py build                   # chỉ dựng lại từ kho
+
+Chưa làm: tải lịch sử nhiều năm cho ĐB/G1. ``backfill`` chỉ tải dài được
+Điện Toán và Thần Tài; bảng tuần congcuxoso có kích thước cố định và không
+có phân trang, nên lịch sử ĐB/G1 chỉ dài thêm qua mỗi lần nạp hằng ngày.
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from history import DTYPES, HistoryFrame, MISSING
+from store import DrawStore, SOURCES, backfill
+
+ARCHIVE_PATH = os.environ.get(
+    "SIEUGA_ARCHIVE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "history.npy")
+)
+
+
+def record_dtype(label_width: int) -> np.dtype:
+    """Kiểu bản ghi: ngày, các nguồn theo history.DTYPES, nhãn ``label_width`` ký tự."""
+    return np.dtype([
+        ("date", "<i4"),               # số ngày kể từ 1970-01-01
+        ("dien_toan", DTYPES["dien_toan"], (3,)),
+        ("than_tai", DTYPES["than_tai"]),
+        ("xsmb", DTYPES["xsmb"]),
+        ("giai_nhat", DTYPES["giai_nhat"]),
+        ("label", f"<U{max(label_width, 1)}"),
+    ])
+
+
+def to_records(frame: HistoryFrame) -> np.ndarray:
+    """Chuyển bảng lịch sử sang mảng bản ghi gọn (cùng thứ tự hàng)."""
+    labels = np.asarray(frame.labels, dtype=str)
+    records = np.zeros(len(frame), dtype=record_dtype(labels.dtype.itemsize // 4))
+    records["date"] = frame.dates.astype(np.int64)
+    records["label"] = labels
+    for source in SOURCES:
+        records[source] = frame.values[source]
+    return records
+
+
+def from_records(records: np.ndarray) -> HistoryFrame:
+    """Dựng HistoryFrame từ mảng bản ghi; ValueError khi file là định dạng cũ."""
+    names = records.dtype.names or ()
+    if "label" not in names or records.dtype != record_dtype(records.dtype["label"].itemsize // 4):
+        raise ValueError(f"Unknown archive record format {records.dtype}")
+    values = {source: records[source] for source in SOURCES}
+    dates = records["date"].astype("datetime64[D]")
+    return HistoryFrame.from_arrays(dates, values, records["label"].astype(object))
+
+
+def write_archive(frame: HistoryFrame, path: str = ARCHIVE_PATH) -> int:
+    """
+    Write the compact archive atomically (file tạm rồi đổi tên).
+
+    Returns:
+        Number of bytes written
+    """
+    folder = os.path.dirname(path) or "."
+    os.makedirs(folder, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=folder, suffix=".npy.tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, to_records(frame))
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return os.path.getsize(path)
+
+
+def read_archive(path: str = ARCHIVE_PATH) -> np.ndarray:
+    """Mảng bản ghi của file lưu trữ, ánh xạ bộ nhớ chỉ đọc."""
+    return np.load(path, mmap_mode="r")
+
+
+def load_frame(path: str = ARCHIVE_PATH) -> HistoryFrame:
+    return from_records(read_archive(path))
+
+
+def refresh(store: DrawStore, path: str = ARCHIVE_PATH, rebuild: bool = False) -> HistoryFrame:
+    """
+    Bảng lịch sử từ file lưu trữ, dựng lại file từ kho khi cần.
+
+    Args:
+        store: Kho SQLite
+        path: File lưu trữ
+        rebuild: Dựng lại dù file đã có (khi kho vừa có kỳ mới)
+    """
+    if not rebuild and os.path.exists(path):
+        try:
+            return load_frame(path)
+        except ValueError as e:
+            # File của phiên bản cũ hoặc hỏng: dựng lại từ kho
+            logging.warning(f"Rebuilding archive {path}: {e}")
+    frame = HistoryFrame.from_store(store)
+    size = write_archive(frame, path)
+    logging.info(f"Archive rebuilt: {len(frame)} days, {size} bytes -> {path}")
+    return load_frame(path)
+
+
+def info(path: str = ARCHIVE_PATH) -> Dict[str, object]:
+    records = read_archive(path)
+    dates = records["date"].astype("datetime64[D]")
+    return {
+        "path": path,
+        "bytes": os.path.getsize(path),
+        "days": len(records),
+        "newest": str(dates[0]) if len(dates) else None,
+        "oldest": str(dates[-1]) if len(dates) else None,
+        **{source: int((records[source] != MISSING).reshape(len(records), -1)[:, 0].sum())
+           for source in SOURCES},
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Lịch sử nhiều năm dạng mảng gọn")
+    sub = parser.add_subparsers(dest="command", required=True)
+    fill = sub.add_parser("backfill", help="tải lịch sử dài vào kho rồi dựng lại file")
+    fill.add_argument("--days", type=int, default=4000)
+    sub.add_parser("build", help="dựng lại file từ kho")
+    sub.add_parser("info", help="thông tin file lưu trữ")
+    parser.add_argument("--db", help="kho SQLite (mặc định như app)")
+    parser.add_argument("--archive", default=ARCHIVE_PATH)
+    args = parser.parse_args(argv)
+
+    if args.command != "info":
+        store = DrawStore(args.db) if args.db else DrawStore()
+        if args.command == "backfill":
+            for source, added in backfill(store, args.days).items():
+                print(f"{source}: +{added}")
+        refresh(store, args.archive, rebuild=True)
+    for key, value in info(args.archive).items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
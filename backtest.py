@@ -0,0 +1,167 @@
+"""
+Test ngược (backtest) mức số trên nhiều ngày với phần tính toán dùng chung.
+
+Dàn nuôi và ma trận trúng của mỗi ngày không phụ thuộc offset, nên chỉ
+tính một lần trên toàn bộ lịch sử; mỗi offset chỉ cắt lại phần đầu của
+cửa sổ so sánh. Tổng chi phí tuyến tính theo số ngày test.
+"""
+
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+import perf
+from lau_ra import LOOKBACK, MAX_ROW, WINDOW, dan_matrix, empty_counts, hit_matrix, pair_codes
+
+
+def actual_codes(compare_last2: Sequence[str], offsets: Sequence[int]) -> np.ndarray:
+    """Mã cặp so sánh tại ``offset - 1`` của mỗi offset, -1 khi không có."""
+    codes = pair_codes(compare_last2)
+    prev = np.asarray(offsets, dtype=np.int64) - 1
+    out = np.full(len(prev), -1, dtype=np.int64)
+    ok = (prev >= 0) & (prev < len(codes))
+    out[ok] = codes[prev[ok]]
+    return out
+
+
+def backtest_level_grid(results: Sequence[str], compare_last2: Sequence[str], offsets: Sequence[int],
+                        thresholds: Sequence[int], num_days: int, window: int = WINDOW,
+                        lookback: int = LOOKBACK, max_row: int = MAX_ROW) -> np.ndarray:
+    """
+    Level of all 100 pairs at each offset, for several thresholds at once.
+
+    Mức số tại offset được tính như tab Mức Số (dàn lâu ra với auto-reduce
+    trên ``num_days`` ngày kể từ offset). Số ô rỗng của mỗi offset không phụ
+    thuộc ngưỡng nên chỉ tính một lần cho mọi ngưỡng.
+
+    Args:
+        results: Toàn bộ kết quả TT/ĐT, mới nhất trước
+        compare_last2: 2 số cuối GĐB/G1 cùng thứ tự
+        offsets: Các offset cần test (>= 1)
+        thresholds: Các ngưỡng ô rỗng ban đầu
+        num_days: Độ dài lát cắt của mỗi offset
+        window, lookback, max_row: Tham số dàn lâu ra (mặc định như lau_ra)
+
+    Returns:
+        (len(thresholds) × len(offsets) × 100) int array; hàng -1 khi offset
+        không test được (không có kết quả so sánh tại offset - 1 hoặc không
+        có dàn lâu ra)
+    """
+    n_total = len(results)
+    codes = pair_codes(compare_last2)
+    in_dan = dan_matrix(results, n_total, window)
+    hits = hit_matrix(in_dan, codes, lookback)
+
+    levels = np.full((len(thresholds), len(offsets), 100), -1, dtype=np.int64)
+    for k, o in enumerate(offsets):
+        with perf.stage("backtest.offset"):
+            n = min(num_days, n_total - o)
+            prev = o - 1
+            if n <= 0 or not 0 <= prev < len(codes) or codes[prev] < 0:
+                continue
+
+            rows = min(n, max_row + 1)
+            # Cửa sổ ở cuối lát cắt bị kẹp khác với lịch sử đầy đủ: tính riêng
+            regular = (n == num_days and num_days - window >= max_row) or (n < num_days and n >= window)
+            if regular:
+                local_dan = in_dan[o:o + rows]
+                local_hits = hits[o:o + rows]
+            else:
+                local_dan = dan_matrix(results[o:o + n], rows, window)
+                local_hits = hit_matrix(local_dan, codes[o:o + n], lookback)
+
+            empty = empty_counts(local_hits, np.arange(rows))
+            eligible = local_dan.any(axis=1)
+            if not eligible.any():
+                continue
+            most = int(empty[eligible].max())
+            for t, threshold in enumerate(thresholds):
+                actual = max(1, min(threshold, most))
+                chosen = eligible & (empty >= actual)
+                if chosen.any():
+                    levels[t, k] = local_dan[chosen].sum(axis=0)
+    return levels
+
+
+def backtest_level_rows(results: Sequence[str], compare_last2: Sequence[str],
+                        offsets: Sequence[int], threshold: int, num_days: int) -> np.ndarray:
+    """
+    Level of all 100 pairs at each offset (một ngưỡng, tham số mặc định).
+
+    Returns:
+        (len(offsets) × 100) int array, xem :func:`backtest_level_grid`
+    """
+    return backtest_level_grid(results, compare_last2, offsets, [threshold], num_days)[0]
+
+
+def backtest_levels(results: Sequence[str], compare_last2: Sequence[str],
+                    offsets: Sequence[int], threshold: int, num_days: int) -> np.ndarray:
+    """
+    Hit level of the compare result at ``offset - 1`` for each offset.
+
+    Returns:
+        int array, level trúng của mỗi offset hoặc -1 nếu không có mức
+    """
+    rows = backtest_level_rows(results, compare_last2, offsets, threshold, num_days)
+    return hit_levels(rows, actual_codes(compare_last2, offsets))
+
+
+def hit_levels(rows: np.ndarray, codes: np.ndarray) -> np.ndarray:
+    """Mức của mã ``codes[k]`` trong hàng ``rows[k]``, -1 khi không có."""
+    return np.where(codes >= 0, rows[np.arange(len(rows)), np.maximum(codes, 0)], -1)
+
+
+def run_backtest(tt_results: Sequence[str], dt_results: Sequence[str],
+                 compare_last2: Sequence[str], dates: Sequence[str], offset: int,
+                 horizon: int, empty_tt: int, empty_dt: int, num_days: int,
+                 compare_label: str = "GĐB") -> pd.DataFrame:
+    """
+    Bảng test ngược ``horizon`` ngày tính từ ``offset``.
+
+    Returns:
+        DataFrame with columns Lùi, Ngày KQ, <compare_label>, TT Mức, ĐT Mức
+        (mức dạng "M3", "-" nếu không trúng mức nào)
+    """
+    offsets = [offset + i for i in range(1, horizon + 1)]
+    tt_levels = backtest_levels(tt_results, compare_last2, offsets, empty_tt, num_days)
+    dt_levels = backtest_levels(dt_results, compare_last2, offsets, empty_dt, num_days)
+
+    base_label = "" if offset == 0 else f"Lùi {offset}+"
+    rows = []
+    for i, o in enumerate(offsets, start=1):
+        prev = o - 1
+        rows.append({
+            "Lùi": f"{base_label}{i}" if base_label else f"Lùi {i}",
+            "Ngày KQ": dates[prev] if prev < len(dates) else f"N-{prev}",
+            compare_label: compare_last2[prev].zfill(2) if prev < len(compare_last2) else "-",
+            "TT Mức": f"M{tt_levels[i - 1]}" if tt_levels[i - 1] >= 0 else "-",
+            "ĐT Mức": f"M{dt_levels[i - 1]}" if dt_levels[i - 1] >= 0 else "-",
+        })
+    return pd.DataFrame(rows, columns=["Lùi", "Ngày KQ", compare_label, "TT Mức", "ĐT Mức"])
+
+
+def summarize_backtest(df: pd.DataFrame) -> pd.DataFrame:
+    """Hit rate của từng loại (TT/ĐT): số ngày trúng, tổng số ngày và tỉ lệ %."""
+    rows = []
+    for col in ("TT Mức", "ĐT Mức"):
+        hits = int((df[col] != "-").sum())
+        total = len(df)
+        rows.append({
+            "Loại": col.split()[0],
+            "Hit": hits,
+            "Tổng": total,
+            "Hit Rate": hits / total * 100 if total else 0.0,
+        })
+    return pd.DataFrame(rows).set_index("Loại")
+
+
+def level_counts(df: pd.DataFrame) -> pd.DataFrame:
+    """Số lần trúng theo từng mức (index Mức số nguyên, cột TT / ĐT)."""
+    counts = {}
+    for col in ("TT Mức", "ĐT Mức"):
+        hit = df.loc[df[col] != "-", col].str[1:].astype(int)
+        counts[col.split()[0]] = hit.value_counts()
+    out = pd.DataFrame(counts).fillna(0).astype(int).sort_index()
+    out.index.name = "Mức"
+    return out
@@ -0,0 +1,266 @@
+"""
+Benchmark tải và phân tích trang trên máy chủ phát lại cục bộ.
+
+Đo ``fetch_page`` (có và không có HTTP cache), tải + phân tích, từng parser, đường thử lại khi bị treo
+hoặc lỗi HTTP và toàn bộ lượt nạp dữ liệu (ingest + load_history) vào một
+kho tạm. Báo cáo JSON của hai lần chạy có thể so sánh với ``--compare``::
+
+    python benchmark.py --out before.json
+    python benchmark.py --out after.json --compare before.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+from typing import Callable, Dict, List, Optional
+
+import data_fetcher
+import parsers
+import store
+from http_cache import HttpCache
+from replay_server import FIXTURE_DIR, ReplayConfig, ReplayServer, load_pages, point_fetcher, restore_fetcher
+
+PARSERS = {
+    "dien_toan": parsers.parse_dien_toan,
+    "than_tai": parsers.parse_than_tai,
+    "xsmb": parsers.parse_congcuxoso,
+    "giai_nhat": parsers.parse_congcuxoso,
+}
+
+
+def _stats(samples: List[float], **extra) -> Dict:
+    return {
+        "median": statistics.median(samples),
+        "min": min(samples),
+        "max": max(samples),
+        "runs": len(samples),
+        **extra,
+    }
+
+
+def _repeat(func: Callable, repeat: int) -> List[float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def _urls(days: int) -> Dict[str, str]:
+    return {
+        "dien_toan": data_fetcher.DIEN_TOAN_URL.format(days=days),
+        "than_tai": data_fetcher.THAN_TAI_URL.format(days=days),
+        "xsmb": data_fetcher.XSMB_URL,
+        "giai_nhat": data_fetcher.GIAI_NHAT_URL,
+    }
+
+
+def bench_fetch(days: int, repeat: int) -> Dict[str, Dict]:
+    """fetch_page (tải) và fetch_page + parser lxml (đường app dùng) cho từng nguồn."""
+    results = {}
+    for source, url in _urls(days).items():
+        results[f"fetch_page.{source}"] = _stats(_repeat(lambda url=url: data_fetcher.fetch_page(url), repeat))
+        results[f"fetch_parse.{source}"] = _stats(
+            _repeat(lambda url=url, parse=PARSERS[source]: parse(data_fetcher.fetch_page(url), days), repeat))
+    return results
+
+
+def bench_revalidate(days: int, repeat: int) -> Dict[str, Dict]:
+    """fetch_page khi đã có bản lưu: yêu cầu có điều kiện được trả 304."""
+    results = {}
+    previous = data_fetcher.HTTP_CACHE
+    with tempfile.TemporaryDirectory() as tmp:
+        data_fetcher.HTTP_CACHE = HttpCache(tmp)
+        try:
+            for source, url in _urls(days).items():
+                data_fetcher.fetch_page(url)
+                results[f"fetch_page.revalidate.{source}"] = _stats(
+                    _repeat(lambda url=url: data_fetcher.fetch_page(url), repeat))
+        finally:
+            data_fetcher.HTTP_CACHE = previous
+    return results
+
+
+def bench_parse(pages: Dict[str, str], days: int, repeat: int) -> Dict[str, Dict]:
+    """Từng parser lxml, kèm cây BeautifulSoup (cách tải cũ) để đối chiếu nếu có cài bs4."""
+    try:
+        from bs4 import BeautifulSoup
+    except ImportError:
+        BeautifulSoup = None
+    results = {}
+    for source, page in pages.items():
+        jobs = [(f"parse.{source}", lambda page=page, parse=PARSERS[source]: parse(page, days))]
+        if BeautifulSoup is not None:
+            jobs.append((f"bs4_tree.{source}", lambda page=page: BeautifulSoup(page, "html.parser")))
+        for name, parse in jobs:
+            samples, peaks = [], []
+            rows = None
+            for _ in range(repeat):
+                out, m = parsers.measure_parse(parse)
+                samples.append(m["seconds"])
+                peaks.append(m["peak_bytes"])
+                rows = len(out) if isinstance(out, list) else rows
+            extra = {"peak_bytes": max(peaks)}
+            if rows is not None:
+                extra["rows"] = rows
+            results[name] = _stats(samples, **extra)
+    return results
+
+
+def bench_retry(server: ReplayServer, days: int, repeat: int) -> Dict[str, Dict]:
+    """
+    fetch_page when the first attempt of every request fails.
+
+    Mỗi lượt kiểm tra máy chủ nhận đúng 2 yêu cầu (1 lỗi + 1 thành công).
+    """
+    url = _urls(days)["dien_toan"]
+    path = "/" + url.split("://", 1)[1].split("/", 1)[1]
+    base = server.config
+    results = {}
+    for mode in ("timeout", "error"):
+        samples, attempts, ok = [], [], True
+        for _ in range(repeat):
+            server.reset(ReplayConfig(latency=base.latency, fail_first=1, fail_mode=mode,
+                                      hang=data_fetcher.REQUEST_TIMEOUT * 2))
+            start = time.perf_counter()
+            text = data_fetcher.fetch_page(url)
+            samples.append(time.perf_counter() - start)
+            attempts.append(server.hits[path])
+            ok = ok and text is not None
+        results[f"retry.{mode}"] = _stats(samples, attempts=max(attempts), recovered=ok)
+    server.reset(base)
+    return results
+
+
+def bench_load(days: int, repeat: int) -> Dict[str, Dict]:
+    """Nạp đầy đủ vào kho rỗng, nạp lại khi đã cập nhật, và đọc lịch sử."""
+    full, incremental, load = [], [], []
+    rows = 0
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as tmp:
+            db = store.DrawStore(os.path.join(tmp, "bench.sqlite3"))
+            start = time.perf_counter()
+            store.ingest(db, days, today=date.today())
+            full.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            store.ingest(db, days, today=date.today())
+            incremental.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            history = store.load_history(db)
+            load.append(time.perf_counter() - start)
+            rows = sum(len(v) for v in history.values())
+    return {
+        "load.ingest_full": _stats(full, rows=rows),
+        "load.ingest_noop": _stats(incremental),
+        "load.load_history": _stats(load, rows=rows),
+    }
+
+
+def run(fixture_dir: str = FIXTURE_DIR, days: int = 100, repeat: int = 5,
+        latency: float = 0.0, timeout: float = 0.5) -> Dict:
+    """
+    Run every benchmark against a fresh replay server.
+
+    Args:
+        fixture_dir: Thư mục trang đã lưu (nguồn thiếu dùng trang tổng hợp)
+        days: Số kỳ yêu cầu mỗi nguồn
+        repeat: Số lần đo mỗi mục
+        latency: Độ trễ giả lập mỗi yêu cầu (giây)
+        timeout: REQUEST_TIMEOUT dùng khi đo, để đường thử lại chạy nhanh
+
+    Returns:
+        Report dict with "meta" and "results" (name -> median/min/max/runs...)
+    """
+    pages = load_pages(fixture_dir)
+    settings = (data_fetcher.REQUEST_TIMEOUT, data_fetcher.RETRY_DELAY, data_fetcher.HTTP_CACHE)
+    # Các mục khác đo tải đầy đủ như trước; bench_revalidate dùng cache tạm riêng
+    data_fetcher.REQUEST_TIMEOUT, data_fetcher.RETRY_DELAY, data_fetcher.HTTP_CACHE = timeout, 0, None
+    results = {}
+    with ReplayServer(pages, ReplayConfig(latency=latency)) as server:
+        previous = point_fetcher(server.base_url)
+        try:
+            results.update(bench_fetch(days, repeat))
+            results.update(bench_revalidate(days, repeat))
+            results.update(bench_parse(pages, days, repeat))
+            results.update(bench_retry(server, days, repeat))
+            results.update(bench_load(days, repeat))
+        finally:
+            restore_fetcher(previous)
+            data_fetcher.REQUEST_TIMEOUT, data_fetcher.RETRY_DELAY, data_fetcher.HTTP_CACHE = settings
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "fixtures": {s: len(p.encode("utf-8")) for s, p in pages.items()},
+            "days": days,
+            "repeat": repeat,
+            "latency": latency,
+            "timeout": timeout,
+        },
+        "results": results,
+    }
+
+
+def compare(old: Dict, new: Dict) -> str:
+    """Bảng so sánh trung vị giữa hai báo cáo (chỉ các mục có ở cả hai)."""
+    lines = [f"{'benchmark':<28}{'before':>12}{'after':>12}{'change':>10}"]
+    for name, res in new["results"].items():
+        prev = old["results"].get(name)
+        if prev is None:
+            continue
+        a, b = prev["median"], res["median"]
+        change = f"{(b - a) / a * 100:+.1f}%" if a else "-"
+        lines.append(f"{name:<28}{a * 1000:>10.2f}ms{b * 1000:>10.2f}ms{change:>10}")
+    for key in ("days", "repeat", "latency", "timeout", "fixtures"):
+        if old["meta"].get(key) != new["meta"].get(key):
+            lines.append(f"note: {key} differs ({old['meta'].get(key)} -> {new['meta'].get(key)})")
+    return "\n".join(lines)
+
+
+def format_report(report: Dict) -> str:
+    lines = [f"{'benchmark':<28}{'median':>12}{'min':>12}  extra"]
+    for name, res in report["results"].items():
+        extra = {k: v for k, v in res.items() if k not in ("median", "min", "max", "runs")}
+        lines.append(f"{name:<28}{res['median'] * 1000:>10.2f}ms{res['min'] * 1000:>10.2f}ms  "
+                     + " ".join(f"{k}={v}" for k, v in extra.items()))
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark tải/phân tích trên máy chủ phát lại")
+    parser.add_argument("--fixtures", default=FIXTURE_DIR)
+    parser.add_argument("--days", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.0, help="độ trễ giả lập mỗi yêu cầu (giây)")
+    parser.add_argument("--timeout", type=float, default=0.5, help="thời gian chờ mỗi lần thử khi đo (giây)")
+    parser.add_argument("--out", help="ghi báo cáo JSON")
+    parser.add_argument("--compare", help="báo cáo JSON trước đó để so sánh")
+    args = parser.parse_args(argv)
+
+    logging.getLogger().setLevel(logging.CRITICAL)  # không in log lỗi/thử lại đã tiêm
+    report = run(args.fixtures, args.days, args.repeat, args.latency, args.timeout)
+    print(format_report(report))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            print()
+            print(compare(json.load(f), report))
+    failed = [n for n, r in report["results"].items() if r.get("recovered") is False]
+    if failed:
+        print(f"Retry path did not recover: {', '.join(failed)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Phân loại cặp số 00..99 (bộ, kép, hiệu, con giáp, tổng, đầu, đuôi).
+
+Mọi phân loại được tính sẵn thành bảng tra 100 phần tử, nên tra một cặp
+là O(1) và ``classify`` xử lý cả mảng cặp số trong một lần. Chiều ngược
+lại (nhóm -> dàn, chữ số -> các cặp chứa nó) cũng được tính sẵn thành mặt
+nạ (nhóm × 100).
+"""
+
+from typing import Dict, Iterable, List, Union
+
+import numpy as np
+
+# --- TỪ ĐIỂN DỮ LIỆU ---
+BO_DICT = {
+    "00": ["00","55","05","50"], "11": ["11","66","16","61"], "22": ["22","77","27","72"], "33": ["33","88","38","83"],
+    "44": ["44","99","49","94"], "01": ["01","10","06","60","51","15","56","65"], "02": ["02","20","07","70","25","52","57","75"],
+    "03": ["03","30","08","80","35","53","58","85"], "04": ["04","40","09","90","45","54","59","95"], "12": ["12","21","17","71","26","62","67","76"],
+    "13": ["13","31","18","81","36","63","68","86"], "14": ["14","41","19","91","46","64","69","96"], "23": ["23","32","28","82","73","37","78","87"],
+    "24": ["24","42","29","92","74","47","79","97"], "34": ["34","43","39","93","84","48","89","98"]
+}
+
+KEP_DICT = {
+    "K.AM": ["07","70","14","41","29","92","36","63","58","85"],
+    "K.BANG": ["00","11","22","33","44","55","66","77","88","99"],
+    "K.LECH": ["05","50","16","61","27","72","38","83","49","94"],
+    "S.KEP": ["01","10","12","21","23","32","34","43","45","54","56","65","67","76","78","87","89","98","09","90"]
+}
+
+ZODIAC_DICT = {
+    "Tý":   ["00","12","24","36","48","60","72","84","96"],
+    "Sửu":  ["01","13","25","37","49","61","73","85","97"],
+    "Dần":  ["02","14","26","38","50","62","74","86","98"],
+    "Mão":  ["03","15","27","39","51","63","75","87","99"],
+    "Thìn": ["04","16","28","40","52","64","76","88"],
+    "Tỵ":   ["05","17","29","41","53","65","77","89"],
+    "Ngọ":  ["06","18","30","42","54","66","78","90"],
+    "Mùi":  ["07","19","31","43","55","67","79","91"],
+    "Thân": ["08","20","32","44","56","68","80","92"],
+    "Dậu":  ["09","21","33","45","57","69","81","93"],
+    "Tuất": ["10","22","34","46","58","70","82","94"],
+    "Hợi":  ["11","23","35","47","59","71","83","95"]
+}
+
+HIEU_MAP = {
+    0: ["00","11","22","33","44","55","66","77","88","99"],
+    1: ["09","10","21","32","43","54","65","76","87","98"],
+    2: ["08","19","20","31","42","53","64","75","86","97"],
+    3: ["07","18","29","30","41","52","63","74","85","96"],
+    4: ["06","17","28","39","40","51","62","73","84","95"],
+    5: ["05","16","27","38","49","50","61","72","83","94"],
+    6: ["04","15","26","37","48","59","60","71","82","93"],
+    7: ["03","14","25","36","47","58","69","70","81","92"],
+    8: ["02","13","24","35","46","57","68","79","80","91"],
+    9: ["01","12","23","34","45","56","67","78","89","90"]
+}
+
+BO_KEYS: List[str] = list(BO_DICT)
+KEP_KEYS: List[str] = list(KEP_DICT)
+ZODIAC_KEYS: List[str] = list(ZODIAC_DICT)
+
+
+def _table(groups: Dict, default: int) -> np.ndarray:
+    """Bảng tra 100 phần tử: mã nhóm của mỗi cặp (thứ tự nhóm theo dict)."""
+    table = np.full(100, default, dtype=np.int8)
+    for code, pairs in enumerate(groups.values()):
+        for p in pairs:
+            table[int(p)] = code
+    return table
+
+
+# --- BẢNG TRA 100 PHẦN TỬ ---
+_ALL = np.arange(100)
+BO_CODE = _table(BO_DICT, BO_KEYS.index("44"))
+KEP_CODE = _table(KEP_DICT, -1)
+ZODIAC_CODE = _table(ZODIAC_DICT, -1)
+HIEU = _table(HIEU_MAP, -1)
+TONG = ((_ALL // 10 + _ALL % 10) % 10).astype(np.int8)
+DAU = (_ALL // 10).astype(np.int8)
+DUOI = (_ALL % 10).astype(np.int8)
+
+CATEGORIES = {
+    "bo": BO_CODE,
+    "kep": KEP_CODE,
+    "hieu": HIEU,
+    "zodiac": ZODIAC_CODE,
+    "tong": TONG,
+    "dau": DAU,
+    "duoi": DUOI,
+}
+
+
+# Chữ số -> cặp: DIGIT_PAIRS[c, d] khi cặp c có chữ số d (100 × 10)
+DIGIT_PAIRS = (DAU[:, None] == np.arange(10)) | (DUOI[:, None] == np.arange(10))
+
+# Loại -> (số nhóm × 100) mặt nạ; hàng g là dàn của nhóm có mã g
+CATEGORY_MASKS = {name: np.arange(table.max() + 1)[:, None] == table[None, :]
+                  for name, table in CATEGORIES.items()}
+
+
+def pair_code(pair: Union[str, int]) -> int:
+    """Mã 0..99 của một cặp ("5" được hiểu là "05"), -1 nếu không hợp lệ."""
+    if isinstance(pair, str):
+        p = pair.zfill(2)
+        return int(p) if len(p) == 2 and p.isdigit() else -1
+    return int(pair) if 0 <= int(pair) < 100 else -1
+
+
+def to_codes(pairs: Iterable) -> np.ndarray:
+    """Chuyển mảng cặp số (chuỗi hoặc số) thành mảng mã 0..99, -1 nếu không hợp lệ."""
+    arr = pairs if isinstance(pairs, np.ndarray) else np.asarray(list(pairs))
+    if arr.dtype.kind in "iu":
+        return np.where((arr >= 0) & (arr < 100), arr, -1).astype(np.int64)
+    return np.fromiter((pair_code(str(p)) for p in arr.ravel()), dtype=np.int64,
+                       count=arr.size).reshape(arr.shape)
+
+
+def classify(pairs: Iterable) -> Dict[str, np.ndarray]:
+    """
+    Classify many pairs at once.
+
+    Args:
+        pairs: Array-like of pair codes (0..99) or pair strings ("07")
+
+    Returns:
+        Dict category -> int array of group codes (-1 for invalid pairs).
+        Mã bộ/kép/con giáp là chỉ số trong BO_KEYS/KEP_KEYS/ZODIAC_KEYS;
+        hiệu/tổng/đầu/đuôi là chính giá trị 0..9.
+    """
+    codes = to_codes(pairs)
+    valid = codes >= 0
+    safe = np.where(valid, codes, 0)
+    return {name: np.where(valid, table[safe], -1) for name, table in CATEGORIES.items()}
+
+
+def category_pairs(name: str) -> Dict[int, np.ndarray]:
+    """Mã nhóm -> các cặp số (0..99) thuộc nhóm đó, cho một loại phân loại."""
+    table = CATEGORIES[name]
+    return {int(c): np.flatnonzero(table == c) for c in np.unique(table) if c >= 0}
@@ -0,0 +1,137 @@
+"""
+Kiểu dàn số gọn nhẹ: tập con của 00..99 lưu bằng một số nguyên 100 bit.
+
+Hợp/giao/hiệu/đếm/kiểm tra phần tử đều là phép toán bit; chuỗi chỉ được
+tạo ra khi hiển thị.
+"""
+
+import re
+from typing import Iterable, Iterator, List, Sequence, Union
+
+import numpy as np
+
+PAIRS: List[str] = [f"{i:02d}" for i in range(100)]
+FULL_BITS = (1 << 100) - 1
+_NBYTES = 13  # 100 bit -> 13 byte
+
+PairLike = Union[str, int]
+
+
+def _code(pair: PairLike) -> int:
+    """Mã 0..99 của một cặp số, -1 nếu không hợp lệ."""
+    if isinstance(pair, str):
+        return int(pair) if len(pair) == 2 and pair.isdigit() else -1
+    pair = int(pair)
+    return pair if 0 <= pair < 100 else -1
+
+
+class Dan:
+    """Dàn số 00..99, bit i bật khi cặp i thuộc dàn."""
+
+    __slots__ = ("bits",)
+
+    def __init__(self, bits: int = 0):
+        self.bits = bits & FULL_BITS
+
+    # ---- khởi tạo ----
+    @classmethod
+    def from_pairs(cls, pairs: Iterable[PairLike]) -> "Dan":
+        bits = 0
+        for p in pairs:
+            c = _code(p)
+            if c >= 0:
+                bits |= 1 << c
+        return cls(bits)
+
+    @classmethod
+    def parse(cls, text: str) -> "Dan":
+        """Đọc dàn từ chuỗi "01,05,12" hoặc "01 05 12"."""
+        return cls.from_pairs(t for t in re.split(r"[,\s]+", text) if t)
+
+    @classmethod
+    def from_mask(cls, mask: np.ndarray) -> "Dan":
+        packed = np.packbits(np.asarray(mask, dtype=bool), bitorder="little")
+        return cls(int.from_bytes(packed.tobytes(), "little"))
+
+    @classmethod
+    def full(cls) -> "Dan":
+        return cls(FULL_BITS)
+
+    # ---- chuyển đổi ----
+    def mask(self) -> np.ndarray:
+        """Mảng bool dài 100."""
+        raw = np.frombuffer(self.bits.to_bytes(_NBYTES, "little"), dtype=np.uint8)
+        return np.unpackbits(raw, bitorder="little")[:100].astype(bool)
+
+    def pairs(self) -> List[str]:
+        return [PAIRS[i] for i in self]
+
+    def to_string(self, sep: str = ",") -> str:
+        return sep.join(self.pairs())
+
+    # ---- phép toán tập hợp ----
+    def __or__(self, other: "Dan") -> "Dan":
+        return Dan(self.bits | other.bits)
+
+    def __and__(self, other: "Dan") -> "Dan":
+        return Dan(self.bits & other.bits)
+
+    def __sub__(self, other: "Dan") -> "Dan":
+        return Dan(self.bits & ~other.bits)
+
+    def __xor__(self, other: "Dan") -> "Dan":
+        return Dan(self.bits ^ other.bits)
+
+    def __invert__(self) -> "Dan":
+        return Dan(~self.bits)
+
+    def __contains__(self, pair: PairLike) -> bool:
+        c = _code(pair)
+        return c >= 0 and bool((self.bits >> c) & 1)
+
+    def __iter__(self) -> Iterator[int]:
+        bits = self.bits
+        while bits:
+            low = bits & -bits
+            yield low.bit_length() - 1
+            bits ^= low
+
+    def __len__(self) -> int:
+        return self.bits.bit_count()
+
+    def __bool__(self) -> bool:
+        return self.bits != 0
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Dan) and self.bits == other.bits
+
+    def __hash__(self) -> int:
+        return hash(self.bits)
+
+    def __repr__(self) -> str:
+        return f"Dan({self.to_string()!r})"
+
+
+def from_matrix(matrix: np.ndarray) -> List[Dan]:
+    """Mỗi hàng của ma trận bool (n × 100) thành một Dan."""
+    matrix = np.asarray(matrix, dtype=bool)
+    if matrix.shape[0] == 0:
+        return []
+    packed = np.packbits(matrix, axis=1, bitorder="little")
+    return [Dan(int.from_bytes(row.tobytes(), "little")) for row in packed]
+
+
+def to_matrix(dans: Sequence[Dan]) -> np.ndarray:
+    """Ghép danh sách Dan thành ma trận bool (n × 100)."""
+    if not dans:
+        return np.zeros((0, 100), dtype=bool)
+    raw = b"".join(d.bits.to_bytes(_NBYTES, "little") for d in dans)
+    packed = np.frombuffer(raw, dtype=np.uint8).reshape(len(dans), _NBYTES)
+    return np.unpackbits(packed, axis=1, bitorder="little")[:, :100].astype(bool)
+
+
+def union(dans: Iterable[Dan]) -> Dan:
+    bits = 0
+    for d in dans:
+        bits |= d.bits
+    return Dan(bits)
@@ -0,0 +1,243 @@
+"""
+Ngôn ngữ truy vấn dàn số, biên dịch thành mặt nạ 100 bit.
+
+Thay vì gọi riêng get_bo_dan, get_tong_dan, lay_dan_cham... rồi ghép chuỗi
+bằng tay, một dàn được viết thành biểu thức::
+
+    bo 01 | tong 5 & !kep K.BANG & cham 3,7
+
+- ``bo 01``, ``kep K.BANG``, ``giap Tý``: nhóm theo khóa của BO_DICT,
+  KEP_DICT, ZODIAC_DICT (không phân biệt hoa thường)
+- ``tong 5``, ``hieu 3``, ``dau 1``, ``duoi 9``: nhóm theo chữ số 0..9
+- ``cham 3,7``: các cặp chứa 3 hoặc 7 (như lay_dan_cham)
+- ``so 12,34``: các cặp liệt kê trực tiếp
+- ``tat``: cả 100 cặp
+
+Nhiều giá trị cách nhau bằng dấu phẩy là hợp của chúng. Toán tử theo thứ
+tự ưu tiên giảm dần: ``!`` (phần bù), ``&`` (giao), ``|`` (hợp); dùng ngoặc
+``( )`` để nhóm. Biểu thức đã biên dịch được cache; ``hit_flags`` chấm một
+hay nhiều dàn trên mọi ngày lịch sử bằng một phép tra mảng::
+
+    python dan_query.py "bo 01 | tong 5" --compare GĐB
+"""
+
+import argparse
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from classify import BO_KEYS, CATEGORY_MASKS, KEP_KEYS, ZODIAC_KEYS
+from dan import Dan, to_matrix
+from logic import cham_matrix
+
+# Từ khóa -> (loại trong classify.CATEGORY_MASKS, khóa nhóm theo mã; None khi mã là chữ số 0..9)
+GROUPS = {
+    "bo": ("bo", BO_KEYS),
+    "kep": ("kep", KEP_KEYS),
+    "giap": ("zodiac", ZODIAC_KEYS),
+    "tong": ("tong", None),
+    "hieu": ("hieu", None),
+    "dau": ("dau", None),
+    "duoi": ("duoi", None),
+}
+KEYWORDS = (*GROUPS, "cham", "so", "tat")
+OPERATORS = "|&!(),"
+
+_TOKEN_RE = re.compile(r"\s*(?:([|&!(),])|([^\s|&!(),]+))")
+
+
+class QueryError(ValueError):
+    """Biểu thức dàn không hợp lệ (kèm vị trí ký tự lỗi, nếu biết)."""
+
+    def __init__(self, message: str, position: Optional[int] = None):
+        super().__init__(message if position is None else f"{message} (vị trí {position + 1})")
+        self.position = position
+
+
+def _tokenize(text: str) -> List[Tuple[str, int]]:
+    tokens, pos = [], 0
+    text = text.rstrip()
+    while pos < len(text):
+        m = _TOKEN_RE.match(text, pos)
+        tokens.append((m.group(1) or m.group(2), m.start(m.lastindex)))
+        pos = m.end()
+    return tokens
+
+
+def _group_dan(keyword: str, value: str, position: int) -> Dan:
+    name, keys = GROUPS[keyword]
+    masks = CATEGORY_MASKS[name]
+    if keys is None:
+        code = int(value) if value.isdigit() and len(value) == 1 else -1
+    else:
+        lookup = {k.casefold(): i for i, k in enumerate(keys)}
+        code = lookup.get(value.casefold(), -1)
+    if not 0 <= code < len(masks):
+        choices = ", ".join(keys) if keys is not None else "0..9"
+        raise QueryError(f"'{keyword} {value}' không hợp lệ, chọn một trong: {choices}", position)
+    return Dan.from_mask(masks[code])
+
+
+def _atom_dan(keyword: str, value: str, position: int) -> Dan:
+    if keyword == "cham":
+        if not value.isdigit():
+            raise QueryError(f"'cham {value}' cần chữ số 0..9", position)
+        return Dan.from_mask(cham_matrix([value])[0])
+    if keyword == "so":
+        if len(value) != 2 or not value.isdigit():
+            raise QueryError(f"'so {value}' cần cặp số 00..99", position)
+        return Dan.from_pairs([value])
+    return _group_dan(keyword, value, position)
+
+
+class _Parser:
+    """Recursive-descent parser; mỗi hàm trả về Dan của đoạn đã đọc."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens = _tokenize(text)
+        self.i = 0
+
+    def peek(self) -> Optional[str]:
+        return self.tokens[self.i][0] if self.i < len(self.tokens) else None
+
+    def position(self) -> int:
+        return self.tokens[self.i][1] if self.i < len(self.tokens) else len(self.text)
+
+    def take(self) -> str:
+        token = self.peek()
+        if token is None:
+            raise QueryError("Biểu thức kết thúc đột ngột", len(self.text))
+        self.i += 1
+        return token
+
+    def parse(self) -> Dan:
+        if not self.tokens:
+            raise QueryError("Biểu thức rỗng", 0)
+        dan = self.union()
+        if self.peek() is not None:
+            raise QueryError(f"Thừa '{self.peek()}'", self.position())
+        return dan
+
+    def union(self) -> Dan:
+        dan = self.intersection()
+        while self.peek() == "|":
+            self.take()
+            dan = dan | self.intersection()
+        return dan
+
+    def intersection(self) -> Dan:
+        dan = self.unary()
+        while self.peek() == "&":
+            self.take()
+            dan = dan & self.unary()
+        return dan
+
+    def unary(self) -> Dan:
+        if self.peek() == "!":
+            self.take()
+            return ~self.unary()
+        if self.peek() == "(":
+            self.take()
+            dan = self.union()
+            if self.peek() != ")":
+                raise QueryError("Thiếu ')'", self.position())
+            self.take()
+            return dan
+        return self.atom()
+
+    def atom(self) -> Dan:
+        position = self.position()
+        keyword = self.take().casefold()
+        if keyword not in KEYWORDS:
+            raise QueryError(f"Không hiểu '{keyword}', dùng một trong: {', '.join(KEYWORDS)}", position)
+        if keyword == "tat":
+            return Dan.full()
+        dan = Dan()
+        while True:
+            position = self.position()
+            value = self.take()
+            if value in OPERATORS:
+                raise QueryError(f"'{keyword}' cần giá trị", position)
+            dan = dan | _atom_dan(keyword, value, position)
+            if self.peek() != ",":
+                return dan
+            self.take()
+
+
+@lru_cache(maxsize=256)
+def compile_query(text: str) -> Dan:
+    """Biên dịch biểu thức thành dàn (cache theo chuỗi biểu thức); lỗi cú pháp là QueryError."""
+    return _Parser(text).parse()
+
+
+def hit_flags(queries: Union[str, Dan, Sequence[Union[str, Dan]]], codes: np.ndarray) -> np.ndarray:
+    """
+    Per-day hit flags of one or more dàn over a history of pair codes.
+
+    Args:
+        queries: Một biểu thức / Dan, hoặc danh sách của chúng
+        codes: Mã cặp 0..99 của mỗi ngày (-1 khi không có kỳ)
+
+    Returns:
+        Mảng bool (days,) cho một dàn, (dàn × days) cho danh sách
+    """
+    single = isinstance(queries, (str, Dan))
+    dans = [q if isinstance(q, Dan) else compile_query(q) for q in ([queries] if single else queries)]
+    codes = np.asarray(codes, dtype=np.int64)
+    valid = codes >= 0
+    flags = to_matrix(dans)[:, np.where(valid, codes, 0)] & valid
+    return flags[0] if single else flags
+
+
+def query_stats(query: Union[str, Dan], codes: np.ndarray) -> Dict[str, object]:
+    """
+    Dàn của biểu thức và kết quả của nó trên các ngày ``codes`` (mới nhất trước).
+
+    Returns:
+        Dict with dan, size, days, hits, hit_rate, expected (size / 100) and
+        current (số kỳ chưa trúng tính từ kỳ mới nhất; bằng days khi chưa trúng)
+    """
+    dan = query if isinstance(query, Dan) else compile_query(query)
+    codes = np.asarray(codes, dtype=np.int64)
+    codes = codes[codes >= 0]
+    flags = hit_flags(dan, codes)
+    hits = int(flags.sum())
+    return {
+        "dan": dan,
+        "size": len(dan),
+        "days": len(codes),
+        "hits": hits,
+        "hit_rate": hits / len(codes) if len(codes) else None,
+        "expected": len(dan) / 100,
+        "current": int(np.argmax(flags)) if hits else len(codes),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from archive import ARCHIVE_PATH, load_frame
+    from engine import COMPARE_SOURCES
+
+    parser = argparse.ArgumentParser(description="Chấm một dàn tự chọn trên toàn bộ lịch sử")
+    parser.add_argument("query", nargs="+", help='biểu thức dàn, ví dụ "bo 01 | tong 5 & !kep K.BANG"')
+    parser.add_argument("--compare", choices=list(COMPARE_SOURCES), default="GĐB")
+    parser.add_argument("--archive", default=ARCHIVE_PATH, help="file lịch sử gọn (xem archive.py)")
+    args = parser.parse_args(argv)
+
+    key = COMPARE_SOURCES[args.compare]
+    codes = load_frame(args.archive).complete(key).pair_codes(key)
+    for query in args.query:
+        try:
+            stats = query_stats(query, codes)
+        except QueryError as e:
+            parser.error(f"{query!r}: {e}")
+        rate = f"{stats['hit_rate']:.1%}" if stats["hit_rate"] is not None else "-"
+        print(f"{query}\n  dàn ({stats['size']} số): {stats['dan'].to_string(',')}\n"
+              f"  trúng {stats['hits']}/{stats['days']} ngày ({rate}, ngẫu nhiên {stats['expected']:.0%})"
+              f" · lâu ra {stats['current']} ngày")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,141 +1,238 @@
-import requests
-import concurrent.futures
-from bs4 import BeautifulSoup
-import logging
-import time
-from typing import List, Dict, Tuple
-
-logging.basicConfig(level=logging.INFO)
-HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"}
-
-def fetch_url(url: str, max_retries: int = 3) -> BeautifulSoup:
-    """
-    Fetch URL with retry logic and better error handling.
-    
-    Args:
-        url: URL to fetch
-        max_retries: Maximum number of retry attempts
-        
-    Returns:
-        BeautifulSoup object or None if failed
-    """
-    for attempt in range(max_retries):
-        try:
-            r = requests.get(url, headers=HEADERS, timeout=10)
-            r.raise_for_status()
-            return BeautifulSoup(r.text, "html.parser")
-        except requests.exceptions.Timeout:
-            logging.warning(f"Timeout loading {url}, attempt {attempt + 1}/{max_retries}")
-            if attempt < max_retries - 1:
-                time.sleep(1)  # Wait before retry
-        except requests.exceptions.RequestException as e:
-            logging.error(f"Error loading {url}: {e}")
-            if attempt < max_retries - 1:
-                time.sleep(1)
-            else:
-                return None
-    return None
-
-def fetch_dien_toan(total_days: int) -> List[Dict]:
-    """Fetch Điện Toán 123 data with validation."""
-    soup = fetch_url(f"https://ketqua04.net/so-ket-qua-dien-toan-123/{total_days}")
-    data = []
-    
-    if not soup:
-        logging.error("Failed to fetch Điện Toán data")
-        return data
-        
-    try:
-        divs = soup.find_all("div", class_="result_div", id="result_123")
-        for div in divs[:total_days]:
-            ds = div.find("span", id="result_date")
-            date = ds.text.strip() if ds else ""
-            
-            if not date:
-                continue
-                
-            tbl = div.find("table", id="result_tab_123")
-            if tbl:
-                row = tbl.find("tbody").find("tr")
-                cells = row.find_all("td") if row else []
-                if len(cells) == 3:
-                    nums = [c.text.strip() for c in cells]
-                    # Validate numbers
-                    if all(n.isdigit() for n in nums):
-                        data.append({"date": date, "dt_numbers": nums})
-    except Exception as e:
-        logging.error(f"Error parsing Điện Toán data: {e}")
-    
-    return data
-
-def fetch_than_tai(total_days: int) -> List[Dict]:
-    """Fetch Thần Tài data with validation."""
-    soup = fetch_url(f"https://ketqua04.net/so-ket-qua-than-tai/{total_days}")
-    data = []
-    
-    if not soup:
-        logging.error("Failed to fetch Thần Tài data")
-        return data
-        
-    try:
-        divs = soup.find_all("div", class_="result_div", id="result_tt4")
-        for div in divs[:total_days]:
-            ds = div.find("span", id="result_date")
-            date = ds.text.strip() if ds else ""
-            
-            if not date:
-                continue
-                
-            tbl = div.find("table", id="result_tab_tt4")
-            if tbl:
-                cell = tbl.find("td", id="rs_0_0")
-                num = cell.text.strip() if cell else ""
-                # Validate: should be 4 digits
-                if num.isdigit() and len(num) == 4:
-                    data.append({"date": date, "tt_number": num})
-    except Exception as e:
-        logging.error(f"Error parsing Thần Tài data: {e}")
-    
-    return data
-
-def _parse_congcuxoso(url: str, total_days: int) -> List[str]:
-    """Helper function to parse data from congcuxoso with validation."""
-    soup = fetch_url(url)
-    nums = []
-    
-    if not soup:
-        logging.error(f"Failed to fetch from {url}")
-        return nums
-        
-    try:
-        tbl = soup.find("table", id="MainContent_dgv")
-        if tbl:
-            rows = tbl.find_all("tr")[1:]  # Skip header
-            for row in reversed(rows):
-                cells = row.find_all("td")
-                for cell in reversed(cells):
-                    t = cell.text.strip()
-                    # Validate and clean data
-                    if t and t not in ("-----", "\xa0") and t.replace(" ", "").isdigit():
-                        clean_num = t.replace(" ", "").zfill(5)
-                        nums.append(clean_num)
-    except Exception as e:
-        logging.error(f"Error parsing congcuxoso data: {e}")
-    
-    return nums[:total_days]
-
-def fetch_xsmb_group(total_days: int) -> Tuple[List[str], List[str]]:
-    """
-    Fetch both ĐB and G1 in parallel for better performance.
-    
-    Returns:
-        Tuple of (ĐB numbers, G1 numbers)
-    """
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        f1 = executor.submit(_parse_congcuxoso, 
-                            "https://congcuxoso.com/MienBac/DacBiet/PhoiCauDacBiet/PhoiCauTuan5So.aspx", 
-                            total_days)
-        f2 = executor.submit(_parse_congcuxoso, 
-                            "https://congcuxoso.com/MienBac/GiaiNhat/PhoiCauGiaiNhat/PhoiCauTuan5So.aspx", 
-                            total_days)
-        return f1.result(), f2.result()
+import requests
+from requests.adapters import HTTPAdapter
+import concurrent.futures
+import contextvars
+import threading
+import codecs
+import logging
+import os
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import parsers
+import perf
+from http_cache import HttpCache
+
+logging.basicConfig(level=logging.INFO)
+HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"}
+
+REQUEST_TIMEOUT = 10  # giây cho mỗi lần thử
+RETRY_DELAY = 1
+
+# Có thể trỏ sang máy chủ phát lại cục bộ (xem replay_server.py)
+KETQUA_BASE = os.environ.get("SIEUGA_KETQUA_BASE", "https://ketqua04.net")
+CONGCUXOSO_BASE = os.environ.get("SIEUGA_CONGCUXOSO_BASE", "https://congcuxoso.com")
+
+DIEN_TOAN_URL = KETQUA_BASE + "/so-ket-qua-dien-toan-123/{days}"
+THAN_TAI_URL = KETQUA_BASE + "/so-ket-qua-than-tai/{days}"
+XSMB_URL = CONGCUXOSO_BASE + "/MienBac/DacBiet/PhoiCauDacBiet/PhoiCauTuan5So.aspx"
+GIAI_NHAT_URL = CONGCUXOSO_BASE + "/MienBac/GiaiNhat/PhoiCauGiaiNhat/PhoiCauTuan5So.aspx"
+
+SOURCES = ("dien_toan", "than_tai", "xsmb", "giai_nhat")
+
+# Một session keep-alive và một thread pool dùng chung cho mọi lần tải
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+_executor = concurrent.futures.ThreadPoolExecutor(max_workers=len(SOURCES), thread_name_prefix="fetch")
+
+
+def _submit(func, *args) -> concurrent.futures.Future:
+    """Chạy ``func`` trong thread pool với context hiện tại (để perf đếm đúng lần chạy)."""
+    return _executor.submit(contextvars.copy_context().run, func, *args)
+
+# Phản hồi đã tải, dùng cho yêu cầu có điều kiện (ETag/Last-Modified); None để tắt
+HTTP_CACHE: Optional[HttpCache] = HttpCache()
+
+
+def get_session() -> requests.Session:
+    """Shared keep-alive session with a connection pool per host."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=len(SOURCES))
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update(HEADERS)
+            _session = session
+        return _session
+
+def fetch_page(url: str, max_retries: int = 3, cache_key: Optional[str] = None) -> Optional[str]:
+    """
+    Fetch URL text with retry logic and better error handling.
+    
+    Khi đã có bản lưu của cùng URL trong HTTP_CACHE, yêu cầu được gửi kèm
+    ETag / Last-Modified; phản hồi 304 dùng lại bản lưu. Nếu mọi lần thử
+    đều lỗi, trả về bản lưu (có thể cũ, có thể của URL khác cùng khóa)
+    thay cho None.
+    
+    Args:
+        url: URL to fetch
+        max_retries: Maximum number of retry attempts
+        cache_key: Khóa trong HTTP_CACHE, mặc định là URL. Tên nguồn giữ
+            một bản lưu cho mọi số kỳ trong URL của nguồn đó
+        
+    Returns:
+        Page text or None if failed
+    """
+    key = cache_key or url
+    cached = HTTP_CACHE.get(key) if HTTP_CACHE is not None else None
+    same_url = cached is not None and cached.url == url
+    headers = cached.conditional_headers() if same_url else {}
+    for attempt in range(max_retries):
+        try:
+            r = get_session().get(url, timeout=REQUEST_TIMEOUT, headers=headers)
+            if r.status_code == 304 and same_url:
+                perf.count("http_cache.not_modified")
+                HTTP_CACHE.touch(cached, r.headers)
+                return cached.text
+            r.raise_for_status()
+            if HTTP_CACHE is not None:
+                HTTP_CACHE.put(key, url, r.text, r.headers)
+            return r.text
+        except requests.exceptions.Timeout:
+            logging.warning(f"Timeout loading {url}, attempt {attempt + 1}/{max_retries}")
+            perf.count("fetch.retry")
+            if attempt < max_retries - 1:
+                time.sleep(RETRY_DELAY)  # Wait before retry
+        except requests.exceptions.RequestException as e:
+            logging.error(f"Error loading {url}: {e}")
+            perf.count("fetch.retry")
+            if attempt < max_retries - 1:
+                time.sleep(RETRY_DELAY)
+            else:
+                break
+    if cached is not None:
+        logging.warning(f"Using cached copy of {url} fetched at {time.ctime(cached.fetched)}")
+        perf.count("http_cache.stale")
+        return cached.text
+    return None
+
+def _fetch_parsed(url: str, parse, total_days: int, name: str, cache_key: Optional[str] = None) -> list:
+    """Tải trang rồi phân tích bằng lxml, ghi log thời gian phân tích."""
+    with perf.stage(f"fetch.{name}"):
+        text = fetch_page(url, cache_key=cache_key)
+    if text is None:
+        logging.error(f"Failed to fetch {name} data")
+        return []
+    start = time.perf_counter()
+    try:
+        with perf.stage(f"parse.{name}"):
+            data = parse(text, total_days)
+    except Exception as e:
+        logging.error(f"Error parsing {name} data: {e}")
+        return []
+    logging.info(f"Parsed {name}: {len(data)} draws in {time.perf_counter() - start:.3f}s")
+    return data
+
+def _decoded(response: requests.Response) -> Iterator[str]:
+    decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(errors="replace")
+    for chunk in response.iter_content(chunk_size=parsers.CHUNK_SIZE):
+        yield decoder.decode(chunk)
+    yield decoder.decode(b"", final=True)
+
+def _fetch_streamed(url: str, parse, total_days: int, name: str, max_retries: int = 3) -> list:
+    """
+    Tải và phân tích trang lớn theo từng khúc, không giữ toàn bộ trang trong bộ nhớ.
+    
+    Lỗi mạng giữa chừng làm lượt đó thất bại và được thử lại từ đầu.
+    """
+    for attempt in range(max_retries):
+        start = time.perf_counter()
+        try:
+            with perf.stage(f"fetch+parse.{name}"), \
+                    get_session().get(url, timeout=REQUEST_TIMEOUT, stream=True) as r:
+                r.raise_for_status()
+                data = parse(_decoded(r), total_days)
+            logging.info(f"Streamed {name}: {len(data)} draws in {time.perf_counter() - start:.3f}s")
+            return data
+        except requests.exceptions.RequestException as e:
+            logging.warning(f"Error streaming {url}, attempt {attempt + 1}/{max_retries}: {e}")
+            perf.count("fetch.retry")
+            if attempt < max_retries - 1:
+                time.sleep(RETRY_DELAY)
+    logging.error(f"Failed to fetch {name} data")
+    return []
+
+def fetch_history(days: int) -> Dict[str, list]:
+    """
+    Fetch a long history (several thousand draws) of Điện Toán and Thần Tài.
+    
+    ketqua04 trả về ``days`` kỳ gần nhất trong một trang, nên một yêu cầu
+    được đọc dạng luồng thay cho việc phân trang. ĐB/G1 không có ở đây (chưa
+    làm): bảng tuần congcuxoso có kích thước cố định và không có phân trang.
+    
+    Returns:
+        Source -> parsed draws (như fetch_dien_toan / fetch_than_tai)
+    """
+    jobs = {
+        "dien_toan": (DIEN_TOAN_URL, parsers.parse_dien_toan, "Điện Toán"),
+        "than_tai": (THAN_TAI_URL, parsers.parse_than_tai, "Thần Tài"),
+    }
+    futures = {src: _submit(_fetch_streamed, url.format(days=days), parse, days, name)
+               for src, (url, parse, name) in jobs.items()}
+    return {src: f.result() for src, f in futures.items()}
+
+def fetch_dien_toan(total_days: int) -> List[Dict]:
+    """Fetch Điện Toán 123 data with validation."""
+    return _fetch_parsed(DIEN_TOAN_URL.format(days=total_days), parsers.parse_dien_toan,
+                         total_days, "Điện Toán", cache_key="dien_toan")
+
+def fetch_than_tai(total_days: int) -> List[Dict]:
+    """Fetch Thần Tài data with validation."""
+    return _fetch_parsed(THAN_TAI_URL.format(days=total_days), parsers.parse_than_tai,
+                         total_days, "Thần Tài", cache_key="than_tai")
+
+def _parse_congcuxoso(url: str, total_days: int, name: str) -> List[str]:
+    """Tải và phân tích một bảng tuần congcuxoso; ``name`` là tên nguồn ("xsmb", "giai_nhat")."""
+    return _fetch_parsed(url, parsers.parse_congcuxoso, total_days, name)
+
+def _parse_congcuxoso_dated(url: str, total_days: int, name: str) -> List[Dict]:
+    """Như _parse_congcuxoso nhưng giữ vị trí lịch (thứ, số ngày lùi) của mỗi số."""
+    return _fetch_parsed(url, parsers.parse_congcuxoso_dated, total_days, name)
+
+def fetch_xsmb_group(total_days: int) -> Tuple[List[str], List[str]]:
+    """
+    Fetch both ĐB and G1 in parallel for better performance.
+    
+    Returns:
+        Tuple of (ĐB numbers, G1 numbers)
+    """
+    f1 = _submit(_parse_congcuxoso, XSMB_URL, total_days, "xsmb")
+    f2 = _submit(_parse_congcuxoso, GIAI_NHAT_URL, total_days, "giai_nhat")
+    return f1.result(), f2.result()
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+def fetch_all(days: Dict[str, int]) -> Tuple[Dict[str, list], Dict[str, float]]:
+    """
+    Fetch several sources concurrently over the shared session.
+    
+    Mỗi nguồn chỉ được tải một lần dù nhiều bước cần tới nó (ví dụ ngày
+    của Điện Toán dùng cho cả ĐB và G1).
+    
+    Args:
+        days: Source name (see SOURCES) -> number of draws to fetch
+        
+    Returns:
+        Tuple of (source -> parsed draws, source -> seconds). ĐB/G1 draws
+        are dicts from parsers.parse_congcuxoso_dated. Sources not requested
+        are absent; the "total" timing is the wall time.
+    """
+    tasks = {
+        "dien_toan": fetch_dien_toan,
+        "than_tai": fetch_than_tai,
+        "xsmb": lambda n: _parse_congcuxoso_dated(XSMB_URL, n, "xsmb"),
+        "giai_nhat": lambda n: _parse_congcuxoso_dated(GIAI_NHAT_URL, n, "giai_nhat"),
+    }
+    start = time.perf_counter()
+    futures = {src: _submit(_timed, tasks[src], n) for src, n in days.items()}
+    results, timings = {}, {}
+    for src, future in futures.items():
+        results[src], timings[src] = future.result()
+    timings["total"] = time.perf_counter() - start
+    logging.info("Fetch timings: " + ", ".join(f"{k}={v:.2f}s" for k, v in timings.items()))
+    return results, timings
@@ -0,0 +1,458 @@
+"""
+Bộ máy phân tích không phụ thuộc Streamlit, kèm dòng lệnh xuất báo cáo.
+
+Các phân tích của app (Dàn Nuôi, lâu ra, Mức Số, backtest, Thống Kê) được
+tính từ HistoryFrame, nên có thể chạy theo lô (ví dụ cron ban đêm) cho một
+ngày, một dải offset hoặc toàn bộ lịch sử và ghi ra JSON/CSV/Parquet::
+
+    python engine.py --all --empty-tt 1-10 --empty-dt 1-10 --format parquet --out reports/
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+from datetime import date
+from itertools import product
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from backtest import (actual_codes, backtest_level_rows, hit_levels, level_counts, run_backtest,
+                      summarize_backtest)
+from classify import BO_KEYS, ZODIAC_KEYS
+from dan import Dan, from_matrix
+from frequency import dan_levels, level_map
+from gap_index import PAIR_TABLES, GapIndex
+from history import HistoryFrame
+from lau_ra import get_lau_ra_with_auto_reduce
+import nhi_hop
+import perf
+import significance
+from store import DrawStore, ingest
+from archive import ARCHIVE_PATH, refresh as refresh_archive
+
+NUM_DAYS = 50
+# Số kỳ tải lần đầu; lịch sử nhiều năm được nạp bằng ``python archive.py backfill``
+TOTAL_DAYS = int(os.environ.get("SIEUGA_TOTAL_DAYS", 100))
+HORIZON = 10
+
+COMPARE_SOURCES = {"GĐB": "xsmb", "Giải Nhất": "giai_nhat"}
+RESULT_TYPES = {"Thần tài": "than_tai", "Điện toán": "dien_toan"}
+
+# Nhãn kép hiển thị theo thứ tự KEP_KEYS, phần tử cuối cho cặp không thuộc loại kép nào
+KEP_LABELS = ["K.ÂM", "K.BẰNG", "K.LỆCH", "S.KÉP", "KHÔNG"]
+GAP_LABELS = {"bo": BO_KEYS, "zodiac": ZODIAC_KEYS, "kep": KEP_LABELS}
+# Giải có bảng lô gan (2 số cuối; ĐT lấy số thứ ba)
+LO_GAN_SOURCES = {"ĐB": "xsmb", "G1": "giai_nhat", "TT": "than_tai", "ĐT": "dien_toan"}
+
+# Mô hình ngẫu nhiên của kiểm định Monte Carlo
+NULL_MODELS = {"Đều 00-99": "uniform", "Hoán vị kết quả thật": "shuffle"}
+
+FORMATS = ("json", "csv", "parquet")
+
+
+# ============ PHÂN TÍCH ============
+def aligned_frame(history: HistoryFrame, compare_source: str) -> HistoryFrame:
+    """Những ngày có đủ TT, ĐT và nguồn so sánh (căn theo ngày)."""
+    return history.complete("dien_toan", "than_tai", COMPARE_SOURCES[compare_source])
+
+
+def muc_so(dans: Sequence[Dan]) -> Dict[int, Dan]:
+    """Mức số của các dàn, mức cao trước."""
+    return dan_levels(dans, descending=True)
+
+
+def lau_ra_levels(results, compare_last2, threshold: int, num_days: int = NUM_DAYS):
+    """
+    Dàn lâu ra (auto-reduce) kèm các mức số của chúng.
+
+    Returns:
+        Tuple of (lau_ra rows, actual threshold, threshold -> rows table,
+        [{"level", "count", "pairs"}])
+    """
+    lau_ra, actual, table = get_lau_ra_with_auto_reduce(results, compare_last2, threshold, num_days)
+    dan_list = [dan for _, dan in lau_ra]
+    muc_results = [{"level": level, "count": len(pairs), "pairs": pairs}
+                   for level, pairs in dan_levels(dan_list, levels=range(len(dan_list) + 1)).items()]
+    return lau_ra, actual, table, muc_results
+
+
+@perf.timed("dan_nuoi")
+def dan_nuoi_table(view: HistoryFrame, result_type: str, compare_source: str,
+                   include_duplicates: bool, num_days: Optional[int] = NUM_DAYS,
+                   lookback: int = nhi_hop.LOOKBACK) -> Tuple[pd.DataFrame, Dict[int, Dan]]:
+    """
+    Bảng dàn nuôi của lát cắt và mức số từ các dàn chưa ra.
+
+    ``num_days=None`` tính trên toàn bộ lát cắt; ``lookback`` là số kỳ so sánh.
+    """
+    results = view.text(RESULT_TYPES[result_type])
+    res = nhi_hop.dan_nuoi(results, view.last2(COMPARE_SOURCES[compare_source]),
+                           include_duplicates, lookback, num_days)
+    n = len(res["combos"])
+
+    # K1..K5 trúng dàn hiển thị 2 số cuối, ô không trúng để trống
+    shown = res["codes"][:, :5]
+    k_text = np.where(res["hits"][:, :5], np.char.zfill(shown.astype("U2"), 2), "")
+    df = pd.DataFrame({
+        "Ngày": view.labels[:n],
+        "KQ": results[:n],
+        "Dàn Nuôi": [d.to_string(" ") for d in from_matrix(res["combos"])],
+        "Hit": np.where(res["hits"].any(axis=1), "✅", "❌"),
+        "K1-K5": [" | ".join(row) for row in k_text.tolist()],
+    })
+    unseen = res["combos"][res["unseen"]]
+    levels = level_map(unseen.sum(axis=0), descending=True) if len(unseen) else {}
+    return df, levels
+
+
+@perf.timed("backtest")
+def backtest_report(aligned: HistoryFrame, compare_source: str, offset: int, horizon: int,
+                    empty_tt: int, empty_dt: int, num_days: int = NUM_DAYS):
+    """
+    Bảng backtest như tab Mức Số cùng thống kê hit rate và số lần trúng theo mức.
+
+    Returns:
+        Tuple of (run_backtest table, summarize_backtest, level_counts)
+    """
+    df = run_backtest(
+        aligned.text("than_tai"), aligned.text("dien_toan"), aligned.last2(COMPARE_SOURCES[compare_source]),
+        aligned.labels, offset, horizon, empty_tt, empty_dt, num_days, compare_source
+    )
+    return df, summarize_backtest(df), level_counts(df)
+
+
+@perf.timed("significance")
+def strategy_significance(aligned: HistoryFrame, compare_source: str, source: str, offset: int,
+                          horizon: int, threshold: int, select: Sequence[int],
+                          simulations: int = significance.SIMULATIONS, null: str = "uniform",
+                          num_days: int = NUM_DAYS, seed: int = 0, workers: int = 1) -> Dict:
+    """
+    Kiểm định Monte Carlo chiến lược "chơi các mức ``select``" trên ``horizon`` ngày test.
+
+    Args:
+        source: "TT" hoặc "ĐT"
+        select: Các mức được chơi mỗi ngày (như các ô mức đã tick)
+
+    Returns:
+        :func:`significance.significance` dict
+    """
+    offsets = list(range(offset + 1, offset + horizon + 1))
+    results = aligned.text("than_tai" if source == "TT" else "dien_toan")
+    last2 = aligned.last2(COMPARE_SOURCES[compare_source])
+    rows = backtest_level_rows(results, last2, offsets, threshold, num_days)
+    return significance.significance(significance.level_mask(rows, select), actual_codes(last2, offsets),
+                                     simulations, null, seed, workers)
+
+
+@perf.timed("thong_ke")
+def gap_index(history: HistoryFrame, compare_source: str,
+              until: Optional[np.datetime64] = None) -> GapIndex:
+    """Chỉ số lâu ra của ĐB/G1 trên toàn bộ lịch sử, hoặc tính đến ngày ``until``."""
+    key = COMPARE_SOURCES[compare_source]
+    rows = history.complete(key)
+    if until is not None:
+        rows = rows.window(int(np.count_nonzero(rows.dates > until)))
+    return GapIndex.from_history(rows.pair_codes(key))
+
+
+@perf.timed("thong_ke")
+def gap_tables_until(history: HistoryFrame, compare_source: str,
+                     untils: Sequence[np.datetime64]) -> List[pd.DataFrame]:
+    """
+    ``gap_table(gap_index(history, compare_source, d))`` cho từng ngày ``d`` trong ``untils``.
+
+    Một GapIndex duy nhất được nối dần theo thời gian (cũ -> mới), nên mỗi
+    kỳ chỉ được duyệt một lần thay vì dựng lại chỉ số cho từng ngày.
+    """
+    key = COMPARE_SOURCES[compare_source]
+    rows = history.complete(key)
+    codes = rows.pair_codes(key)[::-1]
+    dates = rows.dates[::-1]
+    index, done = GapIndex(), 0
+    out: List[Optional[pd.DataFrame]] = [None] * len(untils)
+    for i in np.argsort(np.asarray(untils, dtype="datetime64[D]"), kind="stable"):
+        end = int(np.searchsorted(dates, untils[i], side="right"))
+        index.extend(codes[done:end])
+        done = end
+        out[i] = gap_table(index)
+    return out
+
+
+def lo_codes(history: HistoryFrame, source: str) -> np.ndarray:
+    """Mã 2 số cuối các kỳ của một giải trong LO_GAN_SOURCES (mới nhất trước)."""
+    key = LO_GAN_SOURCES[source]
+    return history.complete(key).pair_codes(key)
+
+
+@perf.timed("lo_gan")
+def lo_gan(history: HistoryFrame, source: str,
+           base: Optional[Tuple[np.ndarray, GapIndex]] = None) -> GapIndex:
+    """
+    Lô gan của từng cặp 00..99 trên toàn bộ lịch sử một giải.
+
+    ``base`` là (lo_codes của bảng trước, chỉ số đã tính trên đó): khi bảng
+    mới chỉ thêm các kỳ mới hơn, chỉ số cũ được sao chép rồi nối các kỳ đó
+    thay vì duyệt lại cả lịch sử.
+    """
+    codes = lo_codes(history, source)
+    if base is not None:
+        old, index = base
+        added = len(codes) - len(old)
+        if added >= 0 and index.n == len(old) and np.array_equal(codes[added:], old):
+            index = index.copy()
+            index.extend(codes[:added][::-1])
+            perf.count("lo_gan.incremental")
+            return index
+    return GapIndex.from_history(codes, tables=PAIR_TABLES)
+
+
+def lo_gan_table(index: GapIndex) -> pd.DataFrame:
+    """Thống kê lô gan theo cặp "00".."99" (cột như GapIndex.summary)."""
+    summary = index.summary("pair")
+    summary.index = pd.Index([f"{g:02d}" for g in summary.index], name="pair")
+    return summary
+
+
+def gap_table(index: GapIndex) -> pd.DataFrame:
+    """Thống kê lâu ra của mọi loại phân loại trong một bảng (nhãn nhóm dạng chuỗi)."""
+    frames = []
+    for name in index.tables:
+        summary = index.summary(name).reset_index()
+        labels = GAP_LABELS.get(name)
+        summary.insert(0, "category", name)
+        summary.insert(2, "label", [labels[g] if labels else str(g) for g in summary["group"]])
+        frames.append(summary)
+    return pd.concat(frames, ignore_index=True)
+
+
+# ============ BÁO CÁO THEO LÔ ============
+def _label(frame: HistoryFrame, row: int) -> str:
+    return frame.labels[row] if 0 <= row < len(frame) else ""
+
+
+def _with_keys(df: pd.DataFrame, **keys) -> pd.DataFrame:
+    df = df.copy()
+    for k, (name, value) in enumerate(keys.items()):
+        df.insert(k, name, value)
+    return df
+
+
+@perf.timed("batch_report")
+def batch_report(history: HistoryFrame, offsets: Union[Iterable[int], Mapping[str, Iterable[int]]],
+                 compare_sources: Sequence[str],
+                 result_types: Sequence[str], include_duplicates: Sequence[bool],
+                 empty_tt: Sequence[int], empty_dt: Sequence[int], horizon: int = HORIZON,
+                 num_days: int = NUM_DAYS, lookback: int = nhi_hop.LOOKBACK,
+                 simulations: int = 0, select: Sequence[int] = (0, 1, 2),
+                 null: str = "uniform", workers: int = 1) -> Dict[str, pd.DataFrame]:
+    """
+    Compute every analysis for each offset and parameter combination.
+
+    Backtest được tính một lần cho mỗi (nguồn so sánh, TT/ĐT, ngưỡng) trên
+    mọi ngày cần thiết, thay vì chạy lại cho từng offset. Với
+    ``simulations > 0`` chiến lược chơi các mức ``select`` được kiểm định
+    Monte Carlo trên toàn bộ các ngày test đó.
+
+    Args:
+        offsets: Offset trong bảng căn của mỗi nguồn so sánh, hoặc nguồn ->
+            offset khi cùng một ngày có offset khác nhau ở từng nguồn (ví dụ
+            Giải Nhất thiếu kỳ)
+
+    Returns:
+        Dict of long-format tables: dan_nuoi, dan_nuoi_muc, lau_ra, muc_so,
+        backtest, thong_ke, significance. Mỗi bảng có cột khóa offset, ngày
+        và tham số (significance theo nguồn so sánh, loại và ngưỡng).
+    """
+    if not isinstance(offsets, Mapping):
+        offsets = dict.fromkeys(compare_sources, list(offsets))
+    tables: Dict[str, List[pd.DataFrame]] = {k: [] for k in
+                                             ("dan_nuoi", "dan_nuoi_muc", "lau_ra", "muc_so", "backtest", "thong_ke",
+                                              "significance")}
+
+    for compare in compare_sources:
+        aligned = aligned_frame(history, compare)
+        key = COMPARE_SOURCES[compare]
+        valid = sorted({o for o in offsets.get(compare, ()) if 0 <= o < len(aligned)})
+        gap_tables = gap_tables_until(history, compare, [aligned.dates[o] for o in valid])
+        for o, gaps in zip(valid, gap_tables):
+            view = aligned.window(o, num_days)
+            keys = {"offset": o, "date": _label(aligned, o), "compare_source": compare}
+
+            for rtype, dup in product(result_types, include_duplicates):
+                df, levels = dan_nuoi_table(view, rtype, compare, dup, num_days, lookback)
+                tables["dan_nuoi"].append(_with_keys(df, **keys, result_type=rtype, include_duplicates=dup))
+                tables["dan_nuoi_muc"].append(pd.DataFrame(
+                    [{**keys, "result_type": rtype, "include_duplicates": dup,
+                      "level": lvl, "count": len(p), "pairs": p.to_string(",")} for lvl, p in levels.items()]))
+
+            for source, thresholds in (("TT", empty_tt), ("ĐT", empty_dt)):
+                results = view.text("than_tai" if source == "TT" else "dien_toan")
+                for t in thresholds:
+                    lau_ra, actual, _, levels = lau_ra_levels(results, view.last2(key), t, num_days)
+                    common = {**keys, "type": source, "empty": t, "actual_empty": actual}
+                    tables["lau_ra"].append(pd.DataFrame(
+                        [{**common, "KQ": str(res), "dan": dan.to_string(",")} for res, dan in lau_ra]))
+                    tables["muc_so"].append(pd.DataFrame(
+                        [{**common, "level": m["level"], "count": m["count"], "pairs": m["pairs"].to_string(",")}
+                         for m in levels]))
+
+            tables["thong_ke"].append(_with_keys(gaps, **keys))
+
+        # Ngày test: kết quả so sánh tại offset - 1 với mức tính từ offset
+        tested = sorted({o + i for o in valid for i in range(1, horizon + 1)})
+        tested = [o for o in tested if o - 1 < len(aligned)]
+        last2 = aligned.last2(key)
+        for source, thresholds in (("TT", empty_tt), ("ĐT", empty_dt)):
+            results = aligned.text("than_tai" if source == "TT" else "dien_toan")
+            for t in thresholds:
+                rows = backtest_level_rows(results, last2, tested, t, num_days)
+                codes = actual_codes(last2, tested)
+                levels = hit_levels(rows, codes)
+                tables["backtest"].append(pd.DataFrame({
+                    "offset": tested,
+                    "date": [_label(aligned, o - 1) for o in tested],
+                    "compare_source": compare,
+                    "compare_value": [last2[o - 1] for o in tested],
+                    "type": source,
+                    "empty": t,
+                    "level": levels,
+                }))
+                if simulations > 0:
+                    result = significance.significance(significance.level_mask(rows, select), codes,
+                                                       simulations, null, workers=workers)
+                    tables["significance"].append(pd.DataFrame([{
+                        "compare_source": compare, "type": source, "empty": t,
+                        "levels": ",".join(map(str, select)), **result,
+                    }]))
+
+    return {name: (pd.concat(frames, ignore_index=True) if frames else pd.DataFrame())
+            for name, frames in tables.items()}
+
+
+def write_report(tables: Dict[str, pd.DataFrame], out: str, fmt: str, meta: Optional[Dict] = None) -> List[str]:
+    """
+    Ghi các bảng báo cáo: JSON một file, CSV/Parquet một file mỗi bảng.
+
+    Returns:
+        Paths written
+    """
+    os.makedirs(out, exist_ok=True)
+    if fmt == "json":
+        path = os.path.join(out, "report.json")
+        payload = {"meta": meta or {}, "tables": {k: v.to_dict(orient="records") for k, v in tables.items()}}
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False, default=_json_default)
+        return [path]
+
+    paths = []
+    for name, df in tables.items():
+        path = os.path.join(out, f"{name}.{fmt}")
+        if fmt == "csv":
+            df.to_csv(path, index=False)
+        else:
+            df.to_parquet(path, index=False)
+        paths.append(path)
+    if meta:
+        path = os.path.join(out, "meta.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2, default=_json_default)
+        paths.append(path)
+    return paths
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+# ============ DÒNG LỆNH ============
+def int_list(text: str) -> List[int]:
+    """ "4", "1-10" hoặc "2,4,6" -> danh sách số nguyên."""
+    values = []
+    for part in text.split(","):
+        if "-" in part.strip()[1:]:
+            lo, hi = part.split("-", 1)
+            values.extend(range(int(lo), int(hi) + 1))
+        else:
+            values.append(int(part))
+    return values
+
+
+def _offset_for_date(history: HistoryFrame, compare_source: str, day: date) -> int:
+    aligned = aligned_frame(history, compare_source)
+    matches = np.flatnonzero(aligned.dates == np.datetime64(day, "D"))
+    if matches.size == 0:
+        raise ValueError(f"Không có kỳ ngày {day.isoformat()} cho nguồn so sánh {compare_source}")
+    return int(matches[0])
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Tính báo cáo phân tích không cần giao diện")
+    where = parser.add_mutually_exclusive_group()
+    where.add_argument("--date", type=date.fromisoformat, help="ngày kết quả (yyyy-mm-dd)")
+    where.add_argument("--offsets", type=int_list, help='dải offset, ví dụ "0-30"')
+    where.add_argument("--all", action="store_true", help="mọi offset có đủ NUM_DAYS ngày")
+    parser.add_argument("--compare", nargs="+", choices=list(COMPARE_SOURCES), default=list(COMPARE_SOURCES))
+    parser.add_argument("--result-type", nargs="+", choices=list(RESULT_TYPES), default=list(RESULT_TYPES))
+    parser.add_argument("--include-duplicates", choices=("yes", "no", "both"), default="yes")
+    parser.add_argument("--empty-tt", type=int_list, default=[4])
+    parser.add_argument("--empty-dt", type=int_list, default=[4])
+    parser.add_argument("--horizon", type=int, default=HORIZON)
+    parser.add_argument("--num-days", type=int, default=NUM_DAYS)
+    parser.add_argument("--lookback", type=int, default=nhi_hop.LOOKBACK, help="số kỳ so sánh của dàn nuôi")
+    parser.add_argument("--simulations", type=int, default=0, help="số chuỗi giả Monte Carlo (0 = tắt)")
+    parser.add_argument("--levels", type=int_list, default=[0, 1, 2], help="các mức được chơi khi kiểm định")
+    parser.add_argument("--null", choices=significance.NULLS, default="uniform")
+    parser.add_argument("--workers", type=int, default=1, help="số process mô phỏng")
+    parser.add_argument("--db", help="đường dẫn kho SQLite (mặc định như app)")
+    parser.add_argument("--archive", default=ARCHIVE_PATH, help="file lịch sử gọn (xem archive.py)")
+    parser.add_argument("--fetch", action="store_true", help="nạp kỳ mới từ trang nguồn trước khi tính")
+    parser.add_argument("--format", choices=FORMATS, default="json")
+    parser.add_argument("--out", default="reports")
+    args = parser.parse_args(argv)
+
+    perf.begin_run()
+    store = DrawStore(args.db) if args.db else DrawStore()
+    added = ingest(store, TOTAL_DAYS)[0] if args.fetch else {}
+    history = refresh_archive(store, args.archive, rebuild=any(added.values()))
+
+    # Offset theo từng nguồn so sánh: cùng một ngày có thể ở hàng khác nhau trong bảng căn của mỗi nguồn
+    if args.date:
+        try:
+            offsets = {c: [_offset_for_date(history, c, args.date)] for c in args.compare}
+        except ValueError as e:
+            parser.error(str(e))
+    elif args.offsets:
+        offsets = dict.fromkeys(args.compare, sorted(set(args.offsets)))
+    elif args.all:
+        offsets = {c: list(range(max(1, len(aligned_frame(history, c)) - args.num_days + 1))) for c in args.compare}
+    else:
+        offsets = dict.fromkeys(args.compare, [0])
+
+    dups = {"yes": [True], "no": [False], "both": [True, False]}[args.include_duplicates]
+    tables = batch_report(history, offsets, args.compare, args.result_type, dups,
+                          args.empty_tt, args.empty_dt, args.horizon, args.num_days, args.lookback,
+                          args.simulations, args.levels, args.null, args.workers)
+    meta = {
+        "version": history.version,
+        "rows": len(history),
+        "offsets": offsets,
+        **{k: v for k, v in vars(args).items() if k not in ("db", "archive", "out", "format", "fetch", "offsets")},
+    }
+    try:
+        paths = write_report(tables, args.out, args.format, meta)
+    except ImportError as e:
+        sys.exit(f"Không ghi được {args.format}: {e}")
+    for path in paths:
+        print(path)
+    perf.end_run(command="engine")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,113 @@
+"""
+Bộ đếm tần suất cặp số (mức số) dùng NumPy.
+
+Mỗi chuỗi (kết quả hoặc dàn) được chuyển thành một hàng đếm 100 cột,
+sau đó mọi mức được lấy ra từ một histogram duy nhất.
+"""
+
+from typing import Dict, Iterable, Optional, Sequence
+
+import numpy as np
+
+from dan import Dan, to_matrix
+
+
+def pair_count_matrix(strings: Sequence[str]) -> np.ndarray:
+    """
+    Build the (rows × 100) pair count matrix for a list of strings.
+
+    Counts match ``str.count(pair)``: pairs never span a non-digit
+    character and runs like "111" count "11" only once (non-overlapping).
+
+    Args:
+        strings: Result strings ("1234") or dàn strings ("01 05 12")
+
+    Returns:
+        int32 array where ``m[r, p]`` is how often pair ``p`` occurs in row ``r``
+    """
+    rows = len(strings)
+    if rows == 0:
+        return np.zeros((0, 100), dtype=np.int32)
+
+    joined = "|".join(strings) + "|"
+    buf = np.frombuffer(joined.encode("ascii", "replace"), dtype=np.uint8)
+    lengths = np.fromiter((len(s) + 1 for s in strings), dtype=np.int64, count=rows)
+    row_of = np.repeat(np.arange(rows, dtype=np.int64), lengths)
+
+    digits = buf.astype(np.int64) - 48
+    is_digit = (digits >= 0) & (digits <= 9)
+    a, b = digits[:-1], digits[1:]
+    valid = is_digit[:-1] & is_digit[1:]
+
+    # Cặp kép (aa) trong một chuỗi liền "aaa..." chỉ được đếm xen kẽ như str.count
+    same = valid & (a == b)
+    idx = np.arange(len(same))
+    run_start = np.maximum.accumulate(np.where(same, 0, idx + 1))
+    keep = valid & (~same | ((idx - run_start) % 2 == 0))
+
+    codes = row_of[:-1][keep] * 100 + a[keep] * 10 + b[keep]
+    counts = np.bincount(codes, minlength=rows * 100)
+    return counts.reshape(rows, 100).astype(np.int32)
+
+
+def pair_totals(strings: Sequence[str]) -> np.ndarray:
+    """Tổng số lần xuất hiện của 100 cặp số trên toàn bộ danh sách."""
+    return pair_count_matrix(strings).sum(axis=0)
+
+
+def window_totals(counts: np.ndarray, starts: np.ndarray, size: int) -> np.ndarray:
+    """
+    Sum rows ``[start, start + size)`` of a count matrix for many windows at once.
+
+    Args:
+        counts: (rows × 100) matrix from :func:`pair_count_matrix`
+        starts: Start row of each window
+        size: Window length (clipped at the end of the matrix)
+
+    Returns:
+        (len(starts) × 100) array of per-window totals
+    """
+    cum = np.zeros((counts.shape[0] + 1, 100), dtype=np.int64)
+    np.cumsum(counts, axis=0, out=cum[1:])
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = np.minimum(starts + size, counts.shape[0])
+    return cum[ends] - cum[starts]
+
+
+def level_map(totals: np.ndarray, levels: Optional[Iterable[int]] = None,
+              descending: bool = False) -> Dict[int, Dan]:
+    """
+    Group the 100 pairs by their total count.
+
+    Args:
+        totals: Length-100 array of counts
+        levels: Only keep these levels (all non-empty levels if None)
+        descending: Order levels from high to low
+
+    Returns:
+        Dict level -> Dan of the pairs at that level, only non-empty levels
+    """
+    totals = np.asarray(totals)
+    uniq = np.unique(totals).tolist()
+    if descending:
+        uniq.reverse()
+    wanted = None if levels is None else set(levels)
+    return {lvl: Dan.from_mask(totals == lvl) for lvl in uniq
+            if wanted is None or lvl in wanted}
+
+
+def muc_levels(strings: Sequence[str], levels: Optional[Iterable[int]] = None,
+               descending: bool = False) -> Dict[int, Dan]:
+    """Mức số của danh sách chuỗi: level -> dàn các cặp có đúng số lần đó."""
+    return level_map(pair_totals(strings), levels=levels, descending=descending)
+
+
+def dan_totals(dans: Sequence[Dan]) -> np.ndarray:
+    """Số dàn chứa mỗi cặp số (mảng dài 100)."""
+    return to_matrix(dans).sum(axis=0)
+
+
+def dan_levels(dans: Sequence[Dan], levels: Optional[Iterable[int]] = None,
+               descending: bool = False) -> Dict[int, Dan]:
+    """Mức số của danh sách dàn: level -> dàn các cặp nằm trong đúng ``level`` dàn."""
+    return level_map(dan_totals(dans), levels=levels, descending=descending)
@@ -0,0 +1,188 @@
+"""
+Chỉ số "lâu ra" cho mọi nhóm phân loại (bộ, kép, hiệu, con giáp, tổng...).
+
+Một lần duyệt lịch sử ghi lại, cho từng giá trị của từng loại: số kỳ chưa
+ra hiện tại, gan lớn nhất, chu kỳ trung bình/trung vị và số lần gặp mỗi độ
+dài gan. Khi có kỳ mới chỉ cần ``append`` thay vì tính lại.
+
+Với ``PAIR_TABLES`` mỗi cặp 00..99 là một nhóm, tức bảng "lô gan".
+"""
+
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from classify import BO_CODE, DAU, DUOI, HIEU, KEP_CODE, KEP_KEYS, TONG, ZODIAC_CODE, to_codes
+
+# Cặp không thuộc loại kép nào được gom vào nhóm cuối (mã len(KEP_KEYS))
+KEP_GROUP = np.where(KEP_CODE < 0, len(KEP_KEYS), KEP_CODE).astype(np.int8)
+
+GAP_TABLES = {
+    "bo": BO_CODE,
+    "kep": KEP_GROUP,
+    "hieu": HIEU,
+    "zodiac": ZODIAC_CODE,
+    "tong": TONG,
+    "dau": DAU,
+    "duoi": DUOI,
+}
+
+# Lô gan: mỗi cặp là một nhóm
+PAIR_TABLES = {"pair": np.arange(100, dtype=np.int8)}
+
+
+class GapIndex:
+    """
+    Gap statistics per category value, built in one pass and updated incrementally.
+
+    Lịch sử được lưu theo thứ tự thời gian (cũ -> mới); "gan" là số kỳ
+    liên tiếp không ra giữa hai lần ra của cùng một nhóm. Mỗi loại giữ
+    bảng đếm (nhóm × độ dài gan), nên thống kê được tính cho mọi nhóm cùng
+    lúc và một kỳ mới chỉ tăng một ô của bảng.
+    """
+
+    def __init__(self, tables: Optional[Dict[str, np.ndarray]] = None):
+        self.tables = dict(GAP_TABLES if tables is None else tables)
+        self.n = 0
+        self._last = {}
+        self._count = {}
+        self._hist = {}
+        self._log = {}
+        for name, table in self.tables.items():
+            groups = int(table.max()) + 1
+            self._last[name] = np.full(groups, -1, dtype=np.int64)
+            self._count[name] = np.zeros(groups, dtype=np.int64)
+            self._hist[name] = np.zeros((groups, 1), dtype=np.int64)
+            self._log[name] = []    # các khối (nhóm, gan) theo thứ tự ghi; append ghi từng cặp số
+
+    @classmethod
+    def from_history(cls, pairs: Iterable, newest_first: bool = True,
+                     tables: Optional[Dict[str, np.ndarray]] = None) -> "GapIndex":
+        """Build the index from a history of 2-digit endings (mới nhất trước theo mặc định)."""
+        codes = to_codes(pairs)
+        index = cls(tables)
+        index.extend(codes[::-1] if newest_first else codes)
+        return index
+
+    def copy(self) -> "GapIndex":
+        """Bản sao độc lập, để nối thêm kỳ mà không đổi chỉ số đang được dùng chung."""
+        other = GapIndex.__new__(GapIndex)
+        other.tables, other.n = self.tables, self.n
+        other._last = {name: a.copy() for name, a in self._last.items()}
+        other._count = {name: a.copy() for name, a in self._count.items()}
+        other._hist = {name: a.copy() for name, a in self._hist.items()}
+        other._log = {name: list(chunks) for name, chunks in self._log.items()}
+        return other
+
+    def _fit(self, name: str, longest: int) -> np.ndarray:
+        """Bảng đếm của loại, nới rộng (gấp đôi) khi có gan dài hơn số cột."""
+        hist = self._hist[name]
+        if longest >= hist.shape[1]:
+            width = max(2 * hist.shape[1], longest + 1)
+            hist = self._hist[name] = np.pad(hist, ((0, 0), (0, width - hist.shape[1])))
+        return hist
+
+    def _add_gaps(self, name: str, groups: np.ndarray, gaps: np.ndarray) -> None:
+        if gaps.size:
+            np.add.at(self._fit(name, int(gaps.max())), (groups, gaps), 1)
+            self._log[name].append((groups, gaps))
+
+    def extend(self, pairs: Iterable) -> None:
+        """Thêm nhiều kỳ theo thứ tự thời gian (cũ -> mới)."""
+        codes = to_codes(pairs)
+        if codes.size == 0:
+            return
+        positions = self.n + np.arange(codes.size)
+        valid = codes >= 0
+        for name, table in self.tables.items():
+            # Các lần ra sắp theo (nhóm, thời gian); gan là hiệu vị trí liên tiếp trong cùng nhóm
+            groups = table[codes[valid]].astype(np.int64)
+            known = groups >= 0
+            order = np.argsort(groups[known], kind="stable")
+            g, pos = groups[known][order], positions[valid][known][order]
+            if not g.size:
+                continue
+            first = np.ones(g.size, dtype=bool)
+            first[1:] = g[1:] != g[:-1]
+            last = self._last[name]
+            prev = np.empty_like(pos)
+            prev[1:] = pos[:-1]
+            prev[first] = last[g[first]]
+            closed = prev >= 0
+            self._add_gaps(name, g[closed], pos[closed] - prev[closed] - 1)
+            final = np.append(first[1:], True)
+            last[g[final]] = pos[final]
+            self._count[name] += np.bincount(g, minlength=last.size)
+        self.n += codes.size
+
+    def append(self, pair) -> None:
+        """Thêm một kỳ mới nhất, O(1) cho mỗi loại phân loại."""
+        c = int(to_codes([pair])[0])
+        if c >= 0:
+            for name, table in self.tables.items():
+                g = int(table[c])
+                if g < 0:
+                    continue
+                last = int(self._last[name][g])
+                if last >= 0:
+                    gap = self.n - last - 1
+                    self._fit(name, gap)[g, gap] += 1
+                    self._log[name].append((g, gap))
+                self._last[name][g] = self.n
+                self._count[name][g] += 1
+        self.n += 1
+
+    def current_gap(self, name: str) -> np.ndarray:
+        """Số kỳ chưa ra tính đến kỳ mới nhất của mỗi nhóm, -1 nếu chưa ra lần nào."""
+        last = self._last[name]
+        return np.where(last >= 0, self.n - 1 - last, -1)
+
+    def gaps(self, name: str, group: int) -> List[int]:
+        """Danh sách gan đã kết thúc của một nhóm, theo thứ tự thời gian."""
+        out = []
+        for groups, gaps in self._log[name]:
+            out.extend(np.asarray(gaps)[np.asarray(groups) == group].tolist())
+        return out
+
+    def gap_counts(self, name: str) -> np.ndarray:
+        """
+        Số lần gặp mỗi độ dài gan đã kết thúc.
+
+        Returns:
+            Mảng (nhóm × độ dài), cột k là số lần nhóm vắng đúng k kỳ liên
+            tiếp; số cột là gan dài nhất + 1
+        """
+        hist = self._hist[name]
+        seen = np.flatnonzero(hist.any(axis=0))
+        return hist[:, :seen[-1] + 1 if seen.size else 0].copy()
+
+    def summary(self, name: str) -> pd.DataFrame:
+        """
+        Bảng thống kê của một loại phân loại.
+
+        Returns:
+            DataFrame indexed by group code with columns current, max_gap,
+            mean_cycle, median_cycle, count (max_gap tính cả gan hiện tại;
+            chu kỳ = gan + 1, NaN khi chưa có gan nào kết thúc)
+        """
+        current = self.current_gap(name)
+        hist = self._hist[name]
+        closed = hist.sum(axis=1)
+        width = hist.shape[1]
+        longest = np.where(closed > 0, width - 1 - np.argmax(hist[:, ::-1] > 0, axis=1), -1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = (hist @ np.arange(width)) / closed + 1
+        # Trung vị từ bảng đếm: hai phần tử giữa của dãy gan đã sắp
+        cum = hist.cumsum(axis=1)
+        lo = np.argmax(cum > ((closed - 1) // 2)[:, None], axis=1)
+        hi = np.argmax(cum > (closed // 2)[:, None], axis=1)
+        out = pd.DataFrame({
+            "current": current.astype(np.int64),
+            "max_gap": np.maximum(longest, current).astype(np.int64),
+            "mean_cycle": np.where(closed > 0, mean, np.nan),
+            "median_cycle": np.where(closed > 0, (lo + hi) / 2 + 1, np.nan),
+            "count": self._count[name].copy(),
+        })
+        out.index.name = "group"
+        return out
@@ -0,0 +1,299 @@
+"""
+Dò lưới tham số dàn lâu ra / backtest trên toàn bộ lịch sử.
+
+Mỗi ô lưới là một bộ (ngưỡng ô rỗng, cửa sổ gộp, số kỳ so sánh, hàng tối
+đa) cho một loại TT/ĐT và một nguồn so sánh; ô được chấm bằng backtest của
+chiến lược chơi các mức ``select`` trên mọi ngày test được:
+
+- ``hit_rate``: tỉ lệ ngày kết quả so sánh rơi vào các mức đã chọn
+- ``expected``: tỉ lệ trúng kỳ vọng nếu kết quả ngẫu nhiên đều (cỡ dàn / 100)
+- ``z``: độ lệch chuẩn hóa của số ngày trúng so với kỳ vọng, dùng để xếp hạng
+
+Kết quả từng ô được ghi nối vào một file JSON lines, khóa theo tham số và
+dữ liệu đầu vào của ô (ngày cuối cùng và dấu vân tay các cột được dùng), nên
+chạy lại lưới (kể cả sau khi bị ngắt) chỉ tính các ô chưa có. Ô đã tính vẫn
+dùng được sau khi có kỳ mới: ``--until`` chấm lại lưới trên dữ liệu tới một
+ngày cũ mà không tính lại gì::
+
+    python grid_search.py --empty 1-10 --window 5,7,9 --lookback 21,28 --max-row 21,28 --workers 4
+    python grid_search.py --until 2026-09-30
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from itertools import product
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from archive import ARCHIVE_PATH, refresh as refresh_archive
+from backtest import actual_codes, backtest_level_grid
+from engine import COMPARE_SOURCES, NUM_DAYS, aligned_frame, int_list
+from history import HistoryFrame
+from lau_ra import LOOKBACK, MAX_ROW, WINDOW
+from significance import level_mask
+from store import DrawStore
+
+GRID_DIR = os.environ.get(
+    "SIEUGA_GRID_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "grid")
+)
+
+TYPES = {"TT": "than_tai", "ĐT": "dien_toan"}
+PARAMS = ("empty", "window", "lookback", "max_row")
+DEFAULT_GRID = {
+    "empty": list(range(1, 11)),
+    "window": [5, WINDOW, 9],
+    "lookback": [21, LOOKBACK],
+    "max_row": [21, MAX_ROW],
+}
+
+# Khóa một ô: (nguồn so sánh, loại, ngày cuối, dấu vân tay dữ liệu, num_days, các mức chơi,
+# empty, window, lookback, max_row)
+CellKey = Tuple[str, str, str, str, int, Tuple[int, ...], int, int, int, int]
+
+
+def score(rows: np.ndarray, codes: np.ndarray, select: Iterable[int]) -> Dict[str, Optional[float]]:
+    """
+    Backtest score of playing levels ``select`` each day.
+
+    Args:
+        rows: (days × 100) mức của các cặp mỗi ngày, hàng -1 khi không test được
+        codes: Mã cặp so sánh thật của mỗi ngày, -1 khi không có
+        select: Các mức được chơi
+
+    Returns:
+        Dict with days, hits, hit_rate, expected, edge (hit_rate - expected),
+        z, p_value (một phía, xấp xỉ chuẩn) và size (cỡ dàn trung bình)
+    """
+    played = level_mask(rows, select)
+    keep = (codes >= 0) & played.any(axis=1)
+    played, codes = played[keep], codes[keep]
+    days = len(codes)
+    out: Dict[str, Optional[float]] = {"days": days, "hits": 0, "hit_rate": None, "expected": None,
+                                       "edge": None, "z": None, "p_value": None, "size": None}
+    if days == 0:
+        return out
+    hits = int(played[np.arange(days), codes].sum())
+    p = played.sum(axis=1) / 100
+    var = float((p * (1 - p)).sum())
+    z = (hits - p.sum()) / np.sqrt(var) if var > 0 else 0.0
+    out.update({
+        "hits": hits,
+        "hit_rate": hits / days,
+        "expected": float(p.mean()),
+        "edge": hits / days - float(p.mean()),
+        "z": float(z),
+        "p_value": float(stats.norm.sf(z)),
+        "size": float(p.mean() * 100),
+    })
+    return out
+
+
+def _evaluate(results: np.ndarray, last2: np.ndarray, offsets: List[int], thresholds: List[int],
+              num_days: int, window: int, lookback: int, max_row: int,
+              select: Tuple[int, ...]) -> List[Dict[str, Optional[float]]]:
+    """Chấm mọi ngưỡng của một bộ (window, lookback, max_row); chạy trong process con."""
+    grid = backtest_level_grid(results, last2, offsets, thresholds, num_days, window, lookback, max_row)
+    codes = actual_codes(last2, offsets)
+    return [score(rows, codes, select) for rows in grid]
+
+
+def data_fingerprint(aligned: HistoryFrame, *sources: str) -> str:
+    """Dấu vân tay các cột ``sources`` (và ngày) của bảng căn: đổi khi một kỳ được thêm hay sửa."""
+    digest = hashlib.blake2b(np.ascontiguousarray(aligned.dates).tobytes(), digest_size=8)
+    for source in sources:
+        digest.update(np.ascontiguousarray(aligned.values[source]).tobytes())
+    return digest.hexdigest()
+
+
+class GridCache:
+    """
+    Kết quả các ô lưới đã tính, lưu nối vào ``<folder>/cells.jsonl``.
+
+    Mỗi ô được khóa theo chính đầu vào của nó (xem CellKey), không theo
+    version của cả bảng lịch sử, nên kỳ mới không làm mất các ô đã tính.
+    Mỗi ô được ghi (và flush) ngay khi tính xong, nên lần chạy bị ngắt giữa
+    chừng vẫn giữ được các ô đã xong.
+    """
+
+    def __init__(self, folder: str = GRID_DIR):
+        self.path = os.path.join(folder, "cells.jsonl")
+        self.cells: Dict[CellKey, Dict] = {}
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # dòng cuối dở dang của lần chạy bị ngắt
+                    self.cells[self.key(**record["params"])] = record
+
+    @staticmethod
+    def key(compare_source: str, type: str, end: str, data: str, num_days: int, select: Sequence[int],
+            empty: int, window: int, lookback: int, max_row: int) -> CellKey:
+        return (compare_source, type, end, data, num_days, tuple(select), empty, window, lookback, max_row)
+
+    def __contains__(self, key: CellKey) -> bool:
+        return key in self.cells
+
+    def __len__(self) -> int:
+        return len(self.cells)
+
+    def add(self, records: Iterable[Dict]) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            for record in records:
+                self.cells[self.key(**record["params"])] = record
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+
+
+def run_grid(history: HistoryFrame, grid: Dict[str, Sequence[int]], compare_sources: Sequence[str],
+             types: Sequence[str] = tuple(TYPES), select: Sequence[int] = (0, 1, 2),
+             num_days: int = NUM_DAYS, workers: int = 1, cache: Optional[GridCache] = None,
+             until: Optional[date] = None) -> pd.DataFrame:
+    """
+    Evaluate every grid cell against the backtest over the full history.
+
+    Các ô đã có trong ``cache`` không được tính lại. Mỗi việc gửi cho
+    process pool là một bộ (nguồn, loại, window, lookback, max_row) với mọi
+    ngưỡng còn thiếu, vì số ô rỗng dùng chung giữa các ngưỡng.
+
+    Args:
+        history: Bảng lịch sử đầy đủ
+        grid: Tên tham số (PARAMS) -> các giá trị cần thử
+        compare_sources: Nhãn nguồn so sánh ("GĐB", "Giải Nhất")
+        types: "TT" và/hoặc "ĐT"
+        select: Các mức được chơi mỗi ngày
+        num_days: Độ dài lát cắt như tab Mức Số
+        workers: Số process (> 1 dùng ProcessPoolExecutor)
+        cache: Kết quả đã lưu (mặc định trong GRID_DIR)
+        until: Chỉ dùng các kỳ tới ngày này (mặc định toàn bộ lịch sử)
+
+    Returns:
+        Bảng xếp hạng: mỗi ô một hàng (kèm ngày cuối ``end`` của dữ liệu), z giảm dần
+    """
+    cache = cache if cache is not None else GridCache()
+    if until is not None:
+        history = history.window(int(np.count_nonzero(history.dates > np.datetime64(until, "D"))))
+    select = tuple(sorted(select))
+    grid = {name: sorted(set(grid.get(name, DEFAULT_GRID[name]))) for name in PARAMS}
+
+    jobs, wanted = [], []
+    for compare in compare_sources:
+        aligned = aligned_frame(history, compare)
+        last2 = aligned.last2(COMPARE_SOURCES[compare])
+        offsets = list(range(1, len(aligned)))
+        end = str(aligned.dates[0]) if len(aligned) else ""
+        for source in types:
+            results = aligned.text(TYPES[source])
+            data = data_fingerprint(aligned, TYPES[source], COMPARE_SOURCES[compare])
+            for window, lookback, max_row in product(grid["window"], grid["lookback"], grid["max_row"]):
+                base = {"compare_source": compare, "type": source, "end": end, "data": data,
+                        "num_days": num_days, "select": list(select),
+                        "window": window, "lookback": lookback, "max_row": max_row}
+                keys = [cache.key(**base, empty=t) for t in grid["empty"]]
+                wanted.extend(keys)
+                missing = [t for t, key in zip(grid["empty"], keys) if key not in cache]
+                if missing:
+                    jobs.append((base, missing, (results, last2, offsets, missing, num_days,
+                                                 window, lookback, max_row, select)))
+
+    logging.info(f"Grid: {len(wanted)} ô, {len(wanted) - sum(len(m) for _, m, _ in jobs)} đã có, "
+                 f"{len(jobs)} việc cần tính")
+    if jobs:
+        args = list(zip(*(job for _, _, job in jobs)))
+        if workers > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                done = pool.map(_evaluate, *args)
+                for (base, missing, _), scores in zip(jobs, done):
+                    cache.add({"params": {**base, "empty": t}, "score": s} for t, s in zip(missing, scores))
+        else:
+            for (base, missing, _), scores in zip(jobs, map(_evaluate, *args)):
+                cache.add({"params": {**base, "empty": t}, "score": s} for t, s in zip(missing, scores))
+
+    rows = []
+    for key in wanted:
+        record = cache.cells[key]
+        params = {k: v for k, v in record["params"].items() if k not in ("select", "data")}
+        rows.append({**params, "select": ",".join(map(str, record["params"]["select"])), **record["score"]})
+    df = pd.DataFrame(rows)
+    return df.sort_values("z", ascending=False, na_position="last", kind="stable").reset_index(drop=True)
+
+
+def heatmap(ranked: pd.DataFrame, x: str = "empty", y: str = "window", metric: str = "z"):
+    """
+    Plotly heatmap of ``metric`` over two parameters, một ô con cho mỗi (nguồn so sánh, loại).
+
+    Các tham số còn lại được gộp bằng giá trị tốt nhất (max).
+    """
+    from plotly.subplots import make_subplots
+    import plotly.graph_objects as go
+
+    panels = list(ranked.groupby(["compare_source", "type"], sort=False))
+    fig = make_subplots(rows=1, cols=max(len(panels), 1),
+                        subplot_titles=[f"{c} · {t}" for (c, t), _ in panels])
+    for k, (_, part) in enumerate(panels, start=1):
+        table = part.pivot_table(index=y, columns=x, values=metric, aggfunc="max")
+        fig.add_trace(go.Heatmap(z=table.values, x=table.columns.astype(str), y=table.index.astype(str),
+                                 coloraxis="coloraxis"), row=1, col=k)
+        fig.update_xaxes(title_text=x, row=1, col=k)
+        fig.update_yaxes(title_text=y, row=1, col=k)
+    coloraxis = {"colorscale": "RdBu"}
+    if metric == "z":
+        coloraxis["cmid"] = 0   # z-score: 0 là đúng như ngẫu nhiên
+    fig.update_layout(coloraxis=coloraxis, title=f"{metric} theo {x} × {y}")
+    return fig
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Dò lưới tham số dàn lâu ra / backtest")
+    for name in PARAMS:
+        parser.add_argument(f"--{name.replace('_', '-')}", type=int_list,
+                            default=DEFAULT_GRID[name], help=f"mặc định {DEFAULT_GRID[name]}")
+    parser.add_argument("--compare", nargs="+", choices=list(COMPARE_SOURCES), default=["GĐB"])
+    parser.add_argument("--type", nargs="+", choices=list(TYPES), default=list(TYPES))
+    parser.add_argument("--levels", type=int_list, default=[0, 1, 2], help="các mức được chơi")
+    parser.add_argument("--num-days", type=int, default=NUM_DAYS)
+    parser.add_argument("--until", type=date.fromisoformat, help="chỉ dùng các kỳ tới ngày này (yyyy-mm-dd)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--db", help="kho SQLite (mặc định như app)")
+    parser.add_argument("--archive", default=ARCHIVE_PATH)
+    parser.add_argument("--cache-dir", default=GRID_DIR)
+    parser.add_argument("--top", type=int, default=20, help="số hàng in ra")
+    parser.add_argument("--heatmap", nargs=2, metavar=("X", "Y"), default=("empty", "window"),
+                        choices=PARAMS)
+    parser.add_argument("--out", default="reports")
+    args = parser.parse_args(argv)
+
+    store = DrawStore(args.db) if args.db else DrawStore()
+    history = refresh_archive(store, args.archive)
+    grid = {name: getattr(args, name) for name in PARAMS}
+    ranked = run_grid(history, grid, args.compare, args.type, args.levels, args.num_days,
+                      args.workers, GridCache(args.cache_dir), args.until)
+
+    os.makedirs(args.out, exist_ok=True)
+    table_path = os.path.join(args.out, "grid.csv")
+    ranked.to_csv(table_path, index=False)
+    print(ranked.head(args.top).to_string(index=False))
+    print(table_path)
+    try:
+        fig = heatmap(ranked, *args.heatmap)
+    except ImportError as e:
+        sys.exit(f"Không vẽ được heatmap: {e}")
+    html_path = os.path.join(args.out, "grid.html")
+    fig.write_html(html_path)
+    print(html_path)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
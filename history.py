@@ -0,0 +1,204 @@
+"""
+Lịch sử 4 nguồn dạng cột, căn theo ngày quay thưởng.
+
+Mỗi hàng là một ngày (mới nhất trước), mỗi nguồn một cột số nguyên, -1 khi
+nguồn không có kỳ ngày đó. Bảng được dựng một lần mỗi lần nạp dữ liệu;
+``window`` trả về khung nhìn (view) không sao chép, nên đổi offset không
+phải cắt lại danh sách hay dựng lại DataFrame.
+"""
+
+import hashlib
+from datetime import date
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from store import SOURCES, DrawStore, Row
+
+MISSING = -1
+
+# Số chữ số của mỗi nguồn; Điện Toán 123 gồm 3 số dài 1, 2, 3 chữ số
+WIDTHS = {"than_tai": 4, "xsmb": 5, "giai_nhat": 5}
+DT_WIDTHS = (1, 2, 3)
+
+DTYPES = {"dien_toan": np.int16, "than_tai": np.int16, "xsmb": np.int32, "giai_nhat": np.int32}
+
+
+def _readonly(arr: np.ndarray) -> np.ndarray:
+    arr.flags.writeable = False
+    return arr
+
+
+def _zfill(values: np.ndarray, width: int) -> np.ndarray:
+    """Số -> chuỗi ``width`` chữ số (có số 0 đứng đầu), "" khi thiếu; tính bằng số học mảng."""
+    values = np.asarray(values)
+    powers = 10 ** np.arange(width - 1, -1, -1, dtype=np.int64)
+    digits = (np.maximum(values, 0).astype(np.int64)[..., None] // powers % 10 + 48).astype(np.uint8)
+    text = np.ascontiguousarray(digits).view(f"S{width}")[..., 0].astype(f"U{width}")
+    return np.where(values >= 0, text, "")
+
+
+def date_labels(dates: np.ndarray) -> np.ndarray:
+    """Nhãn "Ngày dd/mm/yyyy" cho mảng datetime64[D], ghép theo ký tự không cần vòng lặp."""
+    iso = np.datetime_as_string(np.asarray(dates, dtype="datetime64[D]"), unit="D")
+    chars = np.ascontiguousarray(iso, dtype="U10").view("U1").reshape(-1, 10)
+    out = np.empty((len(chars), 15), dtype="U1")
+    out[:, :5] = list("Ngày ")
+    out[:, 5:7], out[:, 7], out[:, 8:10] = chars[:, 8:10], "/", chars[:, 5:7]
+    out[:, 10], out[:, 11:] = "/", chars[:, :4]
+    return out.view("U15")[:, 0].astype(object)
+
+
+class HistoryFrame:
+    """
+    Date-aligned columnar history of all sources.
+
+    Attributes:
+        dates: datetime64[D] array, mới nhất trước
+        labels: Chuỗi ngày hiển thị của mỗi hàng
+        values: source -> int array (Điện Toán là khối n × 3), -1 khi thiếu
+        version: Dấu vân tay của toàn bộ dữ liệu, dùng làm khóa cache; các
+            view giữ version của bảng gốc
+    """
+
+    def __init__(self, dates: np.ndarray, labels: np.ndarray, values: Dict[str, np.ndarray],
+                 text: Dict[str, np.ndarray], last2: Dict[str, np.ndarray],
+                 version: Optional[str] = None):
+        self.dates = dates
+        self.labels = labels
+        self.values = values
+        self._text = text
+        self._last2 = last2
+        self._complete: Dict[tuple, "HistoryFrame"] = {}
+        self.version = version if version is not None else self.fingerprint()
+
+    @classmethod
+    def from_rows(cls, rows: Dict[str, Sequence[Row]]) -> "HistoryFrame":
+        """
+        Join per-source draws on their date.
+
+        Args:
+            rows: source -> (date, label, value) rows như DrawStore.load
+        """
+        by_date: Dict[date, str] = {}
+        for source in SOURCES:
+            for d, label, _ in rows.get(source, ()):
+                by_date.setdefault(d, label)  # nhãn của nguồn đầu tiên có ngày đó
+        days = sorted(by_date, reverse=True)
+        index = {d: i for i, d in enumerate(days)}
+        n = len(days)
+
+        values = {}
+        for source in SOURCES:
+            shape = (n, len(DT_WIDTHS)) if source == "dien_toan" else (n,)
+            col = np.full(shape, MISSING, dtype=DTYPES[source])
+            for d, _, value in rows.get(source, ()):
+                if source == "dien_toan":
+                    col[index[d]] = [int(v) for v in value.split(",")]
+                else:
+                    col[index[d]] = int(value)
+            values[source] = col
+
+        dates = np.array(days, dtype="datetime64[D]")
+        labels = np.array([by_date[d] for d in days], dtype=object)
+        return cls.from_arrays(dates, values, labels)
+
+    @classmethod
+    def from_arrays(cls, dates: np.ndarray, values: Dict[str, np.ndarray],
+                    labels: Optional[np.ndarray] = None) -> "HistoryFrame":
+        """
+        Build a frame from date-aligned columns (mới nhất trước, -1 khi thiếu).
+
+        Args:
+            dates: datetime64[D] array
+            values: source -> int column, Điện Toán là khối n × 3 (có thể là
+                view theo bước nhảy, ví dụ một trường của mảng bản ghi)
+            labels: Chuỗi ngày hiển thị; mặc định "Ngày dd/mm/yyyy"
+        """
+        if labels is None:
+            labels = date_labels(dates)
+        cols, text, last2 = {}, {}, {}
+        for source in SOURCES:
+            # Không sao chép khi đã đúng kiểu: cột của file ánh xạ bộ nhớ giữ nguyên là view
+            col = _readonly(np.asarray(values[source], dtype=DTYPES[source]))
+            cols[source] = col
+            if source == "dien_toan":
+                parts = [_zfill(col[:, k], w) for k, w in enumerate(DT_WIDTHS)]
+                text[source] = _readonly(np.char.add(np.char.add(parts[0], parts[1]), parts[2]))
+            else:
+                text[source] = _readonly(_zfill(col, WIDTHS[source]))
+                last2[source] = _readonly(_zfill(np.where(col >= 0, col % 100, MISSING), 2))
+        return cls(_readonly(np.asarray(dates, dtype="datetime64[D]")), _readonly(np.asarray(labels, dtype=object)),
+                   cols, text, last2)
+
+    @classmethod
+    def from_store(cls, store: DrawStore, limit: Optional[int] = None) -> "HistoryFrame":
+        return cls.from_rows({s: store.load(s, limit) for s in SOURCES})
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def _take(self, index) -> "HistoryFrame":
+        return HistoryFrame(
+            self.dates[index], self.labels[index],
+            {s: v[index] for s, v in self.values.items()},
+            {s: t[index] for s, t in self._text.items()},
+            {s: t[index] for s, t in self._last2.items()},
+            self.version,
+        )
+
+    def fingerprint(self) -> str:
+        """Dấu vân tay nội dung các hàng này (bằng version của một bảng mới chỉ gồm chúng)."""
+        digest = hashlib.blake2b(self.dates.tobytes(), digest_size=8)
+        for source in SOURCES:
+            digest.update(self.values[source].tobytes())
+        return digest.hexdigest()
+
+    def window(self, offset: int, size: Optional[int] = None) -> "HistoryFrame":
+        """Hàng ``[offset, offset + size)`` dưới dạng view (không sao chép)."""
+        end = None if size is None else offset + size
+        return self._take(slice(offset, end))
+
+    def has(self, source: str) -> np.ndarray:
+        """Mặt nạ các hàng mà nguồn có kết quả."""
+        col = self.values[source]
+        return (col[:, 0] if col.ndim == 2 else col) >= 0
+
+    def complete(self, *sources: str) -> "HistoryFrame":
+        """
+        Rows where every given source has a draw.
+
+        Trả về chính bảng khi không thiếu ngày nào; kết quả được nhớ lại nên
+        chỉ lọc một lần cho mỗi tổ hợp nguồn.
+        """
+        key = tuple(sorted(sources))
+        if key not in self._complete:
+            mask = np.logical_and.reduce([self.has(s) for s in sources]) if sources else None
+            self._complete[key] = self if mask is None or mask.all() else self._take(mask)
+        return self._complete[key]
+
+    def text(self, source: str) -> np.ndarray:
+        """Kết quả dạng chuỗi ("1234", ĐT ghép "123456"), "" khi thiếu."""
+        return self._text[source]
+
+    def last2(self, source: str) -> np.ndarray:
+        """2 số cuối dạng chuỗi ("07"), "" khi thiếu."""
+        return self._last2[source]
+
+    def pair_codes(self, source: str) -> np.ndarray:
+        """2 số cuối dạng mã 0..99 (ĐT: của số thứ ba), -1 khi thiếu."""
+        col = self.values[source]
+        if col.ndim == 2:
+            col = col[:, -1]
+        return np.where(col >= 0, col % 100, MISSING)
+
+    def to_frame(self, source: str) -> pd.DataFrame:
+        """Bảng hiển thị các kỳ của một nguồn (bỏ các ngày nguồn không có)."""
+        rows = self.complete(source)
+        if source == "dien_toan":
+            cols = {"Ngày": rows.labels}
+            for k, w in enumerate(DT_WIDTHS):
+                cols[f"Số {k + 1}"] = _zfill(rows.values[source][:, k], w)
+            return pd.DataFrame(cols)
+        return pd.DataFrame({"Ngày": rows.labels, "Số": rows.text(source)})
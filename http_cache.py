@@ -0,0 +1,107 @@
+"""
+Bộ nhớ đệm phản hồi HTTP trên đĩa, dùng cho yêu cầu có điều kiện.
+
+Mỗi khóa (tên nguồn, hoặc URL) là một file JSON (URL, nội dung trang,
+ETag, Last-Modified, thời điểm tải). Lần tải sau cùng URL gửi
+``If-None-Match``/``If-Modified-Since``; trang nguồn trả 304 thì dùng lại
+nội dung đã lưu, không phải tải và giải mã lại. Khi mọi lần thử đều lỗi,
+bản đã lưu vẫn được dùng thay cho không có gì. Khóa theo nguồn nên đổi số
+kỳ trong URL chỉ thay bản lưu của nguồn đó; số file được giới hạn bởi
+``max_entries`` (bỏ file cũ nhất).
+
+File được ghi ra file tạm rồi đổi tên, nên người đọc (kể cả process khác)
+luôn thấy bản cũ hoặc bản mới trọn vẹn.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import Dict, Mapping, NamedTuple, Optional
+
+CACHE_DIR = os.environ.get(
+    "SIEUGA_HTTP_CACHE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "http")
+)
+MAX_ENTRIES = 32
+
+
+class Entry(NamedTuple):
+    """Một phản hồi đã lưu."""
+
+    url: str
+    text: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    fetched: float = 0.0        # time.time() lần cuối trang nguồn xác nhận nội dung
+    key: str = ""               # khóa lưu; rỗng ở file của bản cũ (khóa theo URL)
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Header cho yêu cầu có điều kiện (rỗng khi trang nguồn không gửi validator)."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class HttpCache:
+    """On-disk key -> Entry store with atomic writes, bounded to ``max_entries`` files."""
+
+    def __init__(self, folder: str = CACHE_DIR, max_entries: int = MAX_ENTRIES):
+        self.folder = folder
+        self.max_entries = max_entries
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.folder, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".json")
+
+    def get(self, key: str) -> Optional[Entry]:
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                data = json.load(f)
+            entry = Entry(**data)
+        except (OSError, ValueError, TypeError):
+            return None
+        if (entry.key or entry.url) != key:
+            return None
+        return entry._replace(key=key)
+
+    def _write(self, entry: Entry) -> Entry:
+        os.makedirs(self.folder, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.folder, suffix=".json.tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry._asdict(), f, ensure_ascii=False)
+            os.replace(tmp, self._path(entry.key))
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        self._evict()
+        return entry
+
+    def _evict(self) -> None:
+        """Bỏ các file ít được làm mới nhất khi vượt ``max_entries``."""
+        try:
+            files = [e for e in os.scandir(self.folder) if e.name.endswith(".json")]
+        except OSError:
+            return
+        if len(files) <= self.max_entries:
+            return
+        files.sort(key=lambda e: e.stat().st_mtime)
+        for e in files[:len(files) - self.max_entries]:
+            try:
+                os.unlink(e.path)
+            except OSError:
+                pass
+
+    def put(self, key: str, url: str, text: str, headers: Mapping[str, str]) -> Entry:
+        """Lưu phản hồi 200 của ``url`` dưới ``key`` cùng validator của nó."""
+        return self._write(Entry(url, text, headers.get("ETag"), headers.get("Last-Modified"), time.time(), key))
+
+    def touch(self, entry: Entry, headers: Mapping[str, str]) -> Entry:
+        """Ghi nhận phản hồi 304: giữ nội dung, cập nhật thời điểm và validator mới (nếu có)."""
+        return self._write(entry._replace(etag=headers.get("ETag") or entry.etag,
+                                          last_modified=headers.get("Last-Modified") or entry.last_modified,
+                                          fetched=time.time()))
+
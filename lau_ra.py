@@ -0,0 +1,134 @@
+"""
+Tính dàn lâu ra (số ô rỗng) cho mọi ngưỡng trong một lần duyệt.
+
+Số ô rỗng của mỗi hàng không phụ thuộc ngưỡng, nên chỉ cần tính một lần
+rồi lọc theo từng ngưỡng 1..10.
+"""
+
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from dan import Dan, from_matrix
+from frequency import pair_count_matrix, window_totals
+import perf
+
+WINDOW = 7          # Số kết quả gộp để lên dàn nuôi của mỗi hàng
+LOOKBACK = 28       # Số kỳ so sánh (K1..K28)
+MAX_ROW = 28        # Chỉ xét các hàng i <= 28
+MAX_THRESHOLD = 10
+
+
+def pair_codes(last2: Sequence[str]) -> np.ndarray:
+    """Mã 0..99 cho mỗi cặp so sánh, -1 nếu không hợp lệ."""
+    return np.array([int(c) if len(c) == 2 and c.isdigit() else -1 for c in last2],
+                    dtype=np.int64)
+
+
+def dan_matrix(results: Sequence[str], rows: int, window: int = WINDOW) -> np.ndarray:
+    """
+    Dàn nuôi of the first ``rows`` rows as a (rows × 100) boolean mask.
+
+    Row i gộp ``window`` kết quả từ i (cửa sổ bị kẹp ở cuối danh sách)
+    và lấy các cặp xuất hiện 1..window lần.
+    """
+    n = len(results)
+    starts = [i if i <= n - window else max(0, n - window) for i in range(rows)]
+    totals = window_totals(pair_count_matrix(results), starts, window)
+    return (totals >= 1) & (totals <= window)
+
+
+def hit_matrix(in_dan: np.ndarray, codes: np.ndarray, lookback: int = LOOKBACK) -> np.ndarray:
+    """
+    (rows × lookback) mask: ``hits[i, j]`` khi K(j+1) = codes[i - j - 1] nằm trong dàn hàng i.
+    """
+    rows = in_dan.shape[0]
+    src = np.arange(rows)[:, None] - np.arange(1, lookback + 1)[None, :]
+    valid = (src >= 0) & (src < len(codes))
+    c = np.full(src.shape, -1, dtype=np.int64)
+    c[valid] = codes[src[valid]]
+    row_idx = np.broadcast_to(np.arange(rows)[:, None], c.shape)
+    return (c >= 0) & in_dan[row_idx, np.maximum(c, 0)]
+
+
+def empty_counts(hits: np.ndarray, positions: np.ndarray) -> np.ndarray:
+    """
+    Số ô rỗng của mỗi hàng.
+
+    Args:
+        hits: Rows of :func:`hit_matrix` (số cột là số kỳ so sánh)
+        positions: Vị trí của hàng trong lát cắt đang xét; chỉ các K có
+            kết quả nằm trong lát cắt (j < position) được tính
+    """
+    positions = np.asarray(positions, dtype=np.int64)
+    lookback = hits.shape[1]
+    usable = hits & (np.arange(lookback)[None, :] < positions[:, None])
+    valid_k_range = np.minimum(positions + 1, lookback)
+    any_hit = usable.any(axis=1)
+    last_k_index = lookback - 1 - np.argmax(usable[:, ::-1], axis=1)
+    return np.where(any_hit, np.maximum(0, valid_k_range - 1 - last_k_index - 1), valid_k_range)
+
+
+def lau_ra_rows(results: Sequence[str], compare_last2: Sequence[str],
+                num_days: int) -> Tuple[List[Dan], np.ndarray]:
+    """
+    Compute the dàn nuôi and empty count of every row once.
+
+    Args:
+        results: Kết quả mới nhất trước (TT "1234" hoặc ĐT "123456")
+        compare_last2: 2 số cuối của nguồn so sánh (GĐB/G1), cùng thứ tự
+        num_days: Số hàng tối đa được xét
+
+    Returns:
+        Tuple of (dàn per row, empty count per row)
+    """
+    rows = min(num_days, len(results))
+    if rows == 0:
+        return [], np.zeros(0, dtype=np.int64)
+
+    in_dan = dan_matrix(results, rows)
+    dans = from_matrix(in_dan)
+    hits = hit_matrix(in_dan, pair_codes(compare_last2))
+    return dans, empty_counts(hits, np.arange(rows))
+
+
+def lau_ra_table(results: Sequence[str], compare_last2: Sequence[str], num_days: int,
+                 max_threshold: int = MAX_THRESHOLD) -> Dict[int, List[Tuple[str, Dan]]]:
+    """
+    Dàn lâu ra at every threshold 1..max_threshold.
+
+    Returns:
+        Dict threshold -> list of (kết quả, dàn nuôi) rows with empty count >= threshold
+    """
+    dans, empty = lau_ra_rows(results, compare_last2, num_days)
+    eligible = [i for i, dan in enumerate(dans) if i <= MAX_ROW and dan]
+    return {
+        t: [(results[i], dans[i]) for i in eligible if empty[i] >= t]
+        for t in range(1, max_threshold + 1)
+    }
+
+
+def calculate_lau_ra(results: Sequence[str], compare_last2: Sequence[str],
+                     empty_threshold: int, num_days: int) -> List[Tuple[str, Dan]]:
+    """Dàn lâu ra với một ngưỡng ô rỗng cố định."""
+    dans, empty = lau_ra_rows(results, compare_last2, num_days)
+    return [(results[i], dan) for i, dan in enumerate(dans)
+            if empty[i] >= empty_threshold and i <= MAX_ROW and dan]
+
+
+@perf.timed("lau_ra")
+def get_lau_ra_with_auto_reduce(results: Sequence[str], compare_last2: Sequence[str],
+                                initial_threshold: int, num_days: int):
+    """
+    Dàn lâu ra, tự động giảm ngưỡng cho tới khi có dàn (tối thiểu 1).
+
+    Returns:
+        Tuple of (lau_ra rows, actual threshold, threshold -> rows table)
+    """
+    table = lau_ra_table(results, compare_last2, num_days,
+                         max_threshold=max(MAX_THRESHOLD, initial_threshold))
+    threshold = initial_threshold
+    while not table.get(threshold) and threshold > 1:
+        threshold -= 1
+    perf.count("lau_ra.threshold_steps", initial_threshold - threshold)
+    return table.get(threshold, []), threshold, table
@@ -0,0 +1,78 @@
+"""
+Dàn nuôi nhị hợp tính theo mảng.
+
+Dàn nhị hợp của một kết quả chỉ phụ thuộc tập chữ số của nó, mà chỉ có
+2^10 tập như vậy, nên mọi dàn được tra từ bảng tính sẵn. Ma trận trúng
+(ngày × số kỳ so sánh) được tính một lần bằng broadcasting, nên tab Dàn
+Nuôi chạy được trên hàng nghìn ngày.
+"""
+
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from lau_ra import hit_matrix, pair_codes
+
+LOOKBACK = 21       # Số kỳ so sánh (K1..K21)
+UNSEEN_ROW = 28     # Chỉ gom dàn chưa ra ở các hàng i <= 28
+
+
+def _combo_table(include_duplicates: bool) -> np.ndarray:
+    """(1024 × 100) mask: hàng ``m`` là dàn nhị hợp của tập chữ số có bitmask ``m``."""
+    sets = np.arange(1 << 10)[:, None]
+    has = (sets >> np.arange(10)[None, :]) & 1 == 1            # (1024 × 10)
+    table = has[:, :, None] & has[:, None, :]                   # cặp ab với a, b thuộc tập
+    if not include_duplicates:
+        table &= ~np.eye(10, dtype=bool)[None, :, :]
+    return table.reshape(1 << 10, 100)
+
+
+COMBOS = {True: _combo_table(True), False: _combo_table(False)}
+
+
+def digit_masks(results: Sequence[str]) -> np.ndarray:
+    """Bitmask 10 bit của tập chữ số trong mỗi kết quả ("1123" -> {1, 2, 3})."""
+    arr = np.asarray(results, dtype="U")
+    if arr.size == 0:
+        return np.zeros(arr.shape, dtype=np.int64)
+    width = max(arr.dtype.itemsize // 4, 1)
+    chars = np.ascontiguousarray(arr, dtype=f"U{width}").view(np.uint32).reshape(len(arr), width)
+    digits = chars.astype(np.int64) - 48
+    valid = (digits >= 0) & (digits <= 9)
+    bits = np.where(valid, 1 << np.where(valid, digits, 0), 0)
+    return np.bitwise_or.reduce(bits, axis=1)
+
+
+def combo_matrix(results: Sequence[str], include_duplicates: bool = True) -> np.ndarray:
+    """(rows × 100) mask dàn nhị hợp của mỗi kết quả."""
+    return COMBOS[bool(include_duplicates)][digit_masks(results)]
+
+
+def dan_nuoi(results: Sequence[str], compare_last2: Sequence[str], include_duplicates: bool = True,
+             lookback: int = LOOKBACK, rows: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """
+    Dàn nuôi and its hits against the following draws, for every row at once.
+
+    Args:
+        results: Kết quả mới nhất trước (TT "1234" hoặc ĐT "123456")
+        compare_last2: 2 số cuối nguồn so sánh, cùng thứ tự
+        include_duplicates: Có lấy cặp kép (aa) hay không
+        lookback: Số kỳ so sánh K1..K``lookback``
+        rows: Số hàng (mặc định toàn bộ)
+
+    Returns:
+        Dict with ``combos`` (rows × 100 mask), ``codes`` (rows × lookback mã
+        cặp K, -1 nếu không có), ``hits`` (rows × lookback) và ``unseen``
+        (hàng i <= UNSEEN_ROW chưa trúng kỳ nào)
+    """
+    n = len(results) if rows is None else min(rows, len(results))
+    combos = combo_matrix(results[:n], include_duplicates)
+    codes = pair_codes(compare_last2)
+    hits = hit_matrix(combos, codes, lookback)
+
+    src = np.arange(n)[:, None] - np.arange(1, lookback + 1)[None, :]
+    valid = (src >= 0) & (src < len(codes))
+    k_codes = np.full(src.shape, -1, dtype=np.int64)
+    k_codes[valid] = codes[src[valid]]
+    unseen = ~hits.any(axis=1) & (np.arange(n) <= UNSEEN_ROW)
+    return {"combos": combos, "codes": k_codes, "hits": hits, "unseen": unseen}
@@ -0,0 +1,170 @@
+"""
+Bộ phân tích HTML nhanh bằng lxml cho các trang kết quả.
+
+Trang được đưa vào parser theo từng khúc; chỉ các khối kết quả
+(div.result_div, table#MainContent_dgv) được giữ lại để đọc. Mỗi khi một
+khối kết quả hoặc một thẻ cùng loại nằm ngoài khối đóng lại, nội dung của nó
+và mọi phần tử đã đóng trước nó (anh em của nó và của các tổ tiên) bị xóa.
+Cây trong bộ nhớ vì thế chỉ gồm khối đang đọc, chuỗi tổ tiên và phần trang
+chưa tới thẻ đó; riêng phần sau khối cuối cùng được giữ tới khi đọc xong.
+"""
+
+import time
+import tracemalloc
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple, Union
+
+from lxml import etree
+
+CHUNK_SIZE = 64 * 1024
+
+Content = Union[str, bytes, Iterable[Union[str, bytes]]]
+
+
+def _chunks(content: Content) -> Iterator[Union[str, bytes]]:
+    if isinstance(content, (str, bytes)):
+        for i in range(0, len(content), CHUNK_SIZE):
+            yield content[i:i + CHUNK_SIZE]
+    else:
+        yield from content
+
+
+def _free(elem) -> None:
+    """Xóa nội dung phần tử đã xử lý và mọi phần tử đã đóng phía trước nó (kể cả của tổ tiên)."""
+    elem.clear(keep_tail=True)
+    for node in (elem, *elem.iterancestors()):
+        parent = node.getparent()
+        while parent is not None and node.getprevious() is not None:
+            del parent[0]
+
+
+def iter_containers(content: Content, tag: str, match: Callable) -> Iterator:
+    """
+    Stream a page and yield each complete ``tag`` element accepted by ``match``.
+
+    The yielded element is only valid until the generator resumes; elements
+    outside any container are discarded as soon as they close.
+    """
+    parser = etree.HTMLPullParser(events=("start", "end"), tag=tag)
+    depth = 0  # số container đang mở
+    for chunk in _chunks(content):
+        parser.feed(chunk)
+        for event, elem in parser.read_events():
+            if event == "start":
+                if match(elem):
+                    depth += 1
+                continue
+            if match(elem):
+                depth -= 1
+                yield elem
+                _free(elem)
+            elif depth == 0:
+                _free(elem)
+    parser.close()
+    for event, elem in parser.read_events():
+        if event == "end" and match(elem):
+            yield elem
+
+
+def _text(elem) -> str:
+    return "".join(elem.itertext()).strip() if elem is not None else ""
+
+
+def _is_result_div(div_id: str) -> Callable:
+    def match(elem) -> bool:
+        return elem.get("id") == div_id and "result_div" in (elem.get("class") or "").split()
+    return match
+
+
+def parse_dien_toan(content: Content, total_days: int) -> List[Dict]:
+    """Điện Toán 123: [{"date", "dt_numbers": [3 số]}], mới nhất trước."""
+    data = []
+    for i, div in enumerate(iter_containers(content, "div", _is_result_div("result_123"))):
+        if i >= total_days:
+            break
+        date = _text(div.find(".//span[@id='result_date']"))
+        tbl = div.find(".//table[@id='result_tab_123']")
+        if date and tbl is not None:
+            row = tbl.find("tbody/tr")
+            if row is None:
+                row = tbl.find(".//tr")
+            cells = row.findall(".//td") if row is not None else []
+            if len(cells) == 3:
+                nums = [_text(c) for c in cells]
+                if all(n.isdigit() for n in nums):
+                    data.append({"date": date, "dt_numbers": nums})
+    return data
+
+
+def parse_than_tai(content: Content, total_days: int) -> List[Dict]:
+    """Thần Tài: [{"date", "tt_number"}], mới nhất trước."""
+    data = []
+    for i, div in enumerate(iter_containers(content, "div", _is_result_div("result_tt4"))):
+        if i >= total_days:
+            break
+        date = _text(div.find(".//span[@id='result_date']"))
+        tbl = div.find(".//table[@id='result_tab_tt4']")
+        if date and tbl is not None:
+            num = _text(tbl.find(".//td[@id='rs_0_0']"))
+            if num.isdigit() and len(num) == 4:
+                data.append({"date": date, "tt_number": num})
+    return data
+
+
+def _is_weekday_header(cells: List[str]) -> bool:
+    """Hàng tiêu đề T2..CN: mỗi cột của bảng là một thứ trong tuần."""
+    return len(cells) == 7 and ("CN" in cells[-1].upper() or "CHỦ" in cells[-1].upper())
+
+
+def parse_congcuxoso_dated(content: Content, total_days: int) -> List[Dict]:
+    """
+    Bảng tuần congcuxoso (ĐB/G1) kèm vị trí lịch của mỗi số, mới nhất trước.
+
+    Returns:
+        [{"number", "weekday", "days_back"}]: ``weekday`` là thứ (0 = thứ 2)
+        và ``days_back`` là số ngày tính lùi từ số mới nhất, cả hai None khi
+        bảng không xếp theo thứ trong tuần
+    """
+    for tbl in iter_containers(content, "table", lambda e: e.get("id") == "MainContent_dgv"):
+        rows = tbl.findall(".//tr")
+        if not rows:
+            return []
+        calendar = _is_weekday_header([_text(c) for c in rows[0]])
+        cells = []  # (ô thứ mấy trong bảng, thứ, số)
+        for r, row in enumerate(rows[1:]):  # Skip header
+            for col, cell in enumerate(row.findall(".//td")):
+                t = _text(cell)
+                if t and t != "-----" and t.replace(" ", "").isdigit():
+                    cells.append((r * 7 + col, col, t.replace(" ", "").zfill(5)))
+        cells.reverse()
+        newest = cells[0][0] if cells else 0
+        return [
+            {"number": num,
+             "weekday": col if calendar else None,
+             "days_back": newest - pos if calendar else None}
+            for pos, col, num in cells[:total_days]
+        ]
+    return []
+
+
+def parse_congcuxoso(content: Content, total_days: int) -> List[str]:
+    """Bảng tuần congcuxoso (ĐB/G1): các số 5 chữ số, mới nhất trước."""
+    return [d["number"] for d in parse_congcuxoso_dated(content, total_days)]
+
+
+def measure_parse(parse: Callable, *args) -> Tuple[object, Dict[str, float]]:
+    """
+    Run a parser and report its wall time and peak Python memory.
+
+    tracemalloc only sees Python allocations: it captures a BeautifulSoup
+    tree fully, and for lxml it captures the extracted data (libxml2's own
+    buffers stay bounded by the streaming above).
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = parse(*args)
+        seconds = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, {"seconds": seconds, "peak_bytes": peak}
@@ -0,0 +1,193 @@
+"""
+Đo thời gian từng giai đoạn và đếm sự kiện, chi phí gần bằng 0 khi tắt.
+
+Các đoạn cần đo được bọc bằng ``stage`` (hoặc decorator ``timed``) và sự
+kiện được đếm bằng ``count``::
+
+    with perf.stage("parse.Thần Tài"):
+        data = parse(text, total_days)
+    perf.count("result_cache.hit")
+
+Việc đo gắn với một lần chạy: ``begin_run`` đặt ``Recorder`` của người gọi
+vào một ContextVar, nên mỗi phiên Streamlit (giữ Recorder trong
+``st.session_state``) và mỗi lệnh CLI chỉ thấy số liệu của chính mình. Khi
+tắt (mặc định; bật bằng ``SIEUGA_PERF=1`` hoặc ``begin_run(enabled=True)``),
+``stage`` trả về một context manager rỗng dùng chung và ``count`` chỉ đọc
+ContextVar. Khi bật, số lần gọi, tổng và max thời gian được gộp theo tên cho
+lần chạy hiện tại và cộng dồn qua các lần chạy của cùng Recorder; ``end_run``
+ghi một dòng log JSON cho mỗi lần chạy (logger ``sieuga.perf``).
+
+Luồng mới không thừa hưởng ContextVar: việc chạy trong thread pool phải đi
+qua ``contextvars.copy_context().run`` để được đếm (xem data_fetcher); luồng
+nền như refresher không thuộc lần chạy nào nên không được đo.
+"""
+
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import nullcontext
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+import pandas as pd
+
+logger = logging.getLogger("sieuga.perf")
+
+ENABLED_BY_DEFAULT = os.environ.get("SIEUGA_PERF", "0") not in ("", "0", "false", "False")
+_NOOP = nullcontext()
+
+
+class Stat:
+    """Số lần gọi, tổng và max thời gian (giây) của một giai đoạn."""
+
+    __slots__ = ("calls", "seconds", "max")
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.calls += 1
+        self.seconds += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def to_dict(self) -> Dict[str, float]:
+        return {"calls": self.calls, "seconds": round(self.seconds, 6), "max": round(self.max, 6)}
+
+
+class Recorder:
+    """Gộp số liệu của lần chạy hiện tại và cộng dồn qua các lần chạy."""
+
+    def __init__(self):
+        self.run = 0
+        self.started = time.perf_counter()
+        self.stages: Dict[str, Stat] = {}
+        self.counters: Dict[str, int] = {}
+        self.total_stages: Dict[str, Stat] = {}
+        self.total_counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float) -> None:
+        with self._lock:
+            for stages in (self.stages, self.total_stages):
+                stat = stages.get(name)
+                if stat is None:
+                    stat = stages[name] = Stat()
+                stat.add(seconds)
+
+    def count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            for counters in (self.counters, self.total_counters):
+                counters[name] = counters.get(name, 0) + n
+
+    def new_run(self) -> None:
+        with self._lock:
+            self.run += 1
+            self.started = time.perf_counter()
+            self.stages, self.counters = {}, {}
+
+    def snapshot(self, total: bool = False) -> Dict[str, object]:
+        with self._lock:
+            stages = self.total_stages if total else self.stages
+            counters = self.total_counters if total else self.counters
+            return {
+                "run": self.run,
+                "seconds": round(time.perf_counter() - self.started, 6),
+                "stages": {name: stat.to_dict() for name, stat in stages.items()},
+                "counters": dict(counters),
+            }
+
+
+# Recorder của lần chạy hiện tại (None khi tắt đo)
+_current: ContextVar[Optional[Recorder]] = ContextVar("sieuga_perf", default=None)
+
+
+class _Stage:
+    __slots__ = ("name", "recorder", "start")
+
+    def __init__(self, name: str, recorder: Recorder):
+        self.name = name
+        self.recorder = recorder
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.recorder.add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def enabled() -> bool:
+    return _current.get() is not None
+
+
+def stage(name: str):
+    """Context manager đo thời gian giai đoạn ``name`` (rỗng khi tắt)."""
+    recorder = _current.get()
+    return _NOOP if recorder is None else _Stage(name, recorder)
+
+
+def timed(name: str):
+    """Decorator: đo mỗi lần gọi hàm như một giai đoạn ``name``."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            recorder = _current.get()
+            if recorder is None:
+                return func(*args, **kwargs)
+            with _Stage(name, recorder):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def count(name: str, n: int = 1) -> None:
+    """Cộng ``n`` vào bộ đếm ``name`` (không làm gì khi tắt)."""
+    recorder = _current.get()
+    if recorder is not None:
+        recorder.count(name, n)
+
+
+def begin_run(recorder: Optional[Recorder] = None, enabled: bool = ENABLED_BY_DEFAULT) -> Optional[Recorder]:
+    """
+    Bắt đầu một lần chạy mới (mỗi lần rerun Streamlit, mỗi lệnh CLI) trong context hiện tại.
+
+    Args:
+        recorder: Recorder cộng dồn của người gọi (vd. của phiên); mặc định tạo mới
+        enabled: False để tắt đo cho lần chạy này
+    """
+    if not enabled:
+        _current.set(None)
+        return None
+    recorder = recorder if recorder is not None else Recorder()
+    recorder.new_run()
+    _current.set(recorder)
+    return recorder
+
+
+def end_run(**extra) -> Optional[Dict[str, object]]:
+    """Ghi một dòng log JSON cho lần chạy hiện tại; trả về snapshot (None khi tắt)."""
+    recorder = _current.get()
+    if recorder is None:
+        return None
+    snap = {"event": "run", **recorder.snapshot(), **extra}
+    logger.info(json.dumps(snap, ensure_ascii=False))
+    return snap
+
+
+def stage_table(total: bool = False) -> pd.DataFrame:
+    """Bảng các giai đoạn (lâu nhất trước): Giai đoạn, Lần, Tổng (ms), Max (ms)."""
+    recorder = _current.get()
+    stages = recorder.snapshot(total)["stages"] if recorder is not None else {}
+    df = pd.DataFrame(
+        [{"Giai đoạn": name, "Lần": s["calls"], "Tổng (ms)": s["seconds"] * 1000, "Max (ms)": s["max"] * 1000}
+         for name, s in stages.items()],
+        columns=["Giai đoạn", "Lần", "Tổng (ms)", "Max (ms)"],
+    )
+    return df.sort_values("Tổng (ms)", ascending=False, kind="stable").reset_index(drop=True)
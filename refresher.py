@@ -0,0 +1,108 @@
+"""
+Làm mới lịch sử ở nền: trả dữ liệu đang có ngay, cập nhật trong một luồng riêng.
+
+Trước đây khi cache 1 giờ hết hạn, người dùng kế tiếp phải chờ cả 4 trang
+nguồn tải xong. ``HistoryRefresher.get`` chỉ chờ trang nguồn khi chưa có
+bản nào trên đĩa (kho SQLite và file lưu trữ đều rỗng); nếu không nó trả
+bảng lịch sử hiện có, và khi bảng đã cũ hơn ``max_age`` thì khởi động một
+luồng nền nạp kỳ mới (yêu cầu có điều kiện, xem http_cache.py), dựng lại
+file lưu trữ rồi thay bảng mới vào bằng một phép gán dưới khóa. Lần chạy
+lại sau của app sẽ thấy dữ liệu mới; ``history.version`` đổi nên các kết
+quả phân tích cũ tự hết hiệu lực.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+import perf
+from archive import ARCHIVE_PATH, refresh as refresh_archive
+from history import HistoryFrame
+from store import SOURCES, DrawStore, ingest
+
+MAX_AGE = 3600      # giây
+
+
+class HistoryRefresher:
+    """
+    Stale-while-revalidate holder of the current HistoryFrame.
+
+    Attributes:
+        timings: Thời gian tải từng nguồn của lần làm mới gần nhất
+        error: Lỗi của lần làm mới gần nhất (None khi thành công)
+        updated: time.time() của lần làm mới gần nhất (0 khi chưa làm mới)
+    """
+
+    def __init__(self, store: DrawStore, path: str = ARCHIVE_PATH, total_days: int = 100,
+                 max_age: float = MAX_AGE):
+        self.store = store
+        self.path = path
+        self.total_days = total_days
+        self.max_age = max_age
+        self.timings: Dict[str, float] = {}
+        self.error: Optional[Exception] = None
+        self.updated = 0.0
+        self._frame: Optional[HistoryFrame] = None
+        self._lock = threading.Lock()           # bảo vệ _frame, _thread và các thuộc tính trên
+        self._refresh_lock = threading.Lock()   # mỗi lúc chỉ một lượt nạp
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def refreshing(self) -> bool:
+        thread = self._thread
+        return thread is not None and thread.is_alive()
+
+    def _local(self) -> Optional[HistoryFrame]:
+        """Bảng lịch sử từ đĩa, không cần mạng; None khi chưa có kỳ nào."""
+        if os.path.exists(self.path) or any(self.store.count(s) for s in SOURCES):
+            return refresh_archive(self.store, self.path)
+        return None
+
+    def get(self) -> HistoryFrame:
+        """
+        Current history; never waits on the source sites once any copy exists.
+
+        Lần gọi đầu đọc bản trên đĩa; chỉ khi chưa có bản nào mới nạp đồng bộ.
+        """
+        with self._lock:
+            frame = self._frame
+        if frame is None:
+            with self._refresh_lock:
+                frame = self._frame
+                if frame is None:
+                    frame = self._local()
+                    with self._lock:
+                        self._frame = frame
+            if frame is None:
+                return self.refresh()
+        self._revalidate_if_stale()
+        return frame
+
+    def _revalidate_if_stale(self) -> None:
+        with self._lock:
+            if time.time() - self.updated < self.max_age or self.refreshing:
+                return
+            self._thread = threading.Thread(target=self.refresh, name="history-refresh", daemon=True)
+            self._thread.start()
+
+    @perf.timed("history_refresh")
+    def refresh(self) -> HistoryFrame:
+        """Nạp kỳ mới, dựng lại file lưu trữ khi có kỳ mới rồi thay bảng hiện tại."""
+        with self._refresh_lock:
+            try:
+                added, timings = ingest(self.store, self.total_days)
+                error = None
+            except Exception as e:
+                # Vẫn dùng dữ liệu đã lưu khi trang nguồn lỗi
+                logging.error(f"History refresh failed: {e}")
+                added, timings, error = {}, {}, e
+            frame = self._frame
+            if frame is None or any(added.values()):
+                frame = refresh_archive(self.store, self.path, rebuild=any(added.values()))
+            with self._lock:
+                self._frame, self.timings, self.error = frame, timings, error
+                self.updated = time.time()
+            logging.info(f"History refreshed: {len(frame)} days, added {added}")
+            return frame
@@ -0,0 +1,350 @@
+"""
+Máy chủ HTTP phát lại cục bộ thay cho ketqua04.net và congcuxoso.com.
+
+Mỗi mẫu URL trong data_fetcher được phục vụ từ một trang đã lưu trong thư
+mục fixtures (ghi bằng lệnh ``record``); nguồn chưa có trang lưu sẽ dùng
+trang tổng hợp cùng cấu trúc HTML. Độ trễ, lỗi HTTP và treo quá thời gian
+chờ có thể được cấu hình để thử đường thử lại của ``fetch_page``. Mỗi trang
+kèm ETag theo nội dung; yêu cầu ``If-None-Match`` khớp được trả 304.
+
+Chạy app với máy chủ phát lại::
+
+    python replay_server.py serve --port 8765 --latency 0.05
+    SIEUGA_KETQUA_BASE=http://127.0.0.1:8765 \\
+    SIEUGA_CONGCUXOSO_BASE=http://127.0.0.1:8765 streamlit run streamlit_app.py
+"""
+
+import argparse
+import hashlib
+import logging
+import os
+import random
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+import data_fetcher
+
+FIXTURE_DIR = os.environ.get(
+    "SIEUGA_FIXTURES", os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+)
+
+# Mẫu đường dẫn -> nguồn; khớp các URL trong data_fetcher
+ROUTES = (
+    (re.compile(r"^/so-ket-qua-dien-toan-123/(\d+)/?$"), "dien_toan"),
+    (re.compile(r"^/so-ket-qua-than-tai/(\d+)/?$"), "than_tai"),
+    (re.compile(r"^/MienBac/DacBiet/PhoiCauDacBiet/PhoiCauTuan5So\.aspx$"), "xsmb"),
+    (re.compile(r"^/MienBac/GiaiNhat/PhoiCauGiaiNhat/PhoiCauTuan5So\.aspx$"), "giai_nhat"),
+)
+
+SYNTHETIC_DAYS = 400
+
+
+@dataclass
+class ReplayConfig:
+    """
+    Fault injection settings.
+
+    ``fail_first`` requests to each path fail deterministically (``fail_mode``
+    "timeout" hangs for ``hang`` seconds, "error" answers ``error_status``);
+    after that each request fails at random with ``error_rate``/``timeout_rate``.
+    """
+
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    timeout_rate: float = 0.0
+    error_status: int = 503
+    hang: float = 2.0
+    fail_first: int = 0
+    fail_mode: str = "timeout"
+    seed: int = 0
+
+
+def fixture_path(source: str, fixture_dir: str = FIXTURE_DIR) -> str:
+    return os.path.join(fixture_dir, f"{source}.html")
+
+
+def route(path: str) -> Optional[str]:
+    """Nguồn ứng với một đường dẫn, None nếu không khớp mẫu nào."""
+    path = path.split("?", 1)[0]
+    for pattern, source in ROUTES:
+        if pattern.match(path):
+            return source
+    return None
+
+
+# --- TRANG TỔNG HỢP ---
+def _date_label(d: date) -> str:
+    return "Ngày " + d.strftime("%d/%m/%Y")
+
+
+def synthetic_pages(days: int = SYNTHETIC_DAYS, seed: int = 12345,
+                    today: Optional[date] = None) -> Dict[str, str]:
+    """
+    Deterministic pages with the same markup the parsers read, newest draw first.
+
+    Dùng khi chưa ghi trang thật; kết quả giống nhau giữa các lần chạy nên
+    báo cáo benchmark so sánh được.
+    """
+    rng = random.Random(seed)
+    today = today or date.today()
+    dates = [today - timedelta(days=i) for i in range(days)]
+    dt = [[str(rng.randint(0, 9)), str(rng.randint(0, 99)).zfill(2), str(rng.randint(0, 999)).zfill(3)]
+          for _ in range(days)]
+    tt = [str(rng.randint(0, 9999)).zfill(4) for _ in range(days)]
+    db = [str(rng.randint(0, 99999)).zfill(5) for _ in range(days)]
+    g1 = [str(rng.randint(0, 99999)).zfill(5) for _ in range(days)]
+
+    dien_toan = ["<html><body><div id='wrap'>"]
+    than_tai = ["<html><body><div id='wrap'>"]
+    for d, nums, num in zip(dates, dt, tt):
+        dien_toan.append(
+            f'<div class="result_div" id="result_123"><span id="result_date">{_date_label(d)}</span>'
+            f'<table id="result_tab_123"><tbody><tr>' + "".join(f"<td>{x}</td>" for x in nums)
+            + "</tr></tbody></table></div>")
+        than_tai.append(
+            f'<div class="result_div" id="result_tt4"><span id="result_date">{_date_label(d)}</span>'
+            f'<table id="result_tab_tt4"><tbody><tr><td id="rs_0_0">{num}</td></tr></tbody></table></div>')
+    dien_toan.append("</div></body></html>")
+    than_tai.append("</div></body></html>")
+
+    def week_table(nums: List[str]) -> str:
+        # Bảng tuần theo lịch (cột T2..CN): cũ nhất ở trên, ô trống là "-----"
+        seq = ["-----"] * dates[-1].weekday() + nums[::-1]
+        rows = ["<tr>" + "".join(f"<th>{d}</th>" for d in ("T2", "T3", "T4", "T5", "T6", "T7", "CN")) + "</tr>"]
+        for k in range(0, len(seq), 7):
+            week = seq[k:k + 7] + ["-----"] * (7 - len(seq[k:k + 7]))
+            rows.append("<tr>" + "".join(f"<td>{c}</td>" for c in week) + "</tr>")
+        return "<html><body><table id='MainContent_dgv'>" + "".join(rows) + "</table></body></html>"
+
+    return {
+        "dien_toan": "".join(dien_toan),
+        "than_tai": "".join(than_tai),
+        "xsmb": week_table(db),
+        "giai_nhat": week_table(g1),
+    }
+
+
+def load_pages(fixture_dir: str = FIXTURE_DIR) -> Dict[str, str]:
+    """Trang đã lưu của từng nguồn, bổ sung trang tổng hợp cho nguồn còn thiếu."""
+    pages, missing = {}, []
+    for source in data_fetcher.SOURCES:
+        path = fixture_path(source, fixture_dir)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                pages[source] = f.read()
+        else:
+            missing.append(source)
+    if missing:
+        logging.info(f"No recorded fixture for {', '.join(missing)}; serving synthetic pages")
+        synthetic = synthetic_pages()
+        pages.update({s: synthetic[s] for s in missing})
+    return pages
+
+
+def record(fixture_dir: str = FIXTURE_DIR, days: int = 100) -> Dict[str, int]:
+    """Tải trang thật của từng nguồn và lưu làm fixture. Returns source -> bytes saved."""
+    urls = {
+        "dien_toan": data_fetcher.DIEN_TOAN_URL.format(days=days),
+        "than_tai": data_fetcher.THAN_TAI_URL.format(days=days),
+        "xsmb": data_fetcher.XSMB_URL,
+        "giai_nhat": data_fetcher.GIAI_NHAT_URL,
+    }
+    os.makedirs(fixture_dir, exist_ok=True)
+    saved = {}
+    for source, url in urls.items():
+        text = data_fetcher.fetch_page(url)
+        if text is None:
+            logging.error(f"Could not record {source} from {url}")
+            continue
+        with open(fixture_path(source, fixture_dir), "w", encoding="utf-8") as f:
+            f.write(text)
+        saved[source] = len(text.encode("utf-8"))
+    return saved
+
+
+# --- MÁY CHỦ ---
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive như máy chủ thật
+    disable_nagle_algorithm = True
+    server: "_Server"
+
+    def do_GET(self):
+        srv = self.server
+        source = route(self.path)
+        n = srv.replay.hit(self.path)
+        cfg = srv.replay.config
+        if source is None:
+            return self._send(404, b"not found")
+
+        if cfg.latency or cfg.jitter:
+            time.sleep(cfg.latency + srv.replay.random(cfg.jitter))
+        if n <= cfg.fail_first:
+            mode = cfg.fail_mode
+        elif srv.replay.chance(cfg.timeout_rate):
+            mode = "timeout"
+        elif srv.replay.chance(cfg.error_rate):
+            mode = "error"
+        else:
+            mode = None
+
+        if mode == "timeout":
+            time.sleep(cfg.hang)
+            self.close_connection = True
+            return
+        if mode == "error":
+            return self._send(cfg.error_status, b"injected error")
+        body = srv.replay.pages[source].encode("utf-8")
+        etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+        if self.headers.get("If-None-Match") == etag:
+            return self._send(304, b"", etag)
+        self._send(200, body, etag)
+
+    def _send(self, status: int, body: bytes, etag: Optional[str] = None) -> None:
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            if etag:
+                self.send_header("ETag", etag)
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+    def log_message(self, format, *args):
+        logging.debug("replay: " + format % args)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    replay: "ReplayServer"
+
+
+class ReplayServer:
+    """
+    Local stand-in for the result sites, usable as a context manager.
+
+    ``hits`` đếm số yêu cầu theo đường dẫn, để kiểm tra số lần thử lại.
+    """
+
+    def __init__(self, pages: Optional[Dict[str, str]] = None, config: Optional[ReplayConfig] = None,
+                 host: str = "127.0.0.1", port: int = 0):
+        self.pages = pages if pages is not None else load_pages()
+        self.config = config or ReplayConfig()
+        self.hits: Counter = Counter()
+        self._lock = threading.Lock()
+        self._rng = random.Random(self.config.seed)
+        self._httpd = _Server((host, port), _Handler)
+        self._httpd.replay = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def hit(self, path: str) -> int:
+        with self._lock:
+            self.hits[path] += 1
+            return self.hits[path]
+
+    def chance(self, rate: float) -> bool:
+        with self._lock:
+            return rate > 0 and self._rng.random() < rate
+
+    def random(self, scale: float) -> float:
+        with self._lock:
+            return self._rng.random() * scale if scale else 0.0
+
+    def reset(self, config: Optional[ReplayConfig] = None) -> None:
+        """Xóa bộ đếm và (tùy chọn) đổi cấu hình lỗi."""
+        with self._lock:
+            self.hits.clear()
+            if config is not None:
+                self.config = config
+                self._rng = random.Random(config.seed)
+
+    def start(self) -> "ReplayServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="replay", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "ReplayServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def point_fetcher(base_url: str) -> Dict[str, str]:
+    """
+    Redirect data_fetcher's URLs to ``base_url``.
+
+    Returns:
+        The previous URL settings, to pass to :func:`restore_fetcher`
+    """
+    names = ("DIEN_TOAN_URL", "THAN_TAI_URL", "XSMB_URL", "GIAI_NHAT_URL")
+    previous = {name: getattr(data_fetcher, name) for name in names}
+    for name, url in previous.items():
+        path = "/" + url.split("://", 1)[1].split("/", 1)[1]
+        setattr(data_fetcher, name, base_url.rstrip("/") + path)
+    return previous
+
+
+def restore_fetcher(previous: Dict[str, str]) -> None:
+    for name, url in previous.items():
+        setattr(data_fetcher, name, url)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Máy chủ phát lại trang kết quả")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    rec = sub.add_parser("record", help="tải và lưu trang thật làm fixture")
+    rec.add_argument("--fixtures", default=FIXTURE_DIR)
+    rec.add_argument("--days", type=int, default=100)
+
+    serve = sub.add_parser("serve", help="phục vụ fixture trên cổng cục bộ")
+    serve.add_argument("--fixtures", default=FIXTURE_DIR)
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.add_argument("--latency", type=float, default=0.0)
+    serve.add_argument("--jitter", type=float, default=0.0)
+    serve.add_argument("--error-rate", type=float, default=0.0)
+    serve.add_argument("--timeout-rate", type=float, default=0.0)
+    serve.add_argument("--hang", type=float, default=15.0)
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        for source, size in record(args.fixtures, args.days).items():
+            print(f"{source}: {size} bytes -> {fixture_path(source, args.fixtures)}")
+        return
+
+    config = ReplayConfig(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                          timeout_rate=args.timeout_rate, hang=args.hang)
+    server = ReplayServer(load_pages(args.fixtures), config, args.host, args.port)
+    print(f"Serving on {server.base_url}")
+    print(f"  SIEUGA_KETQUA_BASE={server.base_url} SIEUGA_CONGCUXOSO_BASE={server.base_url}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Bộ nhớ đệm kết quả phân tích theo tham số, giới hạn kích thước (LRU).
+
+Mỗi lần tương tác Streamlit chạy lại toàn bộ script; với cache này các
+phân tích nặng (dàn nuôi, lâu ra, backtest) chỉ được tính lại khi dữ liệu
+hoặc tham số của chính nó thay đổi, còn tick một mức chỉ vẽ lại giao diện.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Optional, Tuple
+
+import perf
+
+
+class AnalysisKey(NamedTuple):
+    """
+    Cache key of one analysis result.
+
+    Tham số không ảnh hưởng tới một phân tích được để None, nên ví dụ đổi
+    "Loại kết quả" không làm mất kết quả lâu ra đã tính.
+    """
+
+    analysis: str
+    version: str
+    offset: Optional[int]
+    compare_source: str
+    result_type: Optional[str] = None
+    include_duplicates: Optional[bool] = None
+    empty_tt: Optional[int] = None
+    empty_dt: Optional[int] = None
+    horizon: Optional[int] = None
+    levels: Optional[Tuple[int, ...]] = None
+    null: Optional[str] = None
+    query: Optional[str] = None
+    since: Optional[str] = None
+
+
+class _Flight:
+    """Một lần tính đang chạy: người chờ nhận cùng giá trị hoặc cùng lỗi."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class ResultCache:
+    """
+    Thread-safe bounded mapping with least-recently-used eviction.
+
+    Nhiều luồng cùng trượt một khóa trong ``get_or_compute`` chỉ tính một
+    lần: các luồng sau chờ và dùng kết quả (hoặc lỗi) của luồng đầu.
+    """
+
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._computing: Dict[Hashable, _Flight] = {}
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                perf.count("result_cache.hit")
+                return self._data[key]
+            self.misses += 1
+            perf.count("result_cache.miss")
+            return default
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Return the cached value for ``key``, computing and storing it on a miss.
+
+        Giá trị trả về được dùng chung giữa các lần gọi: không được sửa tại chỗ.
+        """
+        missing = object()
+        value = self.get(key, missing)
+        if value is not missing:
+            return value
+        with self._lock:
+            value = self._data.get(key, missing)    # luồng khác vừa tính xong
+            if value is not missing:
+                return value
+            flight = self._computing.get(key)
+            owner = flight is None
+            if owner:
+                flight = self._computing[key] = _Flight()
+        if not owner:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = compute()
+            self.put(key, flight.value)
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            # Chỉ luồng tạo ra lần tính này gỡ nó (và chỉ khi chưa bị thay)
+            with self._lock:
+                if self._computing.get(key) is flight:
+                    del self._computing[key]
+            flight.done.set()
+        return flight.value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def info(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._data), "maxsize": self.maxsize}
@@ -0,0 +1,124 @@
+"""
+Kiểm định ý nghĩa hit rate của backtest bằng mô phỏng Monte Carlo.
+
+Một dàn 40 số trúng 40% số ngày dù kết quả hoàn toàn ngẫu nhiên, nên hit
+rate thô chưa nói lên điều gì. Mỗi ngày test có một mặt nạ 100 cặp "được
+chơi" (ví dụ các cặp thuộc những mức đã chọn); chiến lược được chấm lại trên
+hàng nghìn chuỗi kết quả giả, tính theo khối mảng:
+
+- ``uniform``: mỗi ngày một cặp 00..99 ngẫu nhiên đều
+- ``shuffle``: hoán vị các kết quả thật giữa các ngày test (giữ phân phối
+  cặp thật, phá quan hệ giữa dàn và ngày)
+
+p-value một phía là tỉ lệ chuỗi giả trúng ít nhất bằng thực tế.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from scipy import stats
+
+NULLS = ("uniform", "shuffle")
+SIMULATIONS = 10_000
+BLOCK = 1024        # Số chuỗi giả mỗi khối (giới hạn bộ nhớ, đơn vị chia cho process pool)
+
+
+def level_mask(levels: np.ndarray, select: Iterable[int]) -> np.ndarray:
+    """(days × 100) mặt nạ các cặp có mức thuộc ``select``; hàng -1 không chơi cặp nào."""
+    levels = np.asarray(levels)
+    return np.isin(levels, [lvl for lvl in select if lvl >= 0]) & (levels >= 0)
+
+
+def _simulate_block(played: np.ndarray, codes: np.ndarray, size: int, null: str,
+                    seed: np.random.SeedSequence) -> np.ndarray:
+    """Số ngày trúng của ``size`` chuỗi giả."""
+    rng = np.random.default_rng(seed)
+    days = len(codes)
+    if null == "uniform":
+        draws = rng.integers(0, 100, size=(size, days), dtype=np.int32)
+    else:
+        draws = rng.permuted(np.broadcast_to(codes.astype(np.int32), (size, days)), axis=1)
+    flat = played.ravel()
+    return flat[draws + (np.arange(days, dtype=np.int32) * 100)[None, :]].sum(axis=1)
+
+
+def simulate(played: np.ndarray, codes: np.ndarray, simulations: int = SIMULATIONS,
+             null: str = "uniform", seed: int = 0, workers: int = 1) -> np.ndarray:
+    """
+    Hit counts of the strategy on ``simulations`` random draw histories.
+
+    Các chuỗi giả được chia thành khối ``BLOCK`` với seed riêng, nên kết
+    quả chỉ phụ thuộc ``seed`` chứ không phụ thuộc số process.
+
+    Args:
+        played: (days × 100) mặt nạ cặp được chơi mỗi ngày
+        codes: Mã cặp thật của mỗi ngày (0..99)
+        simulations: Số chuỗi giả
+        null: "uniform" hoặc "shuffle"
+        seed: Seed gốc
+        workers: Số process (> 1 dùng ProcessPoolExecutor)
+    """
+    if null not in NULLS:
+        raise ValueError(f"null must be one of {NULLS}, got {null!r}")
+    played = np.ascontiguousarray(played, dtype=bool)
+    codes = np.asarray(codes, dtype=np.int64)
+    sizes = [min(BLOCK, simulations - start) for start in range(0, simulations, BLOCK)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = ([played] * len(sizes), [codes] * len(sizes), sizes, [null] * len(sizes), seeds)
+    if workers > 1 and len(sizes) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            blocks: List[np.ndarray] = list(pool.map(_simulate_block, *args))
+    else:
+        blocks = list(map(_simulate_block, *args))
+    return np.concatenate(blocks) if blocks else np.zeros(0, dtype=np.int64)
+
+
+def significance(played: np.ndarray, codes: np.ndarray, simulations: int = SIMULATIONS,
+                 null: str = "uniform", seed: int = 0, workers: int = 1,
+                 confidence: float = 0.95) -> Dict[str, Optional[float]]:
+    """
+    Observed vs. random hit rate of a strategy over the tested days.
+
+    Ngày không có kết quả so sánh (mã -1) hoặc không chơi cặp nào bị bỏ qua.
+
+    Args:
+        played: (days × 100) mặt nạ cặp được chơi mỗi ngày
+        codes: Mã cặp thật của mỗi ngày, -1 khi không có
+        simulations, null, seed, workers: Như :func:`simulate`
+        confidence: Mức tin cậy của khoảng Wilson cho hit rate thực tế
+
+    Returns:
+        Dict with days, hits, hit_rate, expected (hit rate kỳ vọng khi ngẫu
+        nhiên), sim_mean, p_value, ci_low, ci_high (tỉ lệ 0..1); các tỉ lệ là
+        None khi không có ngày nào
+    """
+    played = np.asarray(played, dtype=bool)
+    codes = np.asarray(codes, dtype=np.int64)
+    keep = (codes >= 0) & played.any(axis=1)
+    played, codes = played[keep], codes[keep]
+    days = len(codes)
+    hits = int(played[np.arange(days), codes].sum())
+    out: Dict[str, Optional[float]] = {"days": days, "hits": hits, "simulations": simulations, "null": null,
+                                       "hit_rate": None, "expected": None, "sim_mean": None,
+                                       "p_value": None, "ci_low": None, "ci_high": None}
+    if days == 0:
+        return out
+
+    if null == "uniform":
+        expected = played.sum() / (100 * days)
+    else:
+        # Trung bình trên mọi hoán vị: ngày d gặp kết quả của ngày e với xác suất 1/days
+        expected = played[:, codes].sum() / days ** 2
+    sims = simulate(played, codes, simulations, null, seed, workers)
+    ci = stats.binomtest(hits, days).proportion_ci(confidence, method="wilson")
+    out.update({
+        "hit_rate": hits / days,
+        "expected": float(expected),
+        "sim_mean": float(sims.mean()) / days if len(sims) else None,
+        # +1 ở tử và mẫu: p-value Monte Carlo không bao giờ bằng 0
+        "p_value": (int((sims >= hits).sum()) + 1) / (len(sims) + 1),
+        "ci_low": float(ci.low),
+        "ci_high": float(ci.high),
+    })
+    return out
@@ -0,0 +1,299 @@
+"""
+Lưu trữ lịch sử kết quả cục bộ (SQLite), nạp thêm từng phần.
+
+Mỗi kỳ được lưu theo (nguồn, ngày). Khi nạp chỉ tải các kỳ mới hơn ngày
+đã có, nên app đọc lịch sử từ đĩa mà không phụ thuộc các trang nguồn, và
+lịch sử được tích lũy dài hơn những gì trang web hiển thị. Kỳ có ngày đáng
+tin (ghi trên trang, hoặc bảng tuần ĐB/G1 đã đối chiếu với ngày Điện Toán)
+được ghi đè lên bản đã lưu, nên một kỳ từng bị gán sai ngày sẽ được sửa ở
+lần nạp sau.
+"""
+
+import logging
+import os
+import re
+import sqlite3
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import data_fetcher
+
+DB_PATH = os.environ.get(
+    "SIEUGA_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "draws.sqlite3")
+)
+
+SOURCES = ("dien_toan", "than_tai", "xsmb", "giai_nhat")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS draws (
+    source    TEXT NOT NULL,
+    draw_date TEXT NOT NULL,   -- yyyy-mm-dd
+    label     TEXT NOT NULL,   -- chuỗi ngày hiển thị gốc của trang nguồn
+    value     TEXT NOT NULL,   -- "1234", "12345" hoặc "1,23,456" (Điện Toán)
+    PRIMARY KEY (source, draw_date)
+)
+"""
+
+_DATE_RE = re.compile(r"(\d{1,2})[/-](\d{1,2})[/-](\d{4})")
+
+Row = Tuple[date, str, str]
+
+# Đối chiếu ngày của bảng tuần ĐB/G1 với ngày Điện Toán
+ANCHOR_SLACK = 1    # ngày; kỳ mới nhất của hai trang lệch nhau tối đa chừng này
+MIN_OVERLAP = 7     # số ngày chung tối thiểu để đối chiếu
+
+
+def parse_draw_date(text: str) -> Optional[date]:
+    """Đọc ngày dd/mm/yyyy trong chuỗi ngày của trang nguồn."""
+    m = _DATE_RE.search(text or "")
+    if not m:
+        return None
+    try:
+        return date(int(m.group(3)), int(m.group(2)), int(m.group(1)))
+    except ValueError:
+        return None
+
+
+class DrawStore:
+    """SQLite-backed draw history keyed by (source, date)."""
+
+    def __init__(self, path: str = DB_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # Mỗi thao tác một kết nối: an toàn khi nhiều phiên Streamlit chạy song song.
+        # "with conn" chỉ commit/rollback giao dịch, nên kết nối được đóng riêng ở đây
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def last_date(self, source: str) -> Optional[date]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT MAX(draw_date) FROM draws WHERE source = ?", (source,)).fetchone()
+        return date.fromisoformat(row[0]) if row and row[0] else None
+
+    def add(self, source: str, rows: Iterable[Row]) -> int:
+        """Insert draws, keeping any row already stored for the same date. Returns rows added."""
+        data = [(source, d.isoformat(), label, value) for d, label, value in rows]
+        with self._connect() as conn:
+            before = conn.total_changes
+            conn.executemany("INSERT OR IGNORE INTO draws VALUES (?, ?, ?, ?)", data)
+            return conn.total_changes - before
+
+    def upsert(self, source: str, rows: Iterable[Row], span: Optional[Tuple[date, date]] = None) -> int:
+        """
+        Insert draws of a trusted date, overwriting what is stored for the same date.
+
+        Args:
+            source: Nguồn
+            rows: Các kỳ có ngày đáng tin
+            span: (ngày đầu, ngày cuối) mà ``rows`` phủ kín: các kỳ đã lưu
+                trong khoảng này nhưng không có trong ``rows`` (gán sai ngày
+                trước đây) bị xóa
+
+        Returns:
+            Số kỳ được thêm, sửa hoặc xóa
+        """
+        data = [(source, d.isoformat(), label, value) for d, label, value in rows]
+        with self._connect() as conn:
+            before = conn.total_changes
+            if span is not None:
+                stored = conn.execute("SELECT draw_date FROM draws WHERE source = ? AND draw_date BETWEEN ? AND ?",
+                                      (source, span[0].isoformat(), span[1].isoformat())).fetchall()
+                stale = {d for d, in stored} - {row[1] for row in data}
+                conn.executemany("DELETE FROM draws WHERE source = ? AND draw_date = ?",
+                                 [(source, d) for d in sorted(stale)])
+            conn.executemany(
+                "INSERT INTO draws VALUES (?, ?, ?, ?) ON CONFLICT (source, draw_date) DO UPDATE SET "
+                "label = excluded.label, value = excluded.value "
+                "WHERE label <> excluded.label OR value <> excluded.value", data)
+            return conn.total_changes - before
+
+    def load(self, source: str, limit: Optional[int] = None) -> List[Row]:
+        """Các kỳ của một nguồn, mới nhất trước."""
+        sql = "SELECT draw_date, label, value FROM draws WHERE source = ? ORDER BY draw_date DESC"
+        params: tuple = (source,)
+        if limit is not None:
+            sql += " LIMIT ?"
+            params += (limit,)
+        with self._connect() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [(date.fromisoformat(d), label, value) for d, label, value in rows]
+
+    def count(self, source: str) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM draws WHERE source = ?", (source,)).fetchone()[0]
+
+
+def _newer(rows: Iterable[Row], last: Optional[date]) -> List[Row]:
+    return [r for r in rows if last is None or r[0] > last]
+
+
+def _days_to_fetch(last: Optional[date], today: date, total_days: int) -> int:
+    """Số kỳ cần tải: toàn bộ khi chưa có dữ liệu, nếu không chỉ từ ngày đã lưu tới hôm nay."""
+    if last is None:
+        return total_days
+    return max(1, min(total_days, (today - last).days))
+
+
+def _dated(raw: Iterable[Tuple[str, str]], source: str) -> List[Row]:
+    rows = []
+    for label, value in raw:
+        d = parse_draw_date(label)
+        if d is None:
+            logging.warning(f"Skipping {source} draw with unreadable date {label!r}")
+            continue
+        rows.append((d, label, value))
+    return rows
+
+
+def _label(d: date) -> str:
+    return d.strftime("Ngày %d/%m/%Y")
+
+
+def _calendar_dated(draws: List[Dict], known: List[date], today: date) -> Optional[List[Row]]:
+    """
+    Date weekly-table draws by their calendar position, checked against known draw dates.
+
+    ``known`` là ngày các kỳ Điện Toán (ghi trên trang, cùng lịch quay với
+    ĐB/G1). Số mới nhất thuộc ngày có đúng thứ của ô chứa nó trong khoảng
+    ANCHOR_SLACK ngày quanh kỳ ``known`` mới nhất (hai trang cập nhật lệch
+    giờ nhau); các số khác lùi ``days_back`` ngày từ đó. Ngày suy ra chỉ
+    được nhận khi trùng khớp với ``known`` trong khoảng chung: mọi ô có số
+    là ngày có quay và mọi ngày có quay là ô có số (ngày nghỉ như Tết là ô
+    trống ở cả hai).
+
+    Returns:
+        Các kỳ kèm ngày, hoặc None khi thứ của ô không khớp ngày nào (ví dụ
+        trang bảng tuần chậm cập nhật) hay lịch quay không trùng
+    """
+    if not known:
+        return None
+    latest, oldest_known = max(known), min(known)
+    candidates = [latest + timedelta(days=k) for k in range(-ANCHOR_SLACK, ANCHOR_SLACK + 1)]
+    anchors = [d for d in candidates if d <= today and d.weekday() == draws[0]["weekday"]]
+    if not anchors:
+        return None
+    newest = anchors[0]
+    dates = [newest - timedelta(days=draw["days_back"]) for draw in draws]
+    # Khoảng cả hai bên cùng biết
+    first, last = max(dates[-1], oldest_known), min(newest, latest)
+    covered = {d for d in dates if first <= d <= last}
+    expected = {d for d in known if first <= d <= last}
+    if len(covered) < min(MIN_OVERLAP, len(dates)) or covered != expected:
+        return None
+    return [(d, _label(d), draw["number"]) for d, draw in zip(dates, draws)]
+
+
+def ingest(store: DrawStore, total_days: int = 100,
+           today: Optional[date] = None) -> Tuple[Dict[str, int], Dict[str, float]]:
+    """
+    Fetch and store only the draws newer than what the store already has.
+
+    Các nguồn cần cập nhật được tải song song trong một lượt.
+
+    Args:
+        store: Kho lưu trữ
+        total_days: Số kỳ tối đa tải khi nguồn chưa có dữ liệu
+        today: Ngày hiện tại (mặc định hôm nay)
+
+    Returns:
+        Tuple of (source -> number of draws added or corrected, source -> fetch seconds)
+    """
+    today = today or datetime.now().date()
+    added = {s: 0 for s in SOURCES}
+    last = {s: store.last_date(s) for s in SOURCES}
+    stale = [s for s in SOURCES if last[s] is None or last[s] < today]
+    if not stale:
+        return added, {}
+
+    days = {s: _days_to_fetch(last[s], today, total_days) for s in stale}
+    # Trang congcuxoso có kích thước cố định; ngày của chúng lấy từ Điện Toán
+    for s in ("xsmb", "giai_nhat"):
+        if s in days:
+            days[s] = total_days
+    fetched, timings = data_fetcher.fetch_all(days)
+
+    # Ngày ghi trên trang là đáng tin: ghi đè kỳ đã lưu cùng ngày
+    if "dien_toan" in fetched:
+        raw = [(d["date"], ",".join(d["dt_numbers"])) for d in fetched["dien_toan"]]
+        added["dien_toan"] = store.upsert("dien_toan", _dated(raw, "dien_toan"))
+
+    if "than_tai" in fetched:
+        raw = [(d["date"], d["tt_number"]) for d in fetched["than_tai"]]
+        added["than_tai"] = store.upsert("than_tai", _dated(raw, "than_tai"))
+
+    # Trang congcuxoso không ghi ngày: dùng vị trí lịch (thứ trong tuần) của
+    # bảng tuần khi nó khớp với ngày Điện Toán, và ghi đè cả khoảng bảng phủ;
+    # bảng theo lịch mà không khớp thì bỏ qua lượt này. Bảng không theo lịch
+    # thì mượn ngày Điện Toán theo vị trí như trước, hoặc lùi từng ngày từ
+    # hôm nay nếu chưa có Điện Toán; các ngày đoán này chỉ thêm kỳ mới,
+    # không ghi đè
+    dt_rows = store.load("dien_toan", limit=total_days)
+    for source in ("xsmb", "giai_nhat"):
+        if source not in fetched:
+            continue
+        draws = fetched[source]
+        if draws and draws[0]["weekday"] is not None:
+            rows = _calendar_dated(draws, [d for d, _, _ in dt_rows], today)
+            if rows is None:
+                logging.warning(f"Skipping {source}: weekly table does not line up with Điện Toán dates")
+            else:
+                added[source] = store.upsert(source, rows, span=(rows[-1][0], rows[0][0]))
+            continue
+        if dt_rows:
+            rows = [(d, label, draw["number"]) for (d, label, _), draw in zip(dt_rows, draws)]
+        else:
+            rows = []
+            for i, draw in enumerate(draws[:total_days]):
+                d = today - timedelta(days=i)
+                rows.append((d, _label(d), draw["number"]))
+        added[source] = store.add(source, _newer(rows, last[source]))
+
+    return added, timings
+
+
+def backfill(store: DrawStore, days: int) -> Dict[str, int]:
+    """
+    Store a long history of Điện Toán and Thần Tài (nhiều năm, vài nghìn kỳ).
+
+    Kỳ đã có được ghi đè bằng bản trên trang, nên có thể chạy lại bất cứ lúc nào.
+    ĐB/G1 không được tải lùi (xem data_fetcher.fetch_history).
+
+    Returns:
+        Source -> number of draws added or corrected
+    """
+    fetched = data_fetcher.fetch_history(days)
+    raw = {
+        "dien_toan": [(d["date"], ",".join(d["dt_numbers"])) for d in fetched.get("dien_toan", [])],
+        "than_tai": [(d["date"], d["tt_number"]) for d in fetched.get("than_tai", [])],
+    }
+    return {source: store.upsert(source, _dated(rows, source)) for source, rows in raw.items()}
+
+
+def load_history(store: DrawStore, limit: Optional[int] = None) -> Dict[str, List[Dict]]:
+    """
+    Lịch sử của cả 4 nguồn theo định dạng app dùng (mới nhất trước).
+
+    Returns:
+        Dict with keys dien_toan ({"date", "numbers"}), than_tai, xsmb,
+        giai_nhat ({"date", "number"})
+    """
+    history = {}
+    for source in SOURCES:
+        rows = store.load(source, limit)
+        if source == "dien_toan":
+            history[source] = [{"date": label, "numbers": value.split(",")} for _, label, value in rows]
+        else:
+            history[source] = [{"date": label, "number": value} for _, label, value in rows]
+    return history
@@ -0,0 +1,171 @@
+"""
+Bản thuần Python của app gốc (streamlit_app.py trước khi vector hóa), làm chuẩn so sánh.
+
+Giữ nguyên thuật toán gốc; chỉ đổi đầu vào từ các dict của trang nguồn sang
+danh sách chuỗi (kết quả, số của nguồn so sánh).
+"""
+
+from itertools import combinations
+
+
+def jn(rng, rnd):
+    """Các cặp xuất hiện đúng ``rnd`` lần trong các chuỗi ``rng``."""
+    counts = {f"{i:02d}": 0 for i in range(100)}
+    for s in rng:
+        for pair in counts:
+            counts[pair] += s.count(pair)
+    return ",".join(pair for pair, cnt in counts.items() if cnt == rnd)
+
+
+def calculate_muc_so(dan_nuoi_list):
+    frequency = {f"{i:02d}": 0 for i in range(100)}
+    for dan in dan_nuoi_list:
+        for num in dan.split():
+            frequency[num] = frequency.get(num, 0) + 1
+    levels = {}
+    for num, freq in frequency.items():
+        levels.setdefault(freq, []).append(num)
+    return {level: sorted(levels[level], key=int) for level in sorted(levels, reverse=True)}
+
+
+def muc_levels(dan_list):
+    """Các mức của tab Mức Số: [(mức, chuỗi cặp)] cho mức 0..len(dan_list)."""
+    out = []
+    for level in range(len(dan_list) + 1):
+        pairs = jn(dan_list, level)
+        if pairs:
+            out.append((level, pairs))
+    return out
+
+
+def calculate_lau_ra(results, compare_numbers, empty_threshold, num_days=50):
+    n = len(results)
+    lau_ra_list = []
+    for i in range(min(num_days, n)):
+        start = i if i <= n - 7 else max(0, n - 7)
+        window = results[start:start + 7]
+        pairs = []
+        for m in [jn(window, k) for k in range(1, 8)]:
+            if m:
+                pairs.extend(m.split(","))
+        pairs_sorted = sorted(set(pairs), key=int)
+        dan_nuoi = " ".join(pairs_sorted)
+        C = [(compare_numbers[i - k][-2:] if i >= k and i - k < len(compare_numbers) else "")
+             for k in range(1, 29)]
+        K = [c if c in pairs_sorted else "" for c in C]
+        last_k_index = -1
+        valid_k_range = min(i + 1, len(K))
+        for j in range(valid_k_range - 1, -1, -1):
+            if K[j] != "":
+                last_k_index = j
+                break
+        empty_count = valid_k_range if last_k_index == -1 else max(0, (valid_k_range - 1 - last_k_index) - 1)
+        if empty_count >= empty_threshold and i <= 28 and dan_nuoi:
+            lau_ra_list.append((results[i], dan_nuoi))
+    return lau_ra_list
+
+
+def get_lau_ra_with_auto_reduce(results, compare_numbers, threshold, num_days=50):
+    lau_ra = calculate_lau_ra(results, compare_numbers, threshold, num_days)
+    while not lau_ra and threshold > 1:
+        threshold -= 1
+        lau_ra = calculate_lau_ra(results, compare_numbers, threshold, num_days)
+    return lau_ra, threshold
+
+
+def backtest(tt_results, dt_results, compare_numbers, dates, offset, horizon, empty_tt, empty_dt,
+             num_days=50):
+    """Bảng test ngược: [(Lùi, Ngày KQ, số so sánh, TT Mức, ĐT Mức)]."""
+    def muc_for_offset(results, threshold, back):
+        lau_ra, _ = get_lau_ra_with_auto_reduce(results[back:back + num_days],
+                                                compare_numbers[back:back + num_days], threshold, num_days)
+        if not lau_ra:
+            return []
+        return [(level, set(pairs.split(","))) for level, pairs in muc_levels([d for _, d in lau_ra])]
+
+    rows = []
+    base_label = "" if offset == 0 else f"Lùi {offset}+"
+    for i in range(1, horizon + 1):
+        back = offset + i
+        prev = back - 1
+        result_num = compare_numbers[prev][-2:].zfill(2) if prev < len(compare_numbers) else "-"
+        hits = []
+        for levels in (muc_for_offset(tt_results, empty_tt, back), muc_for_offset(dt_results, empty_dt, back)):
+            hits.append(next((f"M{level}" for level, pairs in levels if result_num in pairs), "-"))
+        rows.append((f"{base_label}{i}" if base_label else f"Lùi {i}",
+                     dates[prev] if prev < len(dates) else f"N-{prev}", result_num, *hits))
+    return rows
+
+
+BO_FALLBACK = "44"
+
+
+def bo(pair, bo_dict):
+    pair = pair.zfill(2)
+    if pair in bo_dict:
+        return pair
+    return next((key for key, vals in bo_dict.items() if pair in vals), BO_FALLBACK)
+
+
+def kep(pair):
+    pair = pair.zfill(2)
+    if pair in {"07", "70", "14", "41", "29", "92", "36", "63", "58", "85"}:
+        return "K.AM"
+    if pair in {"00", "55", "11", "66", "22", "77", "33", "88", "44", "99"}:
+        return "K.BANG"
+    if pair in {"05", "50", "16", "61", "27", "72", "38", "83", "49", "94"}:
+        return "K.LECH"
+    if pair in {"01", "10", "12", "21", "23", "32", "34", "43", "45", "54", "56", "65", "67", "76", "78", "87",
+                "89", "98", "09", "90"}:
+        return "S.KEP"
+    return "-"
+
+
+def group_of(pair, groups, default):
+    """hieu()/zodiac() gốc: nhóm đầu tiên của ``groups`` chứa cặp."""
+    pair = pair.zfill(2)
+    return next((g for g, lst in groups.items() if pair in lst), default)
+
+
+def tong_dan(tong):
+    return ",".join(f"{i:02d}" for i in range(100) if (i // 10 + i % 10) % 10 == int(tong))
+
+
+def lag(last2, group_of):
+    """Tab Thống Kê gốc: nhóm -> vị trí lần ra gần nhất trong ``last2`` (mới nhất trước)."""
+    return {g: next(i for i, n in enumerate(last2) if group_of(n) == g) for g in {group_of(n) for n in last2}}
+
+
+def dan_nuoi(results, compare_numbers, include_duplicates, num_days=50, lookback=21):
+    """Bảng tab Dàn Nuôi: [(KQ, dàn, hit, K1-K5)] và mức số từ dàn chưa ra."""
+    rows, chua_ra = [], []
+    for i in range(min(len(results), num_days)):
+        digits = list(results[i])
+        combos = {a + b for a in digits for b in digits if include_duplicates or a != b}
+        C = [(compare_numbers[i - k][-2:] if i >= k and i - k < len(compare_numbers) else "")
+             for k in range(1, lookback + 1)]
+        K = [c if c in combos else "" for c in C]
+        if i <= 28 and all(x == "" for x in K):
+            chua_ra.append(" ".join(sorted(combos)))
+        rows.append((results[i], " ".join(sorted(combos)), "✅" if any(K) else "❌", " | ".join(K[:5])))
+    return rows, (calculate_muc_so(chua_ra) if chua_ra else {})
+
+
+def lay_dan_cham(chuoi_cham):
+    res = []
+    for i in range(100):
+        pair = f"{i:02d}"
+        for c in chuoi_cham:
+            if c in pair:
+                res.append(pair)
+                break
+    return sorted(set(res))
+
+
+def lay_nhi_hop(bet_digits, digits_2_dong):
+    unique_digits = sorted(set(digits_2_dong))
+    nh = []
+    for a, b in combinations(unique_digits, 2):
+        if a in bet_digits or b in bet_digits:
+            nh += [a + b, b + a]
+    return sorted(set(nh))
@@ -0,0 +1,57 @@
+"""Kho phân tích dùng chung: kết quả như engine, tính một lần, giữ KEEP phiên bản."""
+
+import contextvars
+
+import numpy as np
+
+import perf
+from analysis_store import AnalysisStore, SharedAnalyses
+from conftest import store_rows
+from engine import aligned_frame, dan_nuoi_table, gap_index, lo_gan
+from history import HistoryFrame
+from store import SOURCES
+
+
+def _frame(draws, skip=()):
+    return HistoryFrame.from_rows({s: store_rows(draws, s, skip) for s in SOURCES})
+
+
+def test_results_match_the_engine_and_are_shared(history):
+    store = AnalysisStore(history)
+    df, levels = store.dan_nuoi(3, "Giải Nhất", "Thần tài", False)
+    expected_df, expected_levels = dan_nuoi_table(aligned_frame(history, "Giải Nhất").window(3, 50),
+                                                  "Thần tài", "Giải Nhất", False)
+    assert df.equals(expected_df) and levels == expected_levels
+    assert store.dan_nuoi(3, "Giải Nhất", "Thần tài", False)[0] is df
+    assert store.thong_ke("GĐB").summary("bo").equals(gap_index(history, "GĐB").summary("bo"))
+    assert store.aligned_rows("Giải Nhất") == len(history) - 3
+
+
+def test_keeps_the_newest_versions(draws):
+    shared = SharedAnalyses(warm=False)
+    frames = [_frame(draws, range(days)) for days in (2, 1, 0)]
+    stores = [shared.get(f) for f in frames]
+    assert shared.get(frames[2]) is stores[2]
+    assert shared.find(frames[0].version) is None
+    assert [shared.find(f.version) for f in frames[1:]] == stores[1:]
+
+
+def test_lo_gan_continues_from_the_previous_version(draws):
+    shared = SharedAnalyses(warm=False)
+    shared.get(_frame(draws, range(3))).lo_gan("ĐB")
+    full = _frame(draws)
+    store = shared.get(full)
+
+    def run():
+        perf.begin_run(enabled=True)
+        index = store.lo_gan("ĐB")
+        return index, perf.end_run()
+    index, snap = contextvars.copy_context().run(run)
+    assert snap["counters"]["lo_gan.incremental"] == 1
+    rebuilt = lo_gan(full, "ĐB")
+    assert index.n == rebuilt.n
+    assert index.summary("pair").equals(rebuilt.summary("pair"))
+    assert np.array_equal(index.gap_counts("pair"), rebuilt.gap_counts("pair"))
+
+    store.release()
+    assert not store._lo_gan_base
@@ -0,0 +1,175 @@
+"""Máy chủ JSON: kết quả như engine, 304 theo ETag và các lỗi 400 / 404 / 409."""
+
+import numpy as np
+import pytest
+import requests
+
+from api_server import ApiClient, ApiError, ApiServer
+from conftest import store_rows
+from dan_query import QueryError, compile_query
+from engine import NUM_DAYS, aligned_frame, backtest_report, dan_nuoi_table, gap_index, lo_gan
+from history import HistoryFrame
+from store import SOURCES
+
+
+class StubRefresher:
+    """Thay HistoryRefresher: trả bảng lịch sử có sẵn, đổi bảng khi test gọi ``swap``."""
+
+    def __init__(self, history: HistoryFrame):
+        self.history = history
+        self.updated = 0.0
+        self.refreshing = False
+
+    def get(self) -> HistoryFrame:
+        return self.history
+
+
+@pytest.fixture
+def server(history):
+    with ApiServer(StubRefresher(history), port=0) as srv:
+        yield srv
+
+
+@pytest.fixture
+def client(server):
+    return ApiClient(server.base_url)
+
+
+def get(server, path, **headers):
+    return requests.get(server.base_url + path, headers=headers, timeout=30)
+
+
+def test_results_match_the_engine(history, client):
+    view = aligned_frame(history, "GĐB").window(2, NUM_DAYS)
+    df, levels = dan_nuoi_table(view, "Điện toán", "GĐB", False)
+    remote_df, remote_levels = client.dan_nuoi(2, "GĐB", "Điện toán", False)
+    assert remote_df.equals(df) and remote_levels == levels
+
+    expected = backtest_report(aligned_frame(history, "Giải Nhất"), "Giải Nhất", 0, 10, 4, 6)
+    assert all(a.equals(b) for a, b in zip(client.backtest(0, "Giải Nhất", 10, 4, 6), expected))
+    assert client.aligned_rows("Giải Nhất") == len(history) - 3
+
+    remote = client.history()
+    assert remote.version == history.version
+    assert list(remote.labels) == list(history.labels)
+    assert all(np.array_equal(remote.values[s], history.values[s]) for s in SOURCES)
+
+
+def test_if_none_match_returns_304(server, client):
+    first = get(server, "/backtest?offset=1&compare=G%C4%90B")
+    assert first.status_code == 200 and first.headers["Cache-Control"] == "no-cache"
+    etag = first.headers["ETag"]
+    again = get(server, "/backtest?offset=1&compare=G%C4%90B", **{"If-None-Match": etag})
+    assert again.status_code == 304 and again.content == b"" and again.headers["ETag"] == etag
+    assert get(server, "/backtest?offset=2", **{"If-None-Match": etag}).status_code == 200
+
+    # Client dùng lại bản đã giải mã khi máy chủ trả 304
+    value = client.thong_ke("GĐB")
+    assert client.thong_ke("GĐB") is value
+
+
+@pytest.mark.parametrize("path,message", [
+    ("/backtest?offset=x", "offset phải là số nguyên, nhận 'x'"),
+    ("/backtest?offset=-1", "offset phải trong khoảng 0..∞, nhận -1"),
+    ("/muc-so?compare=XX", "compare phải là một trong ['GĐB', 'Giải Nhất'], nhận 'XX'"),
+    ("/dan-nuoi?include_duplicates=maybe", "include_duplicates phải là true/false, nhận 'maybe'"),
+    ("/significance?levels=1,a", "levels phải là danh sách số nguyên, nhận '1,a'"),
+    ("/dan-query?q=%20", "q không được để trống"),
+])
+def test_bad_parameters_return_400(server, path, message):
+    r = get(server, path)
+    assert r.status_code == 400
+    assert r.json() == {"error": message}
+
+
+def test_bad_query_returns_400_with_the_parser_message(server):
+    with pytest.raises(QueryError) as err:
+        compile_query("bo 99")
+    r = get(server, "/dan-query?q=bo%2099")
+    assert r.status_code == 400
+    assert r.json() == {"error": str(err.value)}
+
+
+def test_unknown_path_returns_404(server):
+    r = get(server, "/khong-co")
+    assert r.status_code == 404
+    assert r.json()["error"].startswith("Không có đường dẫn /khong-co; dùng một trong ['/aligned', ")
+
+
+def test_client_errors(client):
+    with pytest.raises(ApiError) as err:
+        client.backtest(-1, "GĐB", 10, 4, 4)
+    assert err.value.status == 400 and err.value.message == "offset phải trong khoảng 0..∞, nhận -1"
+
+    with pytest.raises(QueryError) as err:
+        client.dan_query("GĐB", "bo 01 )")
+    assert str(err.value) == "Thừa ')' (vị trí 7)"
+    assert client.dan_query("GĐB", "so 12")["size"] == 1
+
+
+def test_pinned_version_until_it_is_dropped(draws, history, server, client):
+    refresher = server.analyses.refresher
+    pinned = client.pinned(history.version)
+    assert pinned.aligned_rows("GĐB") == len(history)
+
+    def newer(days):
+        return HistoryFrame.from_rows({s: store_rows(draws, s, range(days)) for s in SOURCES})
+
+    # Một lần làm mới: bản cũ vẫn được giữ (SharedAnalyses.KEEP = 2)
+    refresher.history = newer(1)
+    assert client.status()["version"] == refresher.history.version
+    assert pinned.aligned_rows("Giải Nhất") == len(history) - 3
+    assert client.aligned_rows("GĐB") == len(history) - 1
+
+    # Hai lần: bản cũ bị bỏ, yêu cầu gắn phiên bản đó nhận 409
+    refresher.history = newer(2)
+    client.aligned_rows("GĐB")
+    with pytest.raises(ApiError) as err:
+        pinned.dan_query("GĐB", "so 12")
+    assert err.value.status == 409
+    assert history.version in err.value.message
+
+
+def test_remote_gap_index_matches_the_engine(history, client):
+    for remote, index in ((client.thong_ke("Giải Nhất"), gap_index(history, "Giải Nhất")),
+                          (client.lo_gan("TT"), lo_gan(history, "TT"))):
+        assert remote.n == index.n and list(remote.tables) == list(index.tables)
+        for name, table in index.tables.items():
+            assert np.array_equal(remote.tables[name], table)
+            assert remote.summary(name).equals(index.summary(name))
+            assert np.array_equal(remote.gap_counts(name), index.gap_counts(name))
+
+
+def test_history_sends_only_new_draws(draws, server, client):
+    def frame(skip=(), edit=None):
+        rows = {s: store_rows(draws, s, skip) for s in SOURCES}
+        if edit is not None:
+            d, label, _ = rows["xsmb"][edit]
+            rows["xsmb"][edit] = (d, label, "00000")
+        return HistoryFrame.from_rows(rows)
+
+    sizes, send = [], client.session.get
+
+    def sized_get(*args, **kwargs):
+        response = send(*args, **kwargs)
+        sizes.append(len(response.content))
+        return response
+    client.session.get = sized_get
+
+    older, full = frame(skip=range(3)), frame()
+    server.analyses.refresher.history = older
+    assert client.history().version == older.version
+    server.analyses.refresher.history = full
+    remote = client.history()
+    assert remote.version == full.version and len(remote) == len(full)
+    assert all(np.array_equal(remote.values[s], full.values[s]) for s in SOURCES)
+    assert list(remote.labels) == list(full.labels)
+    assert sizes[1] < sizes[0] / 10
+
+    # Không đổi: phần thêm rỗng, giữ nguyên bảng
+    assert client.history() is remote
+    # Một kỳ cũ bị sửa: máy chủ gửi lại cả bảng
+    edited = frame(edit=50)
+    server.analyses.refresher.history = edited
+    assert client.history().version == edited.version
+    assert sizes[-1] > sizes[0]
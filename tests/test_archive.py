@@ -0,0 +1,68 @@
+"""File lưu trữ .npy: ghi/đọc lại, ánh xạ bộ nhớ và dựng lại từ kho."""
+
+import numpy as np
+import pytest
+
+from archive import from_records, info, load_frame, read_archive, refresh, to_records, write_archive
+from conftest import store_rows
+from store import SOURCES, DrawStore
+
+
+def _same_frame(a, b):
+    assert a.version == b.version
+    assert list(a.labels) == list(b.labels)
+    assert np.array_equal(a.dates, b.dates)
+    for source in SOURCES:
+        assert a.values[source].dtype == b.values[source].dtype
+        assert np.array_equal(a.values[source], b.values[source])
+        assert list(a.text(source)) == list(b.text(source))
+
+
+def test_archive_round_trip(history, tmp_path):
+    path = str(tmp_path / "history.npy")
+    size = write_archive(history, path)
+    records = read_archive(path)
+    assert records.dtype == to_records(history).dtype
+    assert size == (tmp_path / "history.npy").stat().st_size
+    _same_frame(load_frame(path), history)
+    _same_frame(from_records(to_records(history)), history)
+    meta = info(path)
+    assert meta["days"] == len(history) and meta["giai_nhat"] == len(history) - 3
+
+
+def test_refresh_rebuilds_old_format_from_store(draws, history, tmp_path):
+    store = DrawStore(str(tmp_path / "draws.sqlite3"))
+    for source in SOURCES:
+        store.add(source, store_rows(draws, source, {3, 40, 41} if source == "giai_nhat" else ()))
+    path = str(tmp_path / "history.npy")
+    old = np.zeros(2, dtype=[("date", "<i4"), ("xsmb", "<i4")])
+    np.save(path, old)
+    with pytest.raises(ValueError, match="Unknown archive record format"):
+        from_records(read_archive(path))
+
+    _same_frame(refresh(store, path), history)
+    _same_frame(load_frame(path), history)
+
+
+def _mapped(arr):
+    while arr is not None:
+        if isinstance(arr, np.memmap):
+            return True
+        arr = arr.base
+    return False
+
+
+def test_columns_are_views_on_the_mapped_file(draws, history, tmp_path):
+    path = str(tmp_path / "history.npy")
+    write_archive(history, path)
+    frame = load_frame(path)
+    for source in SOURCES:
+        assert _mapped(frame.values[source]) and not frame.values[source].flags.writeable
+    view = frame.window(20, 30)
+    assert np.shares_memory(view.values["than_tai"], frame.values["than_tai"])
+    assert list(view.text("than_tai")) == draws["than_tai"][20:50]
+
+    # Dựng lại file (đổi tên đè lên) không làm hỏng bảng đang mở
+    write_archive(history.window(5), path)
+    assert list(frame.text("xsmb")) == list(history.text("xsmb"))
+    assert len(load_frame(path)) == len(history) - 5
@@ -0,0 +1,45 @@
+"""Bảng test ngược so với calculate_muc_for_offset của app gốc."""
+
+import pytest
+
+import reference
+from backtest import level_counts, run_backtest, summarize_backtest
+from conftest import last2_of, results_of
+
+NUM_DAYS = 50
+HORIZON = 10
+
+
+def _run(draws, compare_source, offset, horizon, empty_tt, empty_dt):
+    args = (results_of(draws, "than_tai"), results_of(draws, "dien_toan"), last2_of(draws, compare_source),
+            draws["labels"], offset, horizon, empty_tt, empty_dt, NUM_DAYS)
+    df = run_backtest(*args, compare_label=compare_source)
+    return df, reference.backtest(*args)
+
+
+@pytest.mark.parametrize("compare_source", ["xsmb", "giai_nhat"])
+@pytest.mark.parametrize("offset,empty_tt,empty_dt", [(0, 4, 4), (3, 1, 10), (21, 7, 2)])
+def test_backtest_matches_reference(draws, compare_source, offset, empty_tt, empty_dt):
+    df, expected = _run(draws, compare_source, offset, HORIZON, empty_tt, empty_dt)
+    assert list(df.columns) == ["Lùi", "Ngày KQ", compare_source, "TT Mức", "ĐT Mức"]
+    assert [tuple(r) for r in df.itertuples(index=False)] == expected
+
+
+def test_backtest_near_the_end_of_history(draws):
+    # Các lát cắt ngắn hơn NUM_DAYS và offset vượt quá lịch sử
+    df, expected = _run(draws, "xsmb", len(draws["dates"]) - 45, 50, 3, 5)
+    assert [tuple(r) for r in df.itertuples(index=False)] == expected
+    assert df["Ngày KQ"].iloc[-1].startswith("N-")
+
+
+def test_summary_and_level_counts(draws):
+    df, _ = _run(draws, "xsmb", 0, HORIZON, 4, 4)
+    summary, counts = summarize_backtest(df), level_counts(df)
+    for kind, col in (("TT", "TT Mức"), ("ĐT", "ĐT Mức")):
+        hits = int((df[col] != "-").sum())
+        assert summary.loc[kind, "Hit"] == hits
+        assert summary.loc[kind, "Tổng"] == HORIZON
+        assert summary.loc[kind, "Hit Rate"] == pytest.approx(hits / HORIZON * 100)
+        if kind in counts:
+            assert counts[kind].sum() == hits
+            assert sorted(counts.index[counts[kind] > 0]) == sorted({int(m[1:]) for m in df[col] if m != "-"})
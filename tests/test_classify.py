@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+import logic
+import reference
+from classify import (BO_CODE, BO_DICT, BO_KEYS, CATEGORY_MASKS, HIEU, HIEU_MAP, KEP_CODE, KEP_KEYS, TONG,
+                      ZODIAC_CODE, ZODIAC_DICT, ZODIAC_KEYS, category_pairs, classify, to_codes)
+
+PAIRS = [f"{i:02d}" for i in range(100)]
+
+
+def test_tables_match_the_original_lookups():
+    for i, p in enumerate(PAIRS):
+        assert BO_KEYS[BO_CODE[i]] == reference.bo(p, BO_DICT)
+        assert (KEP_KEYS[KEP_CODE[i]] if KEP_CODE[i] >= 0 else "-") == reference.kep(p)
+        assert HIEU[i] == reference.group_of(p, HIEU_MAP, -1)
+        assert ZODIAC_KEYS[ZODIAC_CODE[i]] == reference.group_of(p, ZODIAC_DICT, None)
+        assert TONG[i] == (int(p[0]) + int(p[1])) % 10
+
+
+def test_scalar_helpers_match_the_original_lookups():
+    for p in PAIRS + ["7", "xx", ""]:
+        assert logic.bo(p) == reference.bo(p, BO_DICT)
+        assert logic.kep(p) == reference.kep(p)
+        assert logic.hieu(p) == reference.group_of(p, HIEU_MAP, -1)
+        assert logic.zodiac(p) == reference.group_of(p, ZODIAC_DICT, "-")
+
+
+def test_classify_matches_the_tables():
+    pairs = PAIRS + ["5", "abc", "100"]
+    codes = to_codes(pairs)
+    assert list(codes[:100]) == list(range(100)) and list(codes[100:]) == [5, -1, -1]
+    assert np.array_equal(to_codes(np.array([3, -1, 100, 99])), [3, -1, -1, 99])
+    out = classify(pairs)
+    assert np.array_equal(out["bo"][:100], BO_CODE)
+    assert np.array_equal(out["kep"][:100], KEP_CODE)
+    assert out["zodiac"][100] == ZODIAC_CODE[5]
+    assert all(v[101] == -1 and v[102] == -1 for v in out.values())
+
+
+@pytest.mark.parametrize("name", ["bo", "kep", "hieu", "zodiac", "tong", "dau", "duoi"])
+def test_masks_and_category_pairs_agree(name):
+    masks = CATEGORY_MASKS[name]
+    groups = category_pairs(name)
+    assert sorted(groups) == list(range(len(masks)))
+    for g, members in groups.items():
+        assert np.array_equal(np.flatnonzero(masks[g]), members)
+
+
+def test_dan_text_matches_the_original_helpers():
+    for key, pairs in BO_DICT.items():
+        assert logic.get_bo_dan(key) == ", ".join(pairs)
+    for z, pairs in ZODIAC_DICT.items():
+        assert logic.get_zodiac_dan(z) == ", ".join(pairs)
+    for h in range(10):
+        assert logic.get_hieu_dan(h) == logic.get_hieu_dan(str(h)) == ", ".join(HIEU_MAP[h])
+        assert logic.get_tong_dan(h) == reference.tong_dan(h).replace(",", ", ")
+    assert logic.get_bo_dan("99") == logic.get_hieu_dan("x") == ""
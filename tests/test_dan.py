@@ -0,0 +1,63 @@
+"""Phép toán của Dan so với tập hợp Python."""
+
+import random
+
+import numpy as np
+
+import reference
+from dan import Dan, from_matrix, to_matrix, union
+from frequency import dan_levels
+
+
+def test_set_operations_match_python_sets():
+    rng = random.Random(1)
+    for _ in range(50):
+        a, b = set(rng.sample(range(100), rng.randrange(100))), set(rng.sample(range(100), rng.randrange(100)))
+        da, db = Dan.from_pairs(a), Dan.from_pairs(b)
+        assert list(da | db) == sorted(a | b)
+        assert list(da & db) == sorted(a & b)
+        assert list(da - db) == sorted(a - b)
+        assert list(da ^ db) == sorted(a ^ b)
+        assert list(~da) == sorted(set(range(100)) - a)
+        assert len(da) == len(a) and bool(da) == bool(a)
+        assert all((p in da) == (p in a) for p in range(100))
+
+
+def test_parse_and_format():
+    dan = Dan.parse("05, 12 99,00")
+    assert dan.pairs() == ["00", "05", "12", "99"]
+    assert dan.to_string(" ") == "00 05 12 99"
+    assert Dan.parse(dan.to_string()) == dan
+    assert "05" in dan and 12 in dan and "5" not in dan
+    assert Dan.from_pairs(["7", "100", -1, "ab"]) == Dan()
+    assert len(Dan.full()) == 100
+
+
+def test_matrix_round_trip():
+    rng = np.random.default_rng(2)
+    matrix = rng.random((17, 100)) < 0.3
+    dans = from_matrix(matrix)
+    assert np.array_equal(to_matrix(dans), matrix)
+    assert all(np.array_equal(d.mask(), row) for d, row in zip(dans, matrix))
+    assert all(Dan.from_mask(row) == d for d, row in zip(dans, matrix))
+    assert union(dans).mask().tolist() == matrix.any(axis=0).tolist()
+    assert from_matrix(np.zeros((0, 100), dtype=bool)) == []
+    assert to_matrix([]).shape == (0, 100)
+
+
+def _random_dans(seed, count, most):
+    rng = random.Random(seed)
+    return [Dan.from_pairs(rng.sample(range(100), rng.randrange(1, most))) for _ in range(count)]
+
+
+def test_dan_levels_match_jn_on_dan_strings():
+    dans = _random_dans(7, 12, 60)
+    got = {lvl: dan.to_string(",") for lvl, dan in dan_levels(dans, levels=range(len(dans) + 1)).items()}
+    assert list(got.items()) == reference.muc_levels([d.to_string(" ") for d in dans])
+
+
+def test_descending_levels_match_calculate_muc_so():
+    dans = _random_dans(11, 9, 40)
+    got = {lvl: dan.pairs() for lvl, dan in dan_levels(dans, descending=True).items()}
+    expected = reference.calculate_muc_so([d.to_string(" ") for d in dans])
+    assert got == expected and list(got) == list(expected)
@@ -0,0 +1,85 @@
+"""Ngữ pháp biểu thức dàn và các thông báo lỗi."""
+
+import numpy as np
+import pytest
+
+from classify import BO_DICT, HIEU_MAP, KEP_DICT, ZODIAC_DICT
+from dan import Dan
+from dan_query import QueryError, compile_query, hit_flags, query_stats
+
+ALL = {f"{i:02d}" for i in range(100)}
+
+
+def pairs(query):
+    return set(compile_query(query).pairs())
+
+
+@pytest.mark.parametrize("query,expected", [
+    ("bo 01", set(BO_DICT["01"])),
+    ("BO 01, 44", set(BO_DICT["01"]) | set(BO_DICT["44"])),
+    ("kep k.bang", set(KEP_DICT["K.BANG"])),
+    ("giap Tý", set(ZODIAC_DICT["Tý"])),
+    ("hieu 3", set(HIEU_MAP[3])),
+    ("tong 5", {p for p in ALL if (int(p[0]) + int(p[1])) % 10 == 5}),
+    ("dau 1", {p for p in ALL if p[0] == "1"}),
+    ("duoi 9,0", {p for p in ALL if p[1] in "90"}),
+    ("cham 3,7", {p for p in ALL if "3" in p or "7" in p}),
+    ("so 12, 34", {"12", "34"}),
+    ("tat", ALL),
+])
+def test_atoms(query, expected):
+    assert pairs(query) == expected
+
+
+def test_precedence_and_grouping():
+    bo, tong, kep = set(BO_DICT["01"]), pairs("tong 5"), set(KEP_DICT["K.BANG"])
+    cham = pairs("cham 3,7")
+    assert pairs("bo 01 | tong 5 & !kep K.BANG & cham 3,7") == bo | (tong - kep) & cham
+    assert pairs("(bo 01 | tong 5) & !(kep K.BANG | cham 3,7)") == (bo | tong) - (kep | cham)
+    assert pairs("!!bo 01") == bo
+    assert pairs("tat & !so 00") == ALL - {"00"}
+    assert compile_query("bo 01|tong 5") == compile_query(" bo 01 |  tong 5 ")
+
+
+@pytest.mark.parametrize("query,message", [
+    ("", "Biểu thức rỗng (vị trí 1)"),
+    ("   ", "Biểu thức rỗng (vị trí 1)"),
+    ("bo 01 |", "Biểu thức kết thúc đột ngột (vị trí 8)"),
+    ("bo", "Biểu thức kết thúc đột ngột (vị trí 3)"),
+    ("bo 01 )", "Thừa ')' (vị trí 7)"),
+    ("bo 01 tong 5", "Thừa 'tong' (vị trí 7)"),
+    ("(bo 01 | tong 5", "Thiếu ')' (vị trí 16)"),
+    ("bong 01", "Không hiểu 'bong', dùng một trong: bo, kep, giap, tong, hieu, dau, duoi, cham, so, tat (vị trí 1)"),
+    ("bo | tong 5", "'bo' cần giá trị (vị trí 4)"),
+    ("bo 01, & tong 5", "'bo' cần giá trị (vị trí 8)"),
+    ("cham x", "'cham x' cần chữ số 0..9 (vị trí 6)"),
+    ("so 123", "'so 123' cần cặp số 00..99 (vị trí 4)"),
+    ("bo 99", "'bo 99' không hợp lệ, chọn một trong: " + ", ".join(BO_DICT) + " (vị trí 4)"),
+    ("tong 10", "'tong 10' không hợp lệ, chọn một trong: 0..9 (vị trí 6)"),
+    ("giap Rồng", "'giap Rồng' không hợp lệ, chọn một trong: " + ", ".join(ZODIAC_DICT) + " (vị trí 6)"),
+])
+def test_error_messages(query, message):
+    with pytest.raises(QueryError) as err:
+        compile_query(query)
+    assert str(err.value) == message
+    assert isinstance(err.value, ValueError)
+    assert err.value.position == int(message.rsplit(" ", 1)[1][:-1]) - 1
+
+
+def test_error_without_position():
+    assert str(QueryError("q không được để trống")) == "q không được để trống"
+    assert QueryError("x").position is None
+
+
+def test_hit_flags_and_stats():
+    codes = np.array([12, -1, 5, 34, 99, 12])
+    flags = hit_flags("so 12, 34", codes)
+    assert flags.tolist() == [True, False, False, True, False, True]
+    assert hit_flags(["so 12", Dan.from_pairs([5])], codes).tolist() == [
+        [True, False, False, False, False, True],
+        [False, False, True, False, False, False],
+    ]
+    stats = query_stats("so 34 | so 99", codes)
+    assert (stats["size"], stats["days"], stats["hits"], stats["current"]) == (2, 5, 2, 2)
+    assert stats["hit_rate"] == pytest.approx(0.4) and stats["expected"] == pytest.approx(0.02)
+    assert query_stats("so 00", codes)["current"] == 5
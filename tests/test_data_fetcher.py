@@ -0,0 +1,71 @@
+"""fetch_all trên các trang đã lưu: mỗi nguồn được tải đúng một lần, song song."""
+
+import contextvars
+import threading
+
+import pytest
+
+import data_fetcher
+import perf
+from conftest import fixture
+
+PAGES = {
+    data_fetcher.DIEN_TOAN_URL.format(days=30): "dien_toan.html",
+    data_fetcher.THAN_TAI_URL.format(days=30): "than_tai.html",
+    data_fetcher.XSMB_URL: "congcuxoso_db.html",
+    data_fetcher.GIAI_NHAT_URL: "congcuxoso_db.html",
+}
+
+
+@pytest.fixture
+def fetched(monkeypatch):
+    """Thay fetch_page bằng các trang fixture; ghi lại URL và thread của mỗi lần tải."""
+    calls = []
+    lock = threading.Lock()
+
+    def fetch_page(url, max_retries=3, cache_key=None):
+        with lock:
+            calls.append((url, threading.current_thread().name))
+        return fixture(PAGES[url]) if url in PAGES else None
+
+    monkeypatch.setattr(data_fetcher, "fetch_page", fetch_page)
+    return calls
+
+
+def test_fetch_all_parses_each_source_once(fetched):
+    results, timings = data_fetcher.fetch_all({s: 30 for s in data_fetcher.SOURCES})
+    assert sorted(url for url, _ in fetched) == sorted(PAGES)
+    assert all(thread.startswith("fetch") for _, thread in fetched)
+    assert set(timings) == set(data_fetcher.SOURCES) | {"total"}
+    assert results["dien_toan"][0] == {"date": "Ngày 16/10/2026", "dt_numbers": ["1", "40", "514"]}
+    assert results["than_tai"][0] == {"date": "Ngày 16/10/2026", "tt_number": "9460"}
+    assert results["xsmb"][0] == {"number": "68767", "weekday": 4, "days_back": 0}
+    assert len(results["giai_nhat"]) == 18
+
+
+def test_fetch_all_only_requested_sources(fetched):
+    results, timings = data_fetcher.fetch_all({"than_tai": 30})
+    assert list(results) == ["than_tai"] and len(results["than_tai"]) == 17
+    assert [url for url, _ in fetched] == [data_fetcher.THAN_TAI_URL.format(days=30)]
+    assert set(timings) == {"than_tai", "total"}
+
+
+def test_stage_names_do_not_depend_on_urls(fetched):
+    def run():
+        recorder = perf.begin_run(enabled=True)
+        data_fetcher.fetch_all({"xsmb": 30, "giai_nhat": 30})
+        data_fetcher.fetch_xsmb_group(30)
+        return recorder.snapshot()["stages"]
+
+    stages = contextvars.copy_context().run(run)
+    assert set(stages) == {f"{step}.{source}" for step in ("fetch", "parse") for source in ("xsmb", "giai_nhat")}
+    assert all(s["calls"] == 2 for s in stages.values())
+
+
+def test_failed_page_gives_no_draws(fetched):
+    results, _ = data_fetcher.fetch_all({"dien_toan": 5})   # URL không có trong PAGES
+    assert results == {"dien_toan": []}
+
+
+def test_session_is_shared():
+    assert data_fetcher.get_session() is data_fetcher.get_session()
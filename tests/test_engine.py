@@ -0,0 +1,91 @@
+"""Bộ máy phân tích không giao diện: lâu ra + Mức Số, backtest, Thống Kê theo ngày và báo cáo theo lô."""
+
+import json
+
+import pytest
+
+import reference
+from conftest import store_rows
+from engine import (COMPARE_SOURCES, HORIZON, NUM_DAYS, aligned_frame, backtest_report, batch_report, gap_index,
+                    gap_table, lau_ra_levels, main)
+from gap_index import GapIndex
+from store import SOURCES, DrawStore
+
+
+@pytest.mark.parametrize("compare_source", list(COMPARE_SOURCES))
+@pytest.mark.parametrize("offset,empty_tt,empty_dt", [(0, 4, 4), (21, 7, 2)])
+def test_backtest_report_matches_reference(history, compare_source, offset, empty_tt, empty_dt):
+    aligned = aligned_frame(history, compare_source)
+    df, _, _ = backtest_report(aligned, compare_source, offset, HORIZON, empty_tt, empty_dt)
+    expected = reference.backtest(
+        list(aligned.text("than_tai")), list(aligned.text("dien_toan")),
+        list(aligned.last2(COMPARE_SOURCES[compare_source])), list(aligned.labels),
+        offset, HORIZON, empty_tt, empty_dt, NUM_DAYS,
+    )
+    assert [tuple(r) for r in df.itertuples(index=False)] == expected
+
+
+def test_lau_ra_levels_match_muc_so(history):
+    aligned = aligned_frame(history, "Giải Nhất")
+    view = aligned.window(7, NUM_DAYS)
+    lau_ra, actual, table, levels = lau_ra_levels(view.text("than_tai"), view.last2("giai_nhat"), 6)
+    assert actual <= 6 and lau_ra == table[actual]
+    expected = reference.muc_levels([d.to_string(",") for _, d in lau_ra])
+    assert [(m["level"], m["pairs"].to_string(",")) for m in levels if m["count"]] == expected
+
+
+def test_gap_index_until_date(history):
+    until = history.dates[10]
+    index = gap_index(history, "GĐB", until)
+    expected = GapIndex.from_history(history.complete("xsmb").window(10).pair_codes("xsmb"))
+    assert index.summary("bo").equals(expected.summary("bo"))
+
+
+def _batch(history, offsets):
+    return batch_report(history, offsets, list(COMPARE_SOURCES), ["Thần tài"], [True], [4], [4], horizon=2)
+
+
+def test_batch_thong_ke_matches_a_rebuild_per_offset(history):
+    offsets = {"GĐB": [0, 5, 30, 3], "Giải Nhất": [2, 40]}
+    thong_ke = _batch(history, offsets)["thong_ke"]
+    for compare, wanted in offsets.items():
+        aligned = aligned_frame(history, compare)
+        for o in sorted(wanted):
+            got = thong_ke[(thong_ke["compare_source"] == compare) & (thong_ke["offset"] == o)]
+            expected = gap_table(gap_index(history, compare, aligned.dates[o]))
+            assert got.drop(columns=["offset", "date", "compare_source"]).reset_index(drop=True).equals(expected)
+    assert list(thong_ke.drop_duplicates(["compare_source", "offset"])["offset"]) == [0, 3, 5, 30, 2, 40]
+
+
+def test_batch_offsets_per_source(history):
+    # Giải Nhất thiếu ngày 3: cùng một ngày nằm ở offset 10 (GĐB) và 9 (Giải Nhất)
+    tables = _batch(history, {"GĐB": [10], "Giải Nhất": [9]})
+    dates = tables["lau_ra"].groupby("compare_source")["date"].unique()
+    assert list(dates["GĐB"]) == list(dates["Giải Nhất"]) == [history.labels[10]]
+    # Một danh sách chung vẫn dùng cùng offset cho mọi nguồn
+    shared = _batch(history, [10])["lau_ra"].groupby("compare_source")["date"].unique()
+    assert list(shared["Giải Nhất"]) == [history.labels[11]]
+
+
+@pytest.fixture
+def cli(draws, tmp_path):
+    db = DrawStore(str(tmp_path / "draws.sqlite3"))
+    for source in SOURCES:
+        db.add(source, store_rows(draws, source, {3, 40, 41} if source == "giai_nhat" else ()))
+    return ["--db", db.path, "--archive", str(tmp_path / "history.npy"), "--out", str(tmp_path / "out"),
+            "--result-type", "Thần tài"]
+
+
+def test_cli_date_uses_each_source_offset(cli, draws, tmp_path, capsys):
+    main(cli + ["--date", draws["dates"][50].isoformat()])
+    with open(tmp_path / "out" / "report.json", encoding="utf-8") as f:
+        report = json.load(f)
+    assert report["meta"]["offsets"] == {"GĐB": [50], "Giải Nhất": [47]}
+    assert {row["date"] for row in report["tables"]["thong_ke"]} == {draws["labels"][50]}
+
+
+def test_cli_unknown_date_is_a_usage_error(cli, draws, capsys):
+    with pytest.raises(SystemExit) as exc:
+        main(cli + ["--date", draws["dates"][40].isoformat(), "--compare", "Giải Nhất"])
+    assert exc.value.code == 2
+    assert "Không có kỳ ngày" in capsys.readouterr().err
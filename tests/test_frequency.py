@@ -0,0 +1,48 @@
+"""Bộ đếm cặp số vector hóa so với jn và vòng lặp theo mức của tab Mức Số gốc."""
+
+import numpy as np
+import pytest
+
+from conftest import results_of
+from frequency import level_map, muc_levels, pair_count_matrix, pair_totals, window_totals
+from reference import jn
+import reference
+
+
+@pytest.mark.parametrize("strings", [
+    ["1234", "5678", "1111", "0000", "9090"],
+    ["111", "1111", "11111", "121212", "a11b"],
+    ["01 05 12", "10 50 21", "00 11"],
+    [],
+])
+def test_pair_count_matrix_matches_str_count(strings):
+    m = pair_count_matrix(strings)
+    assert m.shape == (len(strings), 100)
+    for r, s in enumerate(strings):
+        assert m[r].tolist() == [s.count(f"{p:02d}") for p in range(100)]
+    assert pair_totals(strings).tolist() == m.sum(axis=0).tolist()
+
+
+def test_window_totals_match_slices(draws):
+    strings = results_of(draws, "dien_toan")[:40]
+    counts = pair_count_matrix(strings)
+    starts = np.array([0, 5, 33, 39])
+    got = window_totals(counts, starts, 7)
+    for row, start in zip(got, starts):
+        assert row.tolist() == pair_totals(strings[start:start + 7]).tolist()
+
+
+@pytest.mark.parametrize("size", [1, 7, 30])
+def test_muc_levels_match_jn(draws, size):
+    strings = results_of(draws, "than_tai")[:size] + results_of(draws, "dien_toan")[:size]
+    got = {lvl: dan.to_string(",") for lvl, dan in muc_levels(strings, levels=range(len(strings) + 1)).items()}
+    assert list(got.items()) == reference.muc_levels(strings)
+
+
+def test_level_map_orders_levels():
+    totals = np.zeros(100, dtype=int)
+    totals[[3, 7]] = 2
+    totals[50] = 5
+    assert list(level_map(totals)) == [0, 2, 5]
+    assert list(level_map(totals, descending=True)) == [5, 2, 0]
+    assert level_map(totals, levels=[2])[2].to_string(",") == jn(["03 07 03 07 50"], 2)
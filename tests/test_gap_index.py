@@ -0,0 +1,102 @@
+"""GapIndex so với cách đếm "lâu ra" của tab Thống Kê gốc và phép duyệt thuần Python."""
+
+import random
+import statistics
+
+import numpy as np
+import pytest
+
+import reference
+from classify import BO_DICT, BO_KEYS, CATEGORIES, HIEU_MAP, ZODIAC_DICT, ZODIAC_KEYS
+from conftest import last2_of
+from engine import lo_gan, lo_gan_table
+from gap_index import PAIR_TABLES, GapIndex
+
+
+def _naive_gaps(codes_oldest_first, table):
+    """Danh sách gan đã kết thúc và vị trí lần ra cuối của mỗi nhóm."""
+    gaps, last = {}, {}
+    for pos, code in enumerate(codes_oldest_first):
+        group = int(table[code])
+        if group < 0:
+            continue
+        if group in last:
+            gaps.setdefault(group, []).append(pos - last[group] - 1)
+        last[group] = pos
+    return gaps, last
+
+
+@pytest.fixture(scope="module")
+def last2(draws):
+    return last2_of(draws, "xsmb")[:100]
+
+
+def test_current_gap_matches_thong_ke_tab(last2):
+    index = GapIndex.from_history(last2)
+    current = {
+        "bo": {BO_KEYS.index(k): v for k, v in reference.lag(last2, lambda p: reference.bo(p, BO_DICT)).items()},
+        "tong": reference.lag(last2, lambda p: (int(p[0]) + int(p[1])) % 10),
+        "zodiac": {ZODIAC_KEYS.index(k): v for k, v in reference.lag(
+            last2, lambda p: reference.group_of(p, ZODIAC_DICT, None)).items()},
+        "hieu": reference.lag(last2, lambda p: reference.group_of(p, HIEU_MAP, -1)),
+    }
+    for name, expected in current.items():
+        got = index.current_gap(name)
+        assert {g: int(got[g]) for g in expected} == expected
+        assert all(got[g] == -1 for g in range(len(got)) if g not in expected)
+
+
+@pytest.mark.parametrize("name", list(CATEGORIES))
+def test_summary_matches_naive(last2, name):
+    index = GapIndex.from_history(last2)
+    codes = [int(p) for p in reversed(last2)]
+    gaps, last = _naive_gaps(codes, index.tables[name])
+    summary = index.summary(name)
+    for group, row in summary.iterrows():
+        closed = gaps.get(group, [])
+        current = len(codes) - 1 - last[group] if group in last else -1
+        assert index.gaps(name, group) == closed
+        assert row["current"] == current
+        assert row["count"] == (len(closed) + 1 if group in last else 0)
+        assert row["max_gap"] == max(closed + [current])
+        if closed:
+            assert row["mean_cycle"] == pytest.approx(statistics.mean(closed) + 1)
+            assert row["median_cycle"] == pytest.approx(statistics.median(closed) + 1)
+        else:
+            assert np.isnan(row["mean_cycle"]) and np.isnan(row["median_cycle"])
+    hist = index.gap_counts(name)
+    for group, closed in gaps.items():
+        assert hist[group].tolist() == np.bincount(closed, minlength=hist.shape[1]).tolist()
+
+
+def test_extend_and_append_equal_a_rebuild():
+    rng = random.Random(3)
+    pairs = [f"{rng.randrange(100):02d}" for _ in range(300)] + ["x"]
+    full = GapIndex.from_history(pairs, newest_first=False)
+
+    built = GapIndex.from_history(pairs[:120], newest_first=False)
+    index = built.copy()
+    index.extend(pairs[120:250])
+    for p in pairs[250:]:
+        index.append(p)
+    assert index.n == full.n == len(pairs)
+    assert built.n == 120    # bản gốc không đổi khi nối vào bản sao
+    for name in full.tables:
+        assert index.summary(name).equals(full.summary(name))
+        assert np.array_equal(index.gap_counts(name), full.gap_counts(name))
+        assert all(index.gaps(name, g) == full.gaps(name, g) for g in range(len(full.current_gap(name))))
+
+
+def test_lo_gan_reuses_the_previous_index(history):
+    older = history.window(5)
+    base = (older.complete("xsmb").pair_codes("xsmb"), lo_gan(older, "ĐB"))
+    updated = lo_gan(history, "ĐB", base)
+    assert lo_gan_table(updated).equals(lo_gan_table(lo_gan(history, "ĐB")))
+    assert base[1].n == len(base[0])
+
+
+def test_pair_table_is_lo_gan(last2):
+    current = GapIndex.from_history(last2, tables=PAIR_TABLES).current_gap("pair")
+    for p in range(100):
+        pair = f"{p:02d}"
+        assert current[p] == (last2.index(pair) if pair in last2 else -1)
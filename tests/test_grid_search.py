@@ -0,0 +1,104 @@
+"""Chấm điểm ô lưới và mức số theo offset so với cách tính thuần Python."""
+
+import numpy as np
+import pytest
+
+import reference
+from backtest import actual_codes, backtest_level_grid
+from engine import NUM_DAYS, aligned_frame
+from grid_search import GridCache, heatmap, run_grid, score
+
+
+def _reference_levels(results, last2, offset, threshold):
+    lau_ra, _ = reference.get_lau_ra_with_auto_reduce(results[offset:offset + NUM_DAYS],
+                                                      last2[offset:offset + NUM_DAYS], threshold)
+    row = np.full(100, -1)
+    if lau_ra:
+        for level, pairs in reference.muc_levels([dan for _, dan in lau_ra]):
+            row[[int(p) for p in pairs.split(",")]] = level
+    return row
+
+
+def test_level_grid_matches_reference(history):
+    aligned = aligned_frame(history, "GĐB")
+    results, last2 = list(aligned.text("than_tai")), list(aligned.last2("xsmb"))
+    offsets = [1, 2, 30, len(aligned) - 60, len(aligned) - 30, len(aligned) - 3]
+    thresholds = [1, 4, 10]
+    grid = backtest_level_grid(results, last2, offsets, thresholds, NUM_DAYS)
+    for t, threshold in enumerate(thresholds):
+        for k, offset in enumerate(offsets):
+            assert grid[t, k].tolist() == _reference_levels(results, last2, offset, threshold).tolist()
+
+
+def test_score_matches_naive():
+    rng = np.random.default_rng(5)
+    rows = rng.integers(-1, 4, size=(60, 100))
+    rows[[3, 9]] = -1
+    codes = rng.integers(0, 100, size=60)
+    codes[[4, 20]] = -1
+    select = (0, 2)
+
+    days = hits = size = 0
+    for row, code in zip(rows, codes):
+        played = {p for p in range(100) if row[p] in select}
+        if code < 0 or not played:
+            continue
+        days += 1
+        hits += code in played
+        size += len(played)
+    out = score(rows, codes, select)
+    assert (out["days"], out["hits"]) == (days, hits)
+    assert out["hit_rate"] == pytest.approx(hits / days)
+    assert out["size"] == pytest.approx(size / days)
+    assert out["edge"] == pytest.approx(out["hit_rate"] - out["expected"])
+    assert 0 <= out["p_value"] <= 1
+
+
+def test_score_without_days():
+    out = score(np.full((3, 100), -1), np.array([1, 2, 3]), (0,))
+    assert out["days"] == 0 and out["z"] is None
+
+
+def test_run_grid_uses_the_cache(history, tmp_path):
+    cache = GridCache(str(tmp_path))
+    grid = {"empty": [2, 4], "window": [7], "lookback": [28], "max_row": [28]}
+    ranked = run_grid(history, grid, ["GĐB"], types=["TT"], cache=cache)
+    assert len(ranked) == 2 and len(cache) == 2
+
+    aligned = aligned_frame(history, "GĐB")
+    offsets = list(range(1, len(aligned)))
+    rows = backtest_level_grid(aligned.text("than_tai"), aligned.last2("xsmb"), offsets, [4], NUM_DAYS)[0]
+    expected = score(rows, actual_codes(aligned.last2("xsmb"), offsets), (0, 1, 2))
+    got = ranked[ranked["empty"] == 4].iloc[0]
+    assert (got["days"], got["hits"]) == (expected["days"], expected["hits"])
+
+    # File jsonl được đọc lại: không ô nào phải tính lại
+    reloaded = GridCache(str(tmp_path))
+    again = run_grid(history, grid, ["GĐB"], types=["TT"], cache=reloaded)
+    assert len(reloaded) == 2
+    assert again.equals(ranked)
+
+
+def test_cells_survive_new_draws(history, tmp_path):
+    grid = {"empty": [2, 4], "window": [7], "lookback": [28], "max_row": [28]}
+    older = history.window(5)
+    cache = GridCache(str(tmp_path))
+    before = run_grid(older, grid, ["GĐB"], types=["TT"], cache=cache)
+    assert set(before["end"]) == {str(older.dates[0])}
+
+    # Năm kỳ mới: chấm lại tới ngày cũ dùng lại các ô, toàn bộ lịch sử thì tính ô mới
+    reloaded = GridCache(str(tmp_path))
+    again = run_grid(history, grid, ["GĐB"], types=["TT"], cache=reloaded, until=older.dates[0])
+    assert len(reloaded) == 2
+    assert again.equals(before)
+    run_grid(history, grid, ["GĐB"], types=["TT"], cache=reloaded)
+    assert len(reloaded) == 4
+
+
+@pytest.mark.parametrize("metric,cmid", [("z", 0), ("hit_rate", None)])
+def test_heatmap_centers_only_z(history, tmp_path, metric, cmid):
+    pytest.importorskip("plotly")
+    grid = {"empty": [1, 3], "window": [5, 7], "lookback": [28], "max_row": [28]}
+    ranked = run_grid(history, grid, ["GĐB"], types=["TT"], cache=GridCache(str(tmp_path)))
+    fig = heatmap(ranked, metric=metric)
+    assert fig.layout.coloraxis.cmid == cmid
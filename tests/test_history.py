@@ -0,0 +1,61 @@
+"""HistoryFrame: căn các nguồn theo ngày, view, version."""
+
+import numpy as np
+import pytest
+
+from conftest import store_rows
+from history import HistoryFrame
+from store import SOURCES, DrawStore
+
+
+def test_from_rows_aligns_sources_on_dates(draws, history):
+    assert len(history) == len(draws["dates"])
+    assert history.dates[0] == np.datetime64(draws["dates"][0])
+    assert list(history.labels[:2]) == draws["labels"][:2]
+    assert list(history.text("than_tai")) == draws["than_tai"]
+    assert list(history.text("dien_toan")) == ["".join(dt) for dt in draws["dien_toan"]]
+    assert list(history.last2("xsmb")) == [n[-2:] for n in draws["xsmb"]]
+    assert history.pair_codes("dien_toan").tolist() == [int(dt[2]) % 100 for dt in draws["dien_toan"]]
+
+    # Giải Nhất thiếu ngày 3, 40, 41: ô trống và bị bỏ khi căn
+    assert history.text("giai_nhat")[3] == "" and history.last2("giai_nhat")[40] == ""
+    assert history.pair_codes("giai_nhat")[41] == -1
+    aligned = history.complete("giai_nhat", "than_tai")
+    assert len(aligned) == len(history) - 3
+    assert history.complete("than_tai", "giai_nhat") is aligned
+    assert history.complete("than_tai") is history
+
+
+def test_window_is_a_view(history):
+    view = history.window(10, 5)
+    assert list(view.text("xsmb")) == list(history.text("xsmb")[10:15])
+    assert np.shares_memory(view.values["xsmb"], history.values["xsmb"])
+    assert view.version == history.version
+    with pytest.raises(ValueError):
+        view.values["xsmb"][0] = 1
+
+
+def test_to_frame(history):
+    df = history.to_frame("dien_toan")
+    assert list(df.columns) == ["Ngày", "Số 1", "Số 2", "Số 3"]
+    assert len(history.to_frame("giai_nhat")) == len(history) - 3
+
+
+def test_version_follows_the_data(draws, history):
+    same = HistoryFrame.from_rows({s: store_rows(draws, s, {3, 40, 41} if s == "giai_nhat" else ())
+                                   for s in SOURCES})
+    assert same.version == history.version
+    changed = HistoryFrame.from_rows({s: store_rows(draws, s) for s in SOURCES})
+    assert changed.version != history.version
+
+
+def test_from_store(draws, history, tmp_path):
+    store = DrawStore(str(tmp_path / "draws.sqlite3"))
+    for source in SOURCES:
+        # Thêm theo thứ tự khác nhau: bảng vẫn căn theo ngày chứ không theo vị trí
+        rows = store_rows(draws, source, {3, 40, 41} if source == "giai_nhat" else ())
+        store.add(source, rows[::-1] if source == "xsmb" else rows)
+    frame = HistoryFrame.from_store(store)
+    assert frame.version == history.version
+    assert list(frame.text("giai_nhat")) == list(history.text("giai_nhat"))
+    assert len(HistoryFrame.from_store(store, limit=10)) == 11   # 10 kỳ mỗi nguồn; G1 thiếu một ngày nên lùi xa hơn
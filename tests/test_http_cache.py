@@ -0,0 +1,37 @@
+"""Bộ nhớ đệm HTTP trên đĩa: khóa theo nguồn và giới hạn số file."""
+
+import os
+
+from http_cache import HttpCache
+
+
+def test_entries_are_keyed_by_source(tmp_path):
+    cache = HttpCache(str(tmp_path))
+    entry = cache.put("than_tai", "https://x/than-tai/30", "<html>30</html>", {"ETag": '"a"'})
+    got = cache.get("than_tai")
+    assert got == entry and got.url == "https://x/than-tai/30"
+    assert got.conditional_headers() == {"If-None-Match": '"a"'}
+    assert cache.get("https://x/than-tai/30") is None
+
+    # URL khác (số kỳ khác) của cùng nguồn thay bản lưu cũ
+    cache.put("than_tai", "https://x/than-tai/1", "<html>1</html>", {"Last-Modified": "Fri"})
+    assert cache.get("than_tai").text == "<html>1</html>"
+    assert cache.get("than_tai").conditional_headers() == {"If-Modified-Since": "Fri"}
+
+
+def test_touch_keeps_the_body(tmp_path):
+    cache = HttpCache(str(tmp_path))
+    entry = cache.put("k", "u", "body", {"ETag": '"1"'})
+    touched = cache.touch(entry, {"ETag": '"2"'})
+    assert cache.get("k") == touched
+    assert (touched.text, touched.etag) == ("body", '"2"') and touched.fetched >= entry.fetched
+
+
+def test_oldest_files_are_evicted(tmp_path):
+    cache = HttpCache(str(tmp_path), max_entries=3)
+    for k in range(5):
+        cache.put(f"k{k}", f"u{k}", "x", {})
+        path = cache._path(f"k{k}")
+        os.utime(path, (k, k))
+    assert [cache.get(f"k{k}") is not None for k in range(5)] == [False, False, True, True, True]
+    assert len([n for n in os.listdir(tmp_path) if n.endswith(".json")]) == 3
@@ -0,0 +1,61 @@
+"""Dàn lâu ra và auto-reduce so với vòng lặp thuần Python của app gốc."""
+
+import pytest
+
+import reference
+from conftest import last2_of, results_of
+from lau_ra import calculate_lau_ra, get_lau_ra_with_auto_reduce, lau_ra_table
+
+NUM_DAYS = 50
+
+
+def _slices(draws, result_source, compare_source, offset, size=NUM_DAYS):
+    return (results_of(draws, result_source)[offset:offset + size],
+            last2_of(draws, compare_source)[offset:offset + size])
+
+
+def _rows(lau_ra):
+    return [(str(result), dan.to_string(" ")) for result, dan in lau_ra]
+
+
+@pytest.mark.parametrize("compare_source", ["xsmb", "giai_nhat"])
+@pytest.mark.parametrize("result_source", ["than_tai", "dien_toan"])
+@pytest.mark.parametrize("offset", [0, 9, 104, 150])
+def test_calculate_lau_ra_matches_reference(draws, compare_source, result_source, offset):
+    results, last2 = _slices(draws, result_source, compare_source, offset)
+    for threshold in range(1, 11):
+        assert _rows(calculate_lau_ra(results, last2, threshold, NUM_DAYS)) == \
+            reference.calculate_lau_ra(results, last2, threshold, NUM_DAYS)
+
+
+@pytest.mark.parametrize("size", [3, 7, 12, 29, 35])
+def test_short_slices_clamp_the_window(draws, size):
+    results, last2 = _slices(draws, "than_tai", "xsmb", 0, size)
+    for threshold in (1, 2, 5):
+        assert _rows(calculate_lau_ra(results, last2, threshold, NUM_DAYS)) == \
+            reference.calculate_lau_ra(results, last2, threshold, NUM_DAYS)
+
+
+def test_auto_reduce_matches_reference(draws):
+    reduced = 0
+    for compare_source in ("xsmb", "giai_nhat"):
+        for result_source in ("than_tai", "dien_toan"):
+            for offset in (0, 13, 40):
+                results, last2 = _slices(draws, result_source, compare_source, offset)
+                for threshold in (4, 10, 14):
+                    rows, actual, table = get_lau_ra_with_auto_reduce(results, last2, threshold, NUM_DAYS)
+                    ref_rows, ref_actual = reference.get_lau_ra_with_auto_reduce(results, last2, threshold,
+                                                                                 NUM_DAYS)
+                    assert (_rows(rows), actual) == (ref_rows, ref_actual)
+                    assert table[actual] == rows
+                    reduced += actual < threshold
+    assert reduced, "dữ liệu thử phải có trường hợp tự giảm ngưỡng"
+
+
+def test_table_has_every_threshold(draws):
+    results, last2 = _slices(draws, "dien_toan", "xsmb", 0)
+    table = lau_ra_table(results, last2, NUM_DAYS, max_threshold=12)
+    assert list(table) == list(range(1, 13))
+    for threshold, rows in table.items():
+        assert rows == calculate_lau_ra(results, last2, threshold, NUM_DAYS)
+        assert all(set(rows) >= set(table[t]) for t in table if t > threshold)
@@ -0,0 +1,44 @@
+"""Dàn chạm / nhị hợp của logic.py so với vòng lặp gốc, và bản theo lô so với từng ngày."""
+
+import random
+
+import numpy as np
+
+import reference
+from dan import PAIRS
+from logic import cham_matrix, lay_dan_cham, lay_nhi_hop, nhi_hop_matrix
+
+
+def _random_digits(rng):
+    return "".join(rng.sample("0123456789", rng.randrange(0, 6)))
+
+
+def _pairs(mask):
+    return [PAIRS[i] for i in np.flatnonzero(mask)]
+
+
+def test_cham_and_nhi_hop_match_reference():
+    rng = random.Random(21)
+    for _ in range(300):
+        cham, bet, dong = _random_digits(rng), _random_digits(rng), _random_digits(rng)
+        assert lay_dan_cham(cham) == reference.lay_dan_cham(cham)
+        assert lay_dan_cham(list(cham)) == reference.lay_dan_cham(list(cham))
+        assert lay_nhi_hop(list(bet), list(dong)) == reference.lay_nhi_hop(list(bet), list(dong))
+
+
+def test_multi_digit_items_are_split():
+    assert lay_dan_cham(["37"]) == lay_dan_cham("37") == lay_dan_cham([3, 7]) == lay_dan_cham("3,7")
+    assert lay_nhi_hop(["1"], ["12", "5"]) == lay_nhi_hop("1", "125")
+    assert lay_dan_cham("") == lay_dan_cham("x,") == []
+
+
+def test_batch_matches_scalar():
+    rng = random.Random(22)
+    bets = [_random_digits(rng) for _ in range(200)]
+    dongs = [list(_random_digits(rng)) for _ in range(200)]
+    cham = cham_matrix(bets)
+    nhi_hop = nhi_hop_matrix(bets, dongs)
+    assert cham.shape == nhi_hop.shape == (200, 100)
+    for i, (bet, dong) in enumerate(zip(bets, dongs)):
+        assert _pairs(cham[i]) == lay_dan_cham(bet)
+        assert _pairs(nhi_hop[i]) == lay_nhi_hop(bet, dong)
@@ -0,0 +1,33 @@
+"""Bảng Dàn Nuôi (nhị hợp) so với tab 2 của app gốc."""
+
+import pytest
+
+import reference
+from engine import COMPARE_SOURCES, NUM_DAYS, RESULT_TYPES, aligned_frame, dan_nuoi_table
+
+
+@pytest.mark.parametrize("result_type", list(RESULT_TYPES))
+@pytest.mark.parametrize("compare_source", list(COMPARE_SOURCES))
+@pytest.mark.parametrize("include_duplicates", [True, False])
+@pytest.mark.parametrize("offset", [0, 17, 130])
+def test_dan_nuoi_matches_reference(history, result_type, compare_source, include_duplicates, offset):
+    view = aligned_frame(history, compare_source).window(offset, NUM_DAYS)
+    df, levels = dan_nuoi_table(view, result_type, compare_source, include_duplicates)
+    rows, muc = reference.dan_nuoi(list(view.text(RESULT_TYPES[result_type])),
+                                   list(view.last2(COMPARE_SOURCES[compare_source])), include_duplicates)
+
+    assert list(df.columns) == ["Ngày", "KQ", "Dàn Nuôi", "Hit", "K1-K5"]
+    assert list(df["Ngày"]) == list(view.labels[:len(rows)])
+    assert [tuple(r) for r in df[["KQ", "Dàn Nuôi", "Hit", "K1-K5"]].itertuples(index=False)] == rows
+    assert {lvl: dan.pairs() for lvl, dan in levels.items()} == muc
+    assert list(levels) == list(muc)
+
+
+@pytest.mark.parametrize("lookback", [1, 7, 35])
+def test_lookback_matches_reference(history, lookback):
+    view = aligned_frame(history, "GĐB").window(40, NUM_DAYS)
+    df, levels = dan_nuoi_table(view, "Điện toán", "GĐB", True, lookback=lookback)
+    rows, muc = reference.dan_nuoi(list(view.text("dien_toan")), list(view.last2("xsmb")), True,
+                                   lookback=lookback)
+    assert [tuple(r) for r in df[["KQ", "Dàn Nuôi", "Hit", "K1-K5"]].itertuples(index=False)] == rows
+    assert {lvl: dan.pairs() for lvl, dan in levels.items()} == muc
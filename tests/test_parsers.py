@@ -0,0 +1,71 @@
+"""Bộ phân tích trang nguồn trên các trang HTML đã lưu trong tests/fixtures."""
+
+import pytest
+
+from conftest import fixture
+from parsers import iter_containers, parse_congcuxoso, parse_congcuxoso_dated, parse_dien_toan, parse_than_tai
+
+
+@pytest.mark.parametrize("as_bytes", [False, True])
+def test_parse_dien_toan(as_bytes):
+    page = fixture("dien_toan.html")
+    data = parse_dien_toan(page.encode("utf-8") if as_bytes else page, 100)
+    assert len(data) == 18      # bỏ khung quảng cáo và kỳ chưa có số
+    assert data[0] == {"date": "Ngày 16/10/2026", "dt_numbers": ["1", "40", "514"]}
+    assert data[-1] == {"date": "Ngày 28/09/2026", "dt_numbers": ["2", "82", "720"]}
+    assert "Ngày 13/10/2026" in [d["date"] for d in data]   # kỳ thật cùng ngày vẫn được đọc
+    assert "Ngày 07/10/2026" not in [d["date"] for d in data]
+
+
+def test_total_days_counts_containers():
+    # Khung chưa có số vẫn tính là một kỳ của trang
+    assert [d["date"] for d in parse_dien_toan(fixture("dien_toan.html"), 4)] == \
+        ["Ngày 16/10/2026", "Ngày 15/10/2026", "Ngày 14/10/2026"]
+
+
+def test_parse_than_tai():
+    data = parse_than_tai(fixture("than_tai.html"), 100)
+    assert len(data) == 17      # "12a4" bị bỏ
+    assert data[0] == {"date": "Ngày 16/10/2026", "tt_number": "9460"}
+    assert all(len(d["tt_number"]) == 4 and d["tt_number"].isdigit() for d in data)
+    assert len(parse_than_tai(fixture("than_tai.html"), 3)) == 3
+
+
+def test_parse_congcuxoso_dated():
+    data = parse_congcuxoso_dated(fixture("congcuxoso_db.html"), 100)
+    assert len(data) == 18
+    assert data[0] == {"number": "68767", "weekday": 4, "days_back": 0}
+    assert data[-1] == {"number": "81567", "weekday": 0, "days_back": 18}
+    assert data[-2] == {"number": "94018", "weekday": 1, "days_back": 17}
+    # Ô "-----" (ngày nghỉ) vẫn chiếm một ngày trong lịch
+    assert [d["days_back"] for d in data[6:10]] == [6, 7, 8, 10]
+    assert parse_congcuxoso(fixture("congcuxoso_db.html"), 2) == ["68767", "33900"]
+
+
+def test_congcuxoso_without_calendar_header():
+    page = fixture("congcuxoso_db.html").replace("<th>CN</th>", "<th>Tổng</th>")
+    data = parse_congcuxoso_dated(page, 3)
+    assert [d["number"] for d in data] == ["68767", "33900", "55045"]
+    assert all(d["weekday"] is None and d["days_back"] is None for d in data)
+
+
+def test_pages_without_results():
+    empty = "<html><body><p>Bảo trì</p></body></html>"
+    assert parse_dien_toan(empty, 10) == []
+    assert parse_than_tai(empty, 10) == []
+    assert parse_congcuxoso_dated(empty, 10) == []
+
+
+def test_processed_elements_are_dropped():
+    # Mỗi khối nằm sâu trong thẻ khác loại, sau nhiều thẻ không phải div: khi đọc tới
+    # khối thứ k, cây chỉ còn khối đó, chuỗi tổ tiên và khúc đang đọc, không phải cả phần đã qua
+    filler = "<p>quảng cáo <b>x</b></p>" * 50
+    block = "<article>" + filler + '<section><div id="r"><span>{}</span></div></section></article>'
+    page = "<html><body>" + "".join(block.format(k) for k in range(40)) + filler + "</body></html>"
+    chunks = [page[i:i + 1024] for i in range(0, len(page), 1024)]
+    sizes = []
+    for k, div in enumerate(iter_containers(chunks, "div", lambda e: e.get("id") == "r")):
+        assert div.findtext("span") == str(k)
+        sizes.append(sum(1 for _ in div.getroottree().getroot().iter()))
+    assert len(sizes) == 40
+    assert max(sizes) < 300     # một khối và phần đệm của nó là ~100 nút; cả trang là ~6000
@@ -0,0 +1,70 @@
+"""Bộ đo theo lần chạy: mỗi phiên (context) một Recorder riêng."""
+
+import contextvars
+import threading
+
+import data_fetcher
+import perf
+
+
+def _in_context(func, *args):
+    return contextvars.copy_context().run(func, *args)
+
+
+def test_disabled_records_nothing():
+    def run():
+        assert perf.begin_run(enabled=False) is None
+        with perf.stage("x"):
+            perf.count("c")
+        return perf.end_run(), perf.stage_table()
+    snap, table = _in_context(run)
+    assert snap is None and table.empty
+
+
+def test_runs_accumulate_per_recorder():
+    recorder = perf.Recorder()
+
+    @perf.timed("work")
+    def work():
+        perf.count("items", 3)
+
+    def run():
+        perf.begin_run(recorder, enabled=True)
+        work()
+        return perf.end_run(cache="x")
+    first, second = _in_context(run), _in_context(run)
+    assert (first["run"], second["run"]) == (1, 2)
+    assert second["stages"]["work"]["calls"] == 1 and second["counters"] == {"items": 3}
+    assert second["cache"] == "x"
+    assert recorder.snapshot(total=True)["counters"] == {"items": 6}
+
+
+def test_sessions_in_threads_are_isolated():
+    recorders = {name: perf.Recorder() for name in ("a", "b")}
+    barrier = threading.Barrier(2)
+
+    def session(name, calls):
+        perf.begin_run(recorders[name], enabled=True)
+        barrier.wait()
+        for _ in range(calls):
+            perf.count("calls")
+        barrier.wait()
+
+    threads = [threading.Thread(target=_in_context, args=(session, name, n)) for name, n in (("a", 2), ("b", 5))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert recorders["a"].counters == {"calls": 2}
+    assert recorders["b"].counters == {"calls": 5}
+    assert not perf.enabled()
+
+
+def test_fetch_pool_records_into_the_callers_run():
+    recorder = perf.Recorder()
+
+    def run():
+        perf.begin_run(recorder, enabled=True)
+        data_fetcher._submit(perf.count, "pool").result()
+    _in_context(run)
+    assert recorder.counters == {"pool": 1}
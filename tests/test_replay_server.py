@@ -0,0 +1,71 @@
+"""Máy chủ phát lại: định tuyến, trang tổng hợp, ETag và lỗi tiêm vào cho đường thử lại của fetch_page."""
+
+from datetime import date
+
+import pytest
+
+import data_fetcher
+import parsers
+from replay_server import ReplayConfig, ReplayServer, point_fetcher, restore_fetcher, route, synthetic_pages
+
+TODAY = date(2026, 10, 16)    # thứ 6
+
+
+@pytest.fixture(scope="module")
+def pages():
+    return synthetic_pages(days=30, today=TODAY)
+
+
+@pytest.fixture
+def server(pages, monkeypatch):
+    monkeypatch.setattr(data_fetcher, "HTTP_CACHE", None)
+    monkeypatch.setattr(data_fetcher, "REQUEST_TIMEOUT", 0.3)
+    monkeypatch.setattr(data_fetcher, "RETRY_DELAY", 0)
+    with ReplayServer(pages) as srv:
+        previous = point_fetcher(srv.base_url)
+        yield srv
+        restore_fetcher(previous)
+
+
+def test_routes_match_the_fetcher_urls():
+    for source, url in (("dien_toan", data_fetcher.DIEN_TOAN_URL.format(days=7)),
+                        ("than_tai", data_fetcher.THAN_TAI_URL.format(days=7)),
+                        ("xsmb", data_fetcher.XSMB_URL), ("giai_nhat", data_fetcher.GIAI_NHAT_URL)):
+        assert route("/" + url.split("://", 1)[1].split("/", 1)[1] + "?x=1") == source
+    assert route("/khac") is None
+
+
+def test_synthetic_pages_parse(pages):
+    dt = parsers.parse_dien_toan(pages["dien_toan"], 100)
+    assert len(dt) == 30 and dt[0]["date"] == "Ngày 16/10/2026"
+    assert len(parsers.parse_than_tai(pages["than_tai"], 100)) == 30
+    db = parsers.parse_congcuxoso_dated(pages["xsmb"], 100)
+    assert len(db) == 30 and db[0]["weekday"] == TODAY.weekday()
+    assert [d["days_back"] for d in db] == list(range(30))
+
+
+def test_fetch_through_the_replay_server(server, pages):
+    url = data_fetcher.XSMB_URL
+    assert url.startswith(server.base_url)
+    assert data_fetcher.fetch_page(url) == pages["xsmb"]
+    assert data_fetcher.fetch_page(server.base_url + "/khac", max_retries=1) is None
+    assert sum(server.hits.values()) == 2
+
+
+@pytest.mark.parametrize("mode", ["timeout", "error"])
+def test_retry_recovers_from_injected_failures(server, pages, mode):
+    server.reset(ReplayConfig(fail_first=1, fail_mode=mode, hang=1.0))
+    path = "/" + data_fetcher.THAN_TAI_URL.split("://", 1)[1].split("/", 1)[1].format(days=5)
+    assert data_fetcher.fetch_page(data_fetcher.THAN_TAI_URL.format(days=5)) == pages["than_tai"]
+    assert server.hits[path] == 2
+    server.reset(ReplayConfig(fail_first=5, fail_mode="error"))
+    assert data_fetcher.fetch_page(data_fetcher.THAN_TAI_URL.format(days=5)) is None
+    assert server.hits[path] == 3
+
+
+def test_etag_revalidation(server, pages):
+    session = data_fetcher.get_session()
+    first = session.get(data_fetcher.GIAI_NHAT_URL)
+    again = session.get(data_fetcher.GIAI_NHAT_URL, headers={"If-None-Match": first.headers["ETag"]})
+    assert first.status_code == 200 and first.text == pages["giai_nhat"]
+    assert again.status_code == 304 and again.content == b""
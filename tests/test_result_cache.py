@@ -0,0 +1,63 @@
+"""ResultCache: LRU và tính một lần (single-flight) khi nhiều luồng cùng trượt."""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from result_cache import AnalysisKey, ResultCache
+
+
+def test_lru_eviction_and_counters():
+    cache = ResultCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1          # "a" mới dùng, "b" bị đẩy ra trước
+    cache.put("c", 3)
+    assert "b" not in cache and "a" in cache and "c" in cache
+    assert cache.get("b", "x") == "x"
+    assert cache.info() == {"hits": 1, "misses": 1, "size": 2, "maxsize": 2}
+    cache.clear()
+    assert len(cache) == 0 and cache.info()["hits"] == 0
+
+
+def test_keys_ignore_unrelated_parameters():
+    key = AnalysisKey("lau_ra", "v1", 0, "GĐB", empty_tt=4)
+    assert key == AnalysisKey("lau_ra", "v1", 0, "GĐB", None, None, 4)
+    assert key != key._replace(version="v2")
+
+
+def test_concurrent_misses_compute_once():
+    cache = ResultCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return object()
+
+    with ThreadPoolExecutor(8) as pool:
+        futures = [pool.submit(cache.get_or_compute, "k", compute) for _ in range(8)]
+        values = [f.result() for f in futures]
+    assert len(calls) == 1
+    assert all(v is values[0] for v in values)
+    assert cache._computing == {}
+
+
+def test_errors_reach_every_waiter_and_are_not_cached():
+    cache = ResultCache()
+    calls = []
+
+    def fail():
+        calls.append(1)
+        time.sleep(0.2)
+        raise RuntimeError("boom")
+
+    with ThreadPoolExecutor(4) as pool:
+        futures = [pool.submit(cache.get_or_compute, "k", fail) for _ in range(4)]
+        for f in futures:
+            with pytest.raises(RuntimeError, match="boom"):
+                f.result()
+    assert len(calls) == 1
+    assert "k" not in cache and cache._computing == {}
+    assert cache.get_or_compute("k", lambda: 5) == 5
@@ -0,0 +1,51 @@
+"""Kiểm định Monte Carlo: tất định theo seed và khớp phép đếm trực tiếp."""
+
+import numpy as np
+import pytest
+
+from significance import BLOCK, level_mask, significance, simulate
+
+
+@pytest.fixture
+def strategy():
+    rng = np.random.default_rng(9)
+    levels = rng.integers(-1, 5, size=(80, 100))
+    levels[7] = -1
+    codes = rng.integers(0, 100, size=80)
+    codes[11] = -1
+    return level_mask(levels, (0, 1)), codes
+
+
+def test_level_mask():
+    levels = np.array([[0, 1, 2, -1], [-1, -1, -1, -1]])
+    assert level_mask(levels, [1, 2, -1]).tolist() == [[False, True, True, False], [False] * 4]
+
+
+def test_observed_hits_match_naive(strategy):
+    played, codes = strategy
+    days = [(row, c) for row, c in zip(played, codes) if c >= 0 and row.any()]
+    out = significance(played, codes, simulations=500)
+    assert out["days"] == len(days)
+    assert out["hits"] == sum(bool(row[c]) for row, c in days)
+    assert out["expected"] == pytest.approx(np.mean([row.mean() for row, _ in days]))
+    assert 0 < out["p_value"] <= 1
+    assert out["ci_low"] <= out["hit_rate"] <= out["ci_high"]
+
+
+@pytest.mark.parametrize("null", ["uniform", "shuffle"])
+def test_simulation_depends_only_on_seed(strategy, null):
+    played, codes = strategy
+    ok = codes >= 0
+    a = simulate(played[ok], codes[ok], BLOCK + 300, null, seed=4)
+    assert len(a) == BLOCK + 300
+    assert np.array_equal(a, simulate(played[ok], codes[ok], BLOCK + 300, null, seed=4, workers=2))
+    assert not np.array_equal(a, simulate(played[ok], codes[ok], BLOCK + 300, null, seed=5))
+    assert a.mean() / ok.sum() == pytest.approx(significance(played, codes, 2000, null)["expected"], abs=0.02)
+
+
+def test_no_days_and_bad_null(strategy):
+    played, _ = strategy
+    out = significance(played, np.full(len(played), -1))
+    assert out["days"] == 0 and out["p_value"] is None
+    with pytest.raises(ValueError):
+        simulate(played, np.zeros(len(played), dtype=int), null="normal")
@@ -0,0 +1,164 @@
+"""DrawStore (thêm / ghi đè theo ngày) và ingest từ các trang HTML đã lưu."""
+
+import sqlite3
+from datetime import date, timedelta
+
+import pytest
+
+import store as store_module
+from conftest import fixture, store_rows
+from parsers import parse_congcuxoso_dated, parse_dien_toan, parse_than_tai
+from store import SOURCES, DrawStore, _calendar_dated, ingest, parse_draw_date
+
+TODAY = date(2026, 10, 17)
+HOLIDAY = date(2026, 10, 7)
+
+
+@pytest.fixture
+def db(tmp_path):
+    return DrawStore(str(tmp_path / "draws.sqlite3"))
+
+
+class FakePages:
+    """Thay data_fetcher.fetch_all: phân tích các trang fixture (có thể đã sửa) và ghi lại yêu cầu."""
+
+    def __init__(self):
+        self.pages = {
+            "dien_toan": fixture("dien_toan.html"),
+            "than_tai": fixture("than_tai.html"),
+            "xsmb": fixture("congcuxoso_db.html"),
+            "giai_nhat": fixture("congcuxoso_db.html"),
+        }
+        self.requests = []
+
+    def __call__(self, days):
+        self.requests.append(days)
+        parse = {"dien_toan": parse_dien_toan, "than_tai": parse_than_tai,
+                 "xsmb": parse_congcuxoso_dated, "giai_nhat": parse_congcuxoso_dated}
+        return {s: parse[s](self.pages[s], n) for s, n in days.items()}, {s: 0.0 for s in days}
+
+
+@pytest.fixture
+def pages(monkeypatch):
+    fake = FakePages()
+    monkeypatch.setattr(store_module.data_fetcher, "fetch_all", fake)
+    return fake
+
+
+def test_parse_draw_date():
+    assert parse_draw_date("Ngày 07/10/2026") == date(2026, 10, 7)
+    assert parse_draw_date("Thứ 4 - 7-10-2026") == date(2026, 10, 7)
+    assert parse_draw_date("Ngày 31/02/2026") is None
+    assert parse_draw_date("") is None
+
+
+def test_add_keeps_and_upsert_overwrites(db):
+    d1, d2 = date(2026, 10, 15), date(2026, 10, 16)
+    assert db.add("xsmb", [(d1, "Ngày 15/10/2026", "12345"), (d2, "Ngày 16/10/2026", "54321")]) == 2
+    assert db.add("xsmb", [(d1, "Ngày 15/10/2026", "99999")]) == 0
+    assert db.load("xsmb") == [(d2, "Ngày 16/10/2026", "54321"), (d1, "Ngày 15/10/2026", "12345")]
+
+    # Kỳ không đổi không được tính; kỳ sửa được ghi đè
+    assert db.upsert("xsmb", [(d1, "Ngày 15/10/2026", "12345"), (d2, "Ngày 16/10/2026", "00000")]) == 1
+    assert db.load("xsmb", limit=1) == [(d2, "Ngày 16/10/2026", "00000")]
+    assert db.count("xsmb") == 2 and db.count("giai_nhat") == 0
+    assert db.last_date("xsmb") == d2 and db.last_date("giai_nhat") is None
+
+
+def test_upsert_span_removes_misdated_rows(db):
+    days = [date(2026, 10, 10) + timedelta(days=k) for k in range(5)]
+    db.add("giai_nhat", [(d, d.isoformat(), f"{k:05d}") for k, d in enumerate(days)])
+    kept = [(d, d.isoformat(), f"{k:05d}") for k, d in enumerate(days) if d != days[2]]
+    # Ngày 12 nằm trong khoảng nhưng không còn trên trang: bị xóa; ngày 14 ngoài khoảng được giữ
+    assert db.upsert("giai_nhat", kept[:3], span=(days[0], days[3])) == 1
+    assert [d for d, _, _ in db.load("giai_nhat")] == [days[4], days[3], days[1], days[0]]
+
+
+def test_ingest_from_saved_pages(db, pages):
+    added, timings = ingest(db, total_days=30, today=TODAY)
+    assert added == {"dien_toan": 18, "than_tai": 17, "xsmb": 18, "giai_nhat": 18}
+    assert pages.requests == [{s: 30 for s in SOURCES}]
+    assert set(timings) == set(SOURCES)
+
+    assert db.load("dien_toan", 1) == [(date(2026, 10, 16), "Ngày 16/10/2026", "1,40,514")]
+    xsmb = db.load("xsmb")
+    assert xsmb[0] == (date(2026, 10, 16), "Ngày 16/10/2026", "68767")
+    assert xsmb[-1] == (date(2026, 9, 28), "Ngày 28/09/2026", "81567")
+    assert HOLIDAY not in [d for d, _, _ in xsmb]
+    assert [d for d, _, _ in xsmb] == [d for d, _, _ in db.load("dien_toan")]
+
+
+def test_ingest_again_changes_nothing(db, pages):
+    ingest(db, total_days=30, today=TODAY)
+    added, _ = ingest(db, total_days=30, today=TODAY)
+    assert added == {s: 0 for s in SOURCES}
+    # Đã có dữ liệu: chỉ tải từ ngày đã lưu, trừ bảng tuần có kích thước cố định
+    assert pages.requests[-1] == {"dien_toan": 1, "than_tai": 1, "xsmb": 30, "giai_nhat": 30}
+    assert ingest(db, total_days=30, today=date(2026, 10, 16)) == ({s: 0 for s in SOURCES}, {})
+
+
+def test_ingest_corrects_a_stored_draw(db, pages):
+    ingest(db, total_days=30, today=TODAY)
+    pages.pages["dien_toan"] = pages.pages["dien_toan"].replace("<b>514</b>", "<b>515</b>")
+    pages.pages["xsmb"] = pages.pages["xsmb"].replace("33900", "33901")
+    added, _ = ingest(db, total_days=30, today=TODAY)
+    assert added == {"dien_toan": 1, "than_tai": 0, "xsmb": 1, "giai_nhat": 0}
+    assert db.load("dien_toan", 1)[0][2] == "1,40,515"
+    assert db.load("xsmb", 2)[1][2] == "33901"
+
+
+def test_ingest_replaces_misdated_weekly_rows(db, pages):
+    # Lần tải trước gán nhầm một số ĐB vào ngày nghỉ
+    db.add("xsmb", [(HOLIDAY, "Ngày 07/10/2026", "11111")])
+    added, _ = ingest(db, total_days=30, today=TODAY)
+    assert added["xsmb"] == 19
+    assert HOLIDAY not in [d for d, _, _ in db.load("xsmb")]
+
+
+def test_ingest_skips_a_table_that_does_not_line_up(db, pages):
+    # Bảng tuần có số ở ngày nghỉ 07/10 mà Điện Toán không quay: lịch không trùng
+    pages.pages["xsmb"] = pages.pages["xsmb"].replace("<td>-----</td>", "<td>12345</td>", 1)
+    added, _ = ingest(db, total_days=30, today=TODAY)
+    assert added["xsmb"] == 0 and db.count("xsmb") == 0
+    assert added["giai_nhat"] == 18
+
+
+def test_calendar_dated_checks_the_draw_days():
+    draws = parse_congcuxoso_dated(fixture("congcuxoso_db.html"), 100)
+    known = [date(2026, 9, 28) + timedelta(days=k) for k in range(19)]
+    draw_days = [d for d in known if d != HOLIDAY]
+    assert _calendar_dated(draws, draw_days, TODAY)[0][0] == date(2026, 10, 16)
+    # Trang Điện Toán cập nhật trước một ngày: vẫn khớp trong ANCHOR_SLACK
+    assert _calendar_dated(draws, draw_days + [date(2026, 10, 17)], TODAY)[0][0] == date(2026, 10, 16)
+    # Điện Toán có quay ngày 07/10 mà bảng tuần để trống
+    assert _calendar_dated(draws, known, TODAY) is None
+    # Điện Toán lệch hai ngày: không có ô thứ 6 nào gần kỳ mới nhất
+    assert _calendar_dated(draws, [d - timedelta(days=2) for d in known], TODAY) is None
+    assert _calendar_dated(draws, [], TODAY) is None
+
+
+def test_ingest_without_calendar_borrows_dien_toan_dates(db, pages):
+    for s in ("xsmb", "giai_nhat"):
+        pages.pages[s] = pages.pages[s].replace("<th>CN</th>", "<th>Tổng</th>")
+    added, _ = ingest(db, total_days=30, today=TODAY)
+    dt_dates = [d for d, _, _ in db.load("dien_toan")]
+    assert added["xsmb"] == 18
+    assert [d for d, _, _ in db.load("xsmb")] == dt_dates
+
+
+def test_connections_are_closed(db, draws, monkeypatch):
+    opened, connect = [], sqlite3.connect
+
+    def tracked(*args, **kwargs):
+        opened.append(connect(*args, **kwargs))
+        return opened[-1]
+
+    monkeypatch.setattr(store_module.sqlite3, "connect", tracked)
+    rows = store_rows(draws, "dien_toan")[:5]
+    db.add("dien_toan", rows)
+    db.upsert("dien_toan", rows)
+    assert db.load("dien_toan") == rows and db.count("dien_toan") == 5 and db.last_date("dien_toan") == rows[0][0]
+    assert len(opened) == 5
+    for conn in opened:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")